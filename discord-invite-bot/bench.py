@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+Discord Davet Bot Performans Ölçümleri
+Kullanım: python bench.py [ölçüm_adı ...]  (parametresiz çalıştırılırsa hepsi çalışır)
+"""
+
+import asyncio
+import gzip
+import logging
+import re
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from database import Database, apply_pragmas
+from invite_tracker import sync_invite_rows
+from log_archive import compress_log, search_logs
+from log_budget import LogBudget
+from log_pipeline import LogPipeline
+from migrations import init_schema
+from security import InviteRateTracker, MembershipIndex
+from tickets import OpenTicketIndex
+
+
+def create_bench_db(path, invited_rows=10000):
+    """Ölçümler için örnek veritabanı oluşturur"""
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS invited_users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            inviter_id INTEGER NOT NULL,
+            invited_user_id INTEGER NOT NULL,
+            invited_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            invite_code TEXT,
+            UNIQUE(invited_user_id)
+        )
+    ''')
+    conn.executemany(
+        'INSERT INTO invited_users (inviter_id, invited_user_id, invite_code) VALUES (?, ?, ?)',
+        ((i % 100, i, 'CODE') for i in range(invited_rows))
+    )
+    conn.commit()
+    conn.close()
+
+
+def report(name, count, elapsed):
+    print(f"   {name:<32} {elapsed * 1000:9.1f} ms  ({count / elapsed:,.0f} işlem/sn)")
+
+
+def bench_db_pool(lookups=10000):
+    """Her çağrıda bağlantı açma ile paylaşımlı havuzu karşılaştırır"""
+    print(f"🧪 Veritabanı havuzu: {lookups} is_user_already_invited sorgusu")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        create_bench_db(path)
+        sql = 'SELECT id FROM invited_users WHERE invited_user_id = ?'
+
+        # Eski yol: her sorguda yeni bağlantı
+        start = time.perf_counter()
+        for i in range(lookups):
+            conn = sqlite3.connect(path)
+            conn.execute(sql, (i,)).fetchone()
+            conn.close()
+        report("connect-per-call", lookups, time.perf_counter() - start)
+
+        async def pooled():
+            db = Database(path)
+            try:
+                start = time.perf_counter()
+                for i in range(lookups):
+                    await db.fetchone(sql, (i,))
+                report("havuz (sıralı await)", lookups, time.perf_counter() - start)
+
+                start = time.perf_counter()
+                for batch in range(0, lookups, 100):
+                    await asyncio.gather(*(db.fetchone(sql, (i,)) for i in range(batch, batch + 100)))
+                report("havuz (100'lük gather)", lookups, time.perf_counter() - start)
+            finally:
+                db.close()
+
+        asyncio.run(pooled())
+    print()
+
+
+def bench_invite_rates(rows=1_000_000, checks=10000):
+    """is_suspicious_inviter: COUNT(*) sorguları ile kayan pencere sayaçlarını karşılaştırır"""
+    print(f"🧪 Davet hız kontrolü: {rows:,} geçmiş davet, {checks} kontrol")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        conn = sqlite3.connect(path)
+        init_schema(conn)
+        now = datetime.now()
+        # 1000 davet eden, son 30 güne yayılmış davetler
+        conn.executemany(
+            'INSERT INTO invited_users (inviter_id, invited_user_id, invited_at, invite_code) VALUES (?, ?, ?, ?)',
+            ((i % 1000, i, now - timedelta(seconds=(i * 2.6) % (30 * 86400)), 'CODE') for i in range(rows))
+        )
+        conn.commit()
+
+        def sql_check(inviter_id):
+            recent = conn.execute('''
+                SELECT COUNT(*) FROM invited_users
+                WHERE inviter_id = ? AND invited_at >= ?
+            ''', (inviter_id, now - timedelta(hours=1))).fetchone()[0]
+            daily = conn.execute('''
+                SELECT COUNT(*) FROM invited_users
+                WHERE inviter_id = ? AND invited_at >= ?
+            ''', (inviter_id, now - timedelta(days=1))).fetchone()[0]
+            return recent > 20 or daily > 100
+
+        start = time.perf_counter()
+        for i in range(checks):
+            sql_check(i % 1000)
+        report("COUNT(*) sorguları (indeksli)", checks, time.perf_counter() - start)
+
+        conn.execute('DROP INDEX idx_invited_users_inviter')
+        start = time.perf_counter()
+        for i in range(checks // 1000):
+            sql_check(i % 1000)
+        report("COUNT(*) sorguları (indekssiz)", checks // 1000, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        history = conn.execute(
+            'SELECT inviter_id, invited_at FROM invited_users WHERE invited_at >= ?',
+            (now - timedelta(days=1),)
+        ).fetchall()
+        tracker = InviteRateTracker()
+        tracker.load((inviter_id, datetime.fromisoformat(invited_at).timestamp()) for inviter_id, invited_at in history)
+        report("sayaçları kurma (başlangıç)", len(history), time.perf_counter() - start)
+        conn.close()
+
+        start = time.perf_counter()
+        for i in range(checks):
+            tracker.is_over_limit(i % 1000, 20, 100)
+        report("kayan pencere sayaçları", checks, time.perf_counter() - start)
+    print()
+
+
+def bench_membership(ids=1_000_000, lookups=100_000):
+    """Üyelik indeksinin bellek kullanımını ve sorgu hızını ölçer"""
+    print(f"🧪 Üyelik indeksi: {ids:,} kullanıcı kimliği, {lookups:,} sorgu")
+    # Discord snowflake benzeri kimlikler
+    base = 1_000_000_000_000_000_000
+    user_ids = lambda: (base + i * 7919 for i in range(ids))
+    missing = [base + i * 7919 + 1 for i in range(lookups)]
+
+    def measure(build):
+        tracemalloc.start()
+        structure = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return structure, size
+
+    plain_set, set_size = measure(lambda: set(user_ids()))
+    index, index_size = measure(lambda: _loaded_index(user_ids(), None))
+    bloom_index, bloom_size = measure(lambda: _loaded_index(user_ids(), 1))
+
+    for name, structure, size in (
+        ("python set", plain_set, set_size),
+        ("sıralı dizi", index, index_size),
+        ("sıralı dizi + Bloom", bloom_index, bloom_size),
+    ):
+        print(f"   {name:<32} {size / ids:6.1f} bayt/kimlik  ({size / 1024 / 1024:.1f} MB / {ids:,})")
+        start = time.perf_counter()
+        for user_id in missing:
+            user_id in structure
+        report("  negatif sorgu", lookups, time.perf_counter() - start)
+    print()
+
+
+def _loaded_index(user_ids, bloom_threshold):
+    index = MembershipIndex(bloom_threshold=bloom_threshold)
+    index.load(user_ids)
+    return index
+
+
+def bench_load_invites(invites=5000):
+    """load_invites: davet başına SELECT + UPDATE/INSERT ile toplu UPSERT'i karşılaştırır"""
+    print(f"🧪 Davet senkronizasyonu: {invites:,} davet (yarısı mevcut)")
+    now = datetime.now()
+    rows = [(f"CODE{i:06d}", i % 500 + 1, i % 20, now) for i in range(invites)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, name in enumerate(("davet başına sorgu", "toplu UPSERT")):
+            path = os.path.join(tmp, f"bench{i}.db")
+            conn = sqlite3.connect(path)
+            init_schema(conn)
+            conn.executemany(
+                'INSERT INTO invite_codes (code, user_id, uses) VALUES (?, ?, 0)',
+                ((code, inviter_id) for code, inviter_id, _, _ in rows[::2])
+            )
+            conn.commit()
+            cursor = conn.cursor()
+
+            start = time.perf_counter()
+            if name == "toplu UPSERT":
+                sync_invite_rows(cursor, rows, 0)
+            else:
+                for code, inviter_id, uses, created_at in rows:
+                    cursor.execute('SELECT id FROM invite_codes WHERE code = ?', (code,))
+                    if cursor.fetchone():
+                        cursor.execute(
+                            'UPDATE invite_codes SET user_id = ?, uses = ?, created_at = ? WHERE code = ?',
+                            (inviter_id, uses, created_at, code)
+                        )
+                    else:
+                        cursor.execute(
+                            'INSERT INTO invite_codes (code, user_id, created_at, uses) VALUES (?, ?, ?, ?)',
+                            (code, inviter_id, created_at, uses)
+                        )
+            conn.commit()
+            report(name, invites, time.perf_counter() - start)
+            conn.close()
+    print()
+
+
+def bench_ticket_messages(messages=20000, channels=2000, tickets=20):
+    """on_message: her mesajda tickets sorgusu ile açık ticket indeksini karşılaştırır"""
+    print(f"🧪 on_message: {messages:,} mesaj, {channels:,} kanal, {tickets} açık ticket")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        conn = sqlite3.connect(path)
+        init_schema(conn)
+        # Geçmişte kapatılmış çok sayıda ticket + birkaç açık ticket
+        conn.executemany('''
+            INSERT INTO tickets (guild_id, ticket_number, user_id, channel_id, category_id, category_name, status)
+            VALUES (1, ?, ?, ?, 'destek', 'Destek', ?)
+        ''', ((n, n, channels + n if n >= tickets else n, 'closed' if n >= tickets else 'open') for n in range(50000)))
+        conn.commit()
+        conn.close()
+
+        sql = '''
+            SELECT guild_id, ticket_number, user_id
+            FROM tickets
+            WHERE channel_id = ? AND status = 'open'
+        '''
+
+        async def run():
+            db = Database(path)
+            try:
+                start = time.perf_counter()
+                hits = 0
+                for i in range(messages):
+                    if await db.fetchone(sql, (i % channels,)):
+                        hits += 1
+                report("veritabanı sorgusu", messages, time.perf_counter() - start)
+
+                index = OpenTicketIndex()
+                index.load(await db.fetchall(
+                    "SELECT channel_id, guild_id, ticket_number, user_id FROM tickets WHERE status = 'open'"
+                ))
+                start = time.perf_counter()
+                index_hits = 0
+                for i in range(messages):
+                    if index.get(i % channels):
+                        index_hits += 1
+                report("bellek içi indeks", messages, time.perf_counter() - start)
+                assert hits == index_hits
+            finally:
+                db.close()
+
+        asyncio.run(run())
+    print()
+
+
+def bench_journal_modes(commits=2000, readers=4):
+    """Varsayılan rollback journal ile WAL ayarlarında commit/sn karşılaştırır"""
+    print(f"🧪 Journal modları: {commits} commit (eşzamanlı {readers} okuyucu ile)")
+
+    modes = [
+        ("DELETE + FULL (eski)", {'JOURNAL_MODE': 'DELETE', 'SYNCHRONOUS': 'FULL'}),
+        ("WAL + FULL", {'JOURNAL_MODE': 'WAL', 'SYNCHRONOUS': 'FULL'}),
+        ("WAL + NORMAL", {'JOURNAL_MODE': 'WAL', 'SYNCHRONOUS': 'NORMAL', 'CACHE_SIZE': -16000, 'MMAP_SIZE': 64 * 1024 * 1024}),
+    ]
+    for name, pragmas in modes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.db')
+            conn = sqlite3.connect(path)
+            apply_pragmas(conn, pragmas)
+            init_schema(conn)
+            conn.close()
+
+            async def run():
+                db = Database(path, pragmas=pragmas)
+                done = False
+                reads = 0
+
+                async def reader():
+                    # Yazma sırasında okuyucuların ilerleyip ilerlemediği
+                    nonlocal reads
+                    while not done:
+                        await db.fetchone('invited_user_exists', (1, reads))
+                        reads += 1
+
+                try:
+                    reader_tasks = [asyncio.ensure_future(reader()) for _ in range(readers)]
+                    start = time.perf_counter()
+                    for i in range(commits):
+                        await db.execute('insert_invited_user', (1, i % 100, i, datetime.now(), 'CODE'))
+                    elapsed = time.perf_counter() - start
+                    done = True
+                    await asyncio.gather(*reader_tasks)
+                    report(name, commits, elapsed)
+                    print(f"   {'':<32} eşzamanlı okuma: {reads / elapsed:,.0f}/sn")
+                finally:
+                    db.close()
+
+            asyncio.run(run())
+    print()
+
+
+def bench_guild_partition(rows_per_guild=20000, fleets=(1, 10, 50), lookups=2000):
+    """Sunucu başına sorgu maliyetinin toplam sunucu sayısıyla değişmediğini ölçer"""
+    print(f"🧪 Sunucu bölümleme: sunucu başına {rows_per_guild:,} davetli, {lookups} sorgu")
+
+    for guilds in fleets:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.db')
+            conn = sqlite3.connect(path)
+            init_schema(conn)
+            now = datetime.now()
+            conn.executemany(
+                'INSERT INTO invited_users (guild_id, inviter_id, invited_user_id, invited_at, invite_code) VALUES (?, ?, ?, ?, ?)',
+                ((g, i % 500, i, now, 'CODE') for g in range(1, guilds + 1) for i in range(rows_per_guild))
+            )
+            conn.executemany(
+                'INSERT INTO invite_codes (guild_id, code, user_id, uses) VALUES (?, ?, ?, ?)',
+                ((g, f"G{g}C{i}", i, i % 97) for g in range(1, guilds + 1) for i in range(500))
+            )
+            conn.commit()
+            conn.close()
+
+            async def run():
+                db = Database(path)
+                try:
+                    start = time.perf_counter()
+                    for i in range(lookups):
+                        await db.fetchone('invited_user_exists', (1, i))
+                    report(f"{guilds} sunucu: davetli kontrolü", lookups, time.perf_counter() - start)
+
+                    start = time.perf_counter()
+                    for _ in range(lookups // 10):
+                        await db.fetchall('invite_codes_by_uses', (1,))
+                    report(f"{guilds} sunucu: /adminstats sorgusu", lookups // 10, time.perf_counter() - start)
+                finally:
+                    db.close()
+
+            asyncio.run(run())
+    print()
+
+
+def _log_ticket(logger, number, lazy):
+    """Bir ticket'ın etkileşim + oluşturma yolundaki log satırları"""
+    data = {'component_type': 3, 'custom_id': 'ticket_category_select', 'values': ['destek']}
+    if lazy:
+        logger.info("Component interaction detected: type=%s", 'component')
+        logger.debug("Interaction data: %s", data)
+        logger.info("Final custom_id: %s", data['custom_id'])
+        logger.info("TicketCategorySelect callback başlatıldı: user=%s", f'user{number}')
+        logger.info("Seçilen değer: %s", 'destek')
+        logger.info("Kategori bulundu: %s", 'Destek')
+        logger.info("open_ticket başlatıldı: user=%s, category=%s", f'user{number}', 'Destek')
+        logger.info("Ticket kabul edildi: #%s, günlük %s/%s", number, 1, 3)
+        logger.info("Ticket #%s başarıyla oluşturuldu ve tüm işlemler tamamlandı", number)
+    else:
+        logger.info(f"Component interaction detected: type={'component'}")
+        logger.info(f"Interaction data type: {type(data)}")
+        logger.info(f"Interaction data: {data}")
+        logger.info(f"Final custom_id: {data['custom_id']}")
+        logger.info(f"TicketCategorySelect callback başlatıldı: user={f'user{number}'}")
+        logger.info(f"Seçilen değer: {'destek'}")
+        logger.info(f"Kategori bulundu: {'Destek'}")
+        logger.info(f"open_ticket başlatıldı: user={f'user{number}'}, category={'Destek'}")
+        logger.info(f"Ticket kabul edildi: #{number}, günlük {1}/{3}")
+        logger.info(f"Ticket #{number} başarıyla oluşturuldu ve tüm işlemler tamamlandı")
+
+
+def bench_logging(tickets=1000):
+    """Log çağrılarının çağıran (event loop) thread'inde harcadığı süre: doğrudan handler'lar ile kuyruk hattı"""
+    print(f"🧪 Log hattı: {tickets} ticket")
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, 'w') as devnull:
+        formatter = logging.Formatter('%(asctime)s | %(levelname)s | %(message)s', '%Y-%m-%d %H:%M:%S')
+
+        def make_handlers(name):
+            handlers = [logging.FileHandler(os.path.join(tmp, name), encoding='utf-8'), logging.StreamHandler(devnull)]
+            for handler in handlers:
+                handler.setFormatter(formatter)
+            return handlers
+
+        logger = logging.getLogger('bench.logging')
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+        # Eski yol: f-string mesajlar, dosya ve konsol yazımı çağıran thread'de
+        handlers = make_handlers('sync.log')
+        for handler in handlers:
+            logger.addHandler(handler)
+        start = time.perf_counter()
+        for number in range(tickets):
+            _log_ticket(logger, number, lazy=False)
+        report("Doğrudan handler'lar", tickets, time.perf_counter() - start)
+        for handler in handlers:
+            logger.removeHandler(handler)
+            handler.close()
+
+        # Yeni yol: gecikmeli biçimlendirme, kayıtlar kuyruğa konur
+        pipeline = LogPipeline(make_handlers('queue.log'))
+        pipeline.start(logger)
+        start = time.perf_counter()
+        for number in range(tickets):
+            _log_ticket(logger, number, lazy=True)
+        report("Kuyruk hattı (event loop)", tickets, time.perf_counter() - start)
+        start = time.perf_counter()
+        pipeline.stop()
+        report("Kuyruk hattı (arka plan boşaltma)", tickets, time.perf_counter() - start)
+        print(f"   atılan kayıt: {pipeline.stats['dropped']}")
+
+        # Log bütçesi: ticket yolu %10 örneklenir, tekrarlar dakikada 20 kayıtla sınırlanır
+        pipeline = LogPipeline(make_handlers('budget.log'))
+        budget = LogBudget({'bench._log_ticket': 0.1}, window=60, burst=20, sink=pipeline.handler.handle)
+        pipeline.handler.addFilter(budget)
+        pipeline.start(logger)
+        start = time.perf_counter()
+        for number in range(tickets):
+            _log_ticket(logger, number, lazy=True)
+        report("Kuyruk hattı + bütçe (event loop)", tickets, time.perf_counter() - start)
+        budget.flush()
+        pipeline.stop()
+        for name in ('queue.log', 'budget.log'):
+            with open(os.path.join(tmp, name), 'rb') as f:
+                lines = f.read().splitlines()
+            size = sum(len(line) + 1 for line in lines)
+            print(f"   {name:<12} {len(lines):6d} satır  {size / 1024:8.1f} KiB")
+    print()
+
+
+def bench_log_archive(days=30, lines_per_minute=10):
+    """Bir aylık log arşivinin sıkıştırılması ve bir saatlik aralıkta arama: zaman indeksi ile tam açma"""
+    print(f"🧪 Log arşivi: {days} gün, dakikada {lines_per_minute} satır")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start_time = datetime(2025, 8, 1)
+        paths = []
+        for day in range(days):
+            path = os.path.join(tmp, f"bot-{(start_time + timedelta(days=day + 1)):%Y%m%d}-000000.log")
+            with open(path, 'w', encoding='utf-8') as f:
+                for minute in range(24 * 60):
+                    stamp = (start_time + timedelta(days=day, minutes=minute)).strftime('%Y-%m-%d %H:%M:%S')
+                    for i in range(lines_per_minute):
+                        f.write(f"{stamp} | INFO | Ticket #{minute * lines_per_minute + i} oluşturuldu: user=kullanici{i}, category=Destek\n")
+            paths.append(path)
+        raw_size = sum(os.path.getsize(path) for path in paths)
+
+        start = time.perf_counter()
+        archives = [compress_log(path) for path in paths]
+        report("Sıkıştırma (dosya)", len(paths), time.perf_counter() - start)
+        archived_size = sum(os.path.getsize(path) for path in archives)
+        print(f"   {raw_size / 1024 / 1024:.1f} MiB -> {archived_size / 1024 / 1024:.1f} MiB")
+
+        since, until = '2025-08-15 10:00', '2025-08-15 10:59'
+        stats = {}
+        start = time.perf_counter()
+        indexed = sum(1 for _ in search_logs(tmp, r'user=kullanici7,', since, until, stats=stats))
+        report("Arama: zaman indeksi", 1, time.perf_counter() - start)
+        print(f"   {indexed} eşleşme, {stats['blocks_read']} blok açıldı, {stats['blocks_skipped']} blok atlandı")
+
+        # Eski yol: her arşiv baştan sona açılır, satırlar zamana göre süzülür
+        regex = re.compile(r'user=kullanici7,')
+        start = time.perf_counter()
+        scanned = 0
+        for path in archives:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if since <= line[:16] <= until and regex.search(line):
+                        scanned += 1
+        report("Arama: tam açma", 1, time.perf_counter() - start)
+        assert scanned == indexed
+    print()
+
+
+BENCHMARKS = {
+    'db_pool': bench_db_pool,
+    'invite_rates': bench_invite_rates,
+    'membership': bench_membership,
+    'load_invites': bench_load_invites,
+    'ticket_messages': bench_ticket_messages,
+    'journal_modes': bench_journal_modes,
+    'guild_partition': bench_guild_partition,
+    'logging': bench_logging,
+    'log_archive': bench_log_archive,
+}
+
+
+def main(names):
+    for name in names or BENCHMARKS:
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,12 +1,34 @@
 import discord
 from discord.ext import commands
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 from config import Config
+from database import Database, DatabaseMaintenance, apply_pragmas
+from guild_storage import GuildStorage, claim_legacy_invites, clear_invite_state
+from launcher import raise_keyboard_interrupt, shards_from_env
+from queries import INVITE_TABLES, RESET_TABLES
+from migrations import init_schema
+from invite_tracker import InviteUsesCache, JoinAttributionQueue, sync_invite_rows
+from leaderboard import Leaderboard
+from log_archive import ArchivingFileHandler, LogArchiver
+from log_budget import LogBudget, set_log_guild
+from log_forwarder import LogForwarder
+from log_pipeline import LogPipeline
+from transcripts import transcript_path, write_transcript
+from tickets import (
+    DebouncedRefresher, OpenTicketIndex, SingleFlight, TicketConfigCache, open_ticket_channel
+)
+from user_cache import UserCache
+from write_buffer import WriteBehindBuffer
+from security import InviteRateTracker, MembershipIndex
 import logging
 import os
 import json
+import re
 import asyncio
+import signal
+import time
+from collections import defaultdict
 
 # Ticket System Classes
 class TicketCategorySelect(discord.ui.Select):
@@ -30,23 +52,24 @@ class TicketCategorySelect(discord.ui.Select):
             custom_id="ticket_category_select"
         )
         
-        logger.info(f"TicketCategorySelect oluşturuldu: {len(categories)} kategori")
+        logger.info("TicketCategorySelect oluşturuldu: %d kategori", len(categories))
     
     async def callback(self, interaction: discord.Interaction):
+        set_log_guild(interaction.guild_id)
         try:
-            logger.info(f"TicketCategorySelect callback başlatıldı: user={interaction.user.display_name}")
-            logger.info(f"Seçilen değer: {self.values[0]}")
-            logger.info(f"Mevcut kategoriler: {[cat['id'] for cat in self.categories]}")
+            logger.info("TicketCategorySelect callback başlatıldı: user=%s", interaction.user.display_name)
+            logger.info("Seçilen değer: %s", self.values[0])
+            logger.debug("Mevcut kategoriler: %s", [cat['id'] for cat in self.categories])
             
             selected_category = None
             for category in self.categories:
                 if category["id"] == self.values[0]:
                     selected_category = category
-                    logger.info(f"Kategori bulundu: {category['name']}")
+                    logger.info("Kategori bulundu: %s", category['name'])
                     break
             
             if selected_category:
-                logger.info(f"Kategori seçildi: {selected_category['name']}, ticket oluşturuluyor...")
+                logger.info("Kategori seçildi: %s, ticket oluşturuluyor...", selected_category['name'])
                 await interaction.response.send_message(
                     f"✅ **{selected_category['emoji']} {selected_category['name']}** kategorisi seçildi!\n\nTicket oluşturuluyor...",
                     ephemeral=True
@@ -56,7 +79,7 @@ class TicketCategorySelect(discord.ui.Select):
                 await create_ticket_with_category(interaction, selected_category)
                 logger.info("create_ticket_with_category tamamlandı")
             else:
-                logger.warning(f"Kategori bulunamadı: {self.values[0]}")
+                logger.warning("Kategori bulunamadı: %s", self.values[0])
                 await interaction.response.send_message("❌ Kategori bulunamadı!", ephemeral=True)
         except Exception as e:
             # Sadece gerçek hataları logla, Discord interaction hatalarını loglama
@@ -69,9 +92,9 @@ class TicketCategorySelect(discord.ui.Select):
                 'error code: 10062',
                 'Unknown interaction'
             ]):
-                logger.error(f"Ticket category select callback hatası: {e}")
-                logger.error(f"Exception type: {type(e)}")
-                logger.error(f"Exception args: {e.args}")
+                logger.error("Ticket category select callback hatası: %s", e)
+                logger.error("Exception type: %s", type(e))
+                logger.error("Exception args: %s", e.args)
             try:
                 if not interaction.response.is_done():
                     await interaction.response.send_message("❌ Bir hata oluştu. Lütfen tekrar deneyin.", ephemeral=True)
@@ -83,7 +106,7 @@ class TicketCategoryView(discord.ui.View):
     def __init__(self, categories):
         super().__init__(timeout=None)
         self.add_item(TicketCategorySelect(categories))
-        logger.info(f"TicketCategoryView oluşturuldu: {len(categories)} kategori")
+        logger.info("TicketCategoryView oluşturuldu: %d kategori", len(categories))
     
     async def on_timeout(self):
         # Timeout olursa view'ı yeniden oluştur
@@ -101,8 +124,8 @@ class TicketCategoryView(discord.ui.View):
             'error code: 10062',
             'Unknown interaction'
         ]):
-            logger.error(f"Ticket view hatası: {error}")
-            logger.error(f"Error item: {item}")
+            logger.error("Ticket view hatası: %s", error)
+            logger.error("Error item: %s", item)
         try:
             if not interaction.response.is_done():
                 await interaction.response.send_message("❌ Bir hata oluştu. Lütfen tekrar deneyin.", ephemeral=True)
@@ -113,457 +136,350 @@ class TicketCategoryView(discord.ui.View):
 
 
 # Log sistemi kurulumu
+# Başlatıcı tarafından verilen shard aralığı (launcher.py); tek süreçte (None, None)
+SHARD_IDS, SHARD_COUNT = shards_from_env()
+
+# Her shard süreci kendi log dosyasına yazar
+LOG_SUFFIX = f"_shard{SHARD_IDS[0]}-{SHARD_IDS[-1]}" if SHARD_IDS else ""
+
 def setup_logging():
-    """Log dosyası ve konsol log sistemini kurar"""
+    """Log sistemini kurar; dosya ve konsol yazımı arka plan thread'inde yapılır"""
     # logs klasörü oluştur
     if not os.path.exists('logs'):
         os.makedirs('logs')
     
+    # Döndürülen dosyalar arka planda sıkıştırılır, saklama sınırını aşan eski arşivler silinir
+    archiver = LogArchiver(
+        'logs', f'bot{LOG_SUFFIX}',
+        max_age_days=Config.LOGGING['RETENTION_DAYS'],
+        max_files=Config.LOGGING['RETENTION_FILES'],
+        max_bytes=Config.LOGGING['RETENTION_BYTES'],
+        block_size=Config.LOGGING['ARCHIVE_BLOCK_BYTES']
+    )
+    # Eski sürümün günlük dosyaları (bot_YYYYMMDD.log) da arşive katılır
+    for name in os.listdir('logs'):
+        match = re.fullmatch(rf'bot_(\d{{8}}){re.escape(LOG_SUFFIX)}\.log', name)
+        if match:
+            day_end = datetime.strptime(match.group(1), '%Y%m%d').replace(hour=23, minute=59, second=59)
+            archiver.adopt(os.path.join('logs', name), day_end.timestamp())
+    archiver.start()
+    
     # Log formatı
-    log_format = '%(asctime)s | %(levelname)s | %(message)s'
-    date_format = '%Y-%m-%d %H:%M:%S'
+    formatter = logging.Formatter('%(asctime)s | %(levelname)s | %(message)s', '%Y-%m-%d %H:%M:%S')
+    handlers = [
+        # Dosyaya yazma (zaman ve boyuta göre döner)
+        ArchivingFileHandler(
+            f'logs/bot{LOG_SUFFIX}.log', archiver,
+            interval=Config.LOGGING['ROTATE_SECONDS'],
+            max_bytes=Config.LOGGING['ROTATE_BYTES']
+        ),
+        # Konsola yazma
+        logging.StreamHandler()
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
     
-    # Root logger'ı yapılandır
-    logging.basicConfig(
-        level=logging.INFO,
-        format=log_format,
-        datefmt=date_format,
-        handlers=[
-            # Dosyaya yazma
-            logging.FileHandler(
-                f'logs/bot_{datetime.now().strftime("%Y%m%d")}.log',
-                encoding='utf-8'
-            ),
-            # Konsola yazma
-            logging.StreamHandler()
-        ]
-    )
+    # Root logger yalnızca sınırlı kuyruğa yazar (event loop disk yazımını beklemez)
+    pipeline = LogPipeline(handlers, Config.LOGGING['QUEUE_SIZE'])
+    logging.getLogger().setLevel(logging.INFO)
+    pipeline.start()
     
     # Discord.py loglarını azalt
     logging.getLogger('discord').setLevel(logging.WARNING)
     logging.getLogger('discord.http').setLevel(logging.WARNING)
+    return pipeline
 
 # Log sistemini başlat
-setup_logging()
+log_pipeline = setup_logging()
 logger = logging.getLogger(__name__)
 
+# Log bütçesi: sık çağrı yerleri örneklenir, tekrarlar özetlenir, DEBUG sunucu bazlı açılır (/log-trace)
+log_budget = LogBudget(
+    Config.LOGGING['SAMPLING'],
+    window=Config.LOGGING['REPEAT_WINDOW'],
+    burst=Config.LOGGING['REPEAT_BURST'],
+    error_context=Config.LOGGING['ERROR_CONTEXT'],
+    sink=log_pipeline.handler.handle,
+    trace_loggers=[logger]
+)
+log_pipeline.handler.addFilter(log_budget)
+
 # Bot intents
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-# Bot instance
-bot = commands.Bot(command_prefix=Config.BOT_PREFIX, intents=intents)
+# Bot instance - shard modunda tek süreç birden fazla gateway bağlantısı yönetir
+if SHARD_IDS is not None:
+    bot = commands.AutoShardedBot(command_prefix=Config.BOT_PREFIX, intents=intents, shard_ids=SHARD_IDS, shard_count=SHARD_COUNT)
+elif Config.SHARDING['ENABLED']:
+    # SHARD_COUNT None ise Discord'un önerdiği sayı kullanılır
+    bot = commands.AutoShardedBot(command_prefix=Config.BOT_PREFIX, intents=intents, shard_count=Config.SHARDING['SHARD_COUNT'])
+else:
+    bot = commands.Bot(command_prefix=Config.BOT_PREFIX, intents=intents)
 
 # Veritabanı başlatma
 def init_db():
     """Veritabanını ve tabloları oluşturur"""
     conn = sqlite3.connect(Config.DATABASE_NAME)
-    cursor = conn.cursor()
-    
-    # Davet kodları tablosu - UNIQUE(user_id) kısıtlaması kaldırıldı
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS invite_codes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            code TEXT UNIQUE NOT NULL,
-            user_id INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            uses INTEGER DEFAULT 0
-        )
-    ''')
-    
-    # Davet edilen kullanıcılar tablosu
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS invited_users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            inviter_id INTEGER NOT NULL,
-            invited_user_id INTEGER NOT NULL,
-            invited_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            invite_code TEXT,
-            UNIQUE(invited_user_id)
-        )
-    ''')
+    # WAL kalıcıdır; diğer bağlantılar açılmadan önce ayarlanır
+    apply_pragmas(conn, Config.DATABASE_PRAGMAS)
     
-    # Şüpheli davet tespiti için tablo
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS suspicious_invites (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            inviter_id INTEGER NOT NULL,
-            invite_count INTEGER DEFAULT 1,
-            first_invite_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            last_invite_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Bot koruması için tablo
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS bot_protection (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            is_bot BOOLEAN DEFAULT FALSE,
-            detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Ticket sistemi tabloları
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS ticket_config (
-            guild_id INTEGER PRIMARY KEY,
-            category_id INTEGER,
-            support_role_id INTEGER,
-            ticket_counter INTEGER DEFAULT 1,
-            daily_limit INTEGER DEFAULT 3,
-            log_channel_id INTEGER
-        )
-    ''')
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS tickets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            guild_id INTEGER NOT NULL,
-            ticket_number INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            channel_id INTEGER NOT NULL,
-            category_id TEXT NOT NULL,
-            category_name TEXT NOT NULL,
-            status TEXT DEFAULT 'open',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            closed_at TIMESTAMP,
-            closed_by INTEGER
-        )
-    ''')
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_daily_tickets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            guild_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            date TEXT NOT NULL,
-            count INTEGER DEFAULT 0,
-            UNIQUE(guild_id, user_id, date)
-        )
-    ''')
-    
-    conn.commit()
+    # Tabloları oluştur ve şema migration'larını uygula
+    init_schema(conn)
     conn.close()
 
 # Veritabanını başlat
 init_db()
 
+# Paylaşımlı veritabanı bağlantı havuzu
+db = Database(Config.DATABASE_NAME, pragmas=Config.DATABASE_PRAGMAS)
+
+# Periyodik WAL checkpoint ve PRAGMA optimize
+db_maintenance = DatabaseMaintenance(
+    db,
+    checkpoint_interval=Config.DATABASE_MAINTENANCE['CHECKPOINT_INTERVAL'],
+    optimize_interval=Config.DATABASE_MAINTENANCE['OPTIMIZE_INTERVAL']
+)
+
+# Sık güncellenen sayaçlar (şüpheli aktivite, bot işaretleri, davet kullanımları) toplu yazılır
+counter_buffer = WriteBehindBuffer(
+    db,
+    interval=Config.WRITE_BEHIND['INTERVAL'],
+    max_pending=Config.WRITE_BEHIND['MAX_PENDING']
+)
+
+# Sunucu bazlı davet verisi (shard modunda sunucu başına ayrı dosya, ilk erişimde açılır)
+guild_storage = GuildStorage(
+    db,
+    counter_buffer,
+    # Birden fazla süreçte her sunucunun davet dosyası tek sürece aittir
+    shard_directory=Config.INVITE_SHARDS['DIRECTORY'] if Config.INVITE_SHARDS['ENABLED'] or SHARD_IDS else None,
+    pragmas=Config.DATABASE_PRAGMAS,
+    buffer_interval=Config.WRITE_BEHIND['INTERVAL'],
+    buffer_max_pending=Config.WRITE_BEHIND['MAX_PENDING']
+)
+
+# Sunucu bazlı davet kullanım anlık görüntüsü
+invite_cache = InviteUsesCache()
+
+# Davet eden başına saatlik/günlük kayan pencere sayaçları
+invite_rates = InviteRateTracker()
+
+# Sunucu başına davet edilmiş ve genel bot olarak işaretlenmiş kullanıcı indeksleri (negatif sorgular diske gitmez)
+invited_indexes = defaultdict(lambda: MembershipIndex(bloom_threshold=Config.MEMBERSHIP_BLOOM_THRESHOLD))
+bot_index = MembershipIndex(bloom_threshold=Config.MEMBERSHIP_BLOOM_THRESHOLD)
+
+# Sunucu başına artımlı güncellenen davet sıralaması (ilk erişimde yüklenir)
+leaderboards = {}
+
+# Açık ticket kanalları (on_message her mesajda veritabanına gitmez)
+open_tickets = OpenTicketIndex()
+
+# Sunucu başına ticket konfigürasyonu önbelleği
+ticket_configs = TicketConfigCache()
+
+# (guild_id, user_id) başına tek ticket oluşturma (çift tıklama ikinci kanal açmaz)
+ticket_admissions = SingleFlight()
+
+# Kullanıcı çözümleme önbelleği (önce bellekteki üye/kullanıcı, sonra sınırlı paralel fetch)
+def get_local_user(user_id, guild=None):
+    """Kullanıcıyı API'ye gitmeden bellekten bulur"""
+    member = guild.get_member(user_id) if guild else None
+    return member or bot.get_user(user_id)
+
+user_cache = UserCache(
+    get_local_user,
+    bot.fetch_user,
+    ttl=Config.USER_CACHE['TTL'],
+    negative_ttl=Config.USER_CACHE['NEGATIVE_TTL'],
+    max_size=Config.USER_CACHE['MAX_SIZE'],
+    concurrency=Config.USER_CACHE['CONCURRENCY'],
+    not_found=discord.NotFound
+)
+
+# Toplu katılımları tek davet sorgusunda eşleştiren kuyruk
+join_queue = JoinAttributionQueue(invite_cache, lambda guild: guild.invites(), Config.JOIN_ATTRIBUTION_WINDOW)
+
 # Fake davet koruması fonksiyonları
-def is_user_already_invited(user_id):
-    """Kullanıcının daha önce davet edilip edilmediğini kontrol eder"""
-    conn = sqlite3.connect(Config.DATABASE_NAME)
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT id FROM invited_users WHERE invited_user_id = ?', (user_id,))
-    result = cursor.fetchone()
-    
-    conn.close()
+async def is_user_already_invited(guild_id, user_id):
+    """Kullanıcının bu sunucuya daha önce davet edilip edilmediğini kontrol eder"""
+    index = invited_indexes[guild_id]
+    if index.loaded:
+        return user_id in index
+    
+    store = await guild_storage.get(guild_id)
+    result = await store.db.fetchone('invited_user_exists', (guild_id, user_id))
     return result is not None
 
 def is_suspicious_inviter(inviter_id):
     """Davet eden kullanıcının şüpheli olup olmadığını kontrol eder"""
-    conn = sqlite3.connect(Config.DATABASE_NAME)
-    cursor = conn.cursor()
-    
-    # Son 1 saatteki davet sayısını kontrol et
-    cursor.execute('''
-        SELECT COUNT(*) FROM invited_users 
-        WHERE inviter_id = ? AND invited_at >= datetime('now', '-1 hour')
-    ''', (inviter_id,))
-    
-    recent_invites = cursor.fetchone()[0]
+    # Şüpheli kriterler (config'den alınır), bellekteki kayan pencerelerden O(1) okunur:
+    # - 1 saatte Config.SECURITY['MAX_INVITES_PER_HOUR']'dan fazla davet
+    # - 24 saatte Config.SECURITY['MAX_INVITES_PER_DAY']'dan fazla davet
+    return invite_rates.is_over_limit(
+        inviter_id,
+        Config.SECURITY['MAX_INVITES_PER_HOUR'],
+        Config.SECURITY['MAX_INVITES_PER_DAY']
+    )
+
+async def load_invite_rates():
+    """Davet hız sayaçlarını son 24 saatin kayıtlarından yeniden kurar"""
+    since = datetime.now() - timedelta(days=1)
     
-    # Son 24 saatteki toplam davet sayısını kontrol et
-    cursor.execute('''
-        SELECT COUNT(*) FROM invited_users 
-        WHERE inviter_id = ? AND invited_at >= datetime('now', '-24 hours')
-    ''', (inviter_id,))
+    async def guild_rows(guild):
+        store = await guild_storage.get(guild.id)
+        return await store.db.fetchall('invites_since', (guild.id, since))
     
-    daily_invites = cursor.fetchone()[0]
+    # Sayaçlar davet eden başına tüm sunucular genelinde tutulur
+    results = await asyncio.gather(*(guild_rows(guild) for guild in bot.guilds))
+    rows = [row for result in results for row in result]
     
-    conn.close()
+    def parse(rows):
+        for inviter_id, invited_at in rows:
+            try:
+                yield inviter_id, datetime.fromisoformat(str(invited_at)).timestamp()
+            except ValueError:
+                continue
     
-    # Şüpheli kriterler (config'den alınır):
-    # - 1 saatte Config.SECURITY['MAX_INVITES_PER_HOUR']'dan fazla davet
-    # - 24 saatte Config.SECURITY['MAX_INVITES_PER_DAY']'dan fazla davet
-    return (recent_invites > Config.SECURITY['MAX_INVITES_PER_HOUR'] or 
-            daily_invites > Config.SECURITY['MAX_INVITES_PER_DAY'])
+    invite_rates.load(parse(rows))
+    logger.info("📈 Davet hız sayaçları yüklendi: %s davet, %s kullanıcı", len(rows), len(invite_rates))
 
-def log_suspicious_activity(inviter_id):
+async def log_suspicious_activity(inviter_id):
     """Şüpheli davet aktivitesini loglar"""
-    conn = sqlite3.connect(Config.DATABASE_NAME)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT OR REPLACE INTO suspicious_invites 
-        (inviter_id, invite_count, first_invite_at, last_invite_at)
-        VALUES (?, 
-                COALESCE((SELECT invite_count + 1 FROM suspicious_invites WHERE inviter_id = ?), 1),
-                COALESCE((SELECT first_invite_at FROM suspicious_invites WHERE inviter_id = ?), datetime('now')),
-                datetime('now'))
-    ''', (inviter_id, inviter_id, inviter_id))
-    
-    conn.commit()
-    conn.close()
+    now = datetime.now()
+    counter_buffer.increment('add_suspicious_invites', inviter_id, (inviter_id, now, now))
 
-def is_bot_user(user_id):
+async def is_bot_user(user_id):
     """Kullanıcının bot olup olmadığını kontrol eder"""
-    conn = sqlite3.connect(Config.DATABASE_NAME)
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT is_bot FROM bot_protection WHERE user_id = ?', (user_id,))
-    result = cursor.fetchone()
+    if bot_index.loaded:
+        return user_id in bot_index
     
-    conn.close()
+    await counter_buffer.flush()
+    result = await db.fetchone('is_bot_user', (user_id,))
     return result[0] if result else False
 
-def mark_user_as_bot(user_id):
+async def mark_user_as_bot(user_id):
     """Kullanıcıyı bot olarak işaretler"""
-    conn = sqlite3.connect(Config.DATABASE_NAME)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT OR REPLACE INTO bot_protection (user_id, is_bot, detected_at)
-        VALUES (?, TRUE, datetime('now'))
-    ''', (user_id,))
-    
-    conn.commit()
-    conn.close()
+    counter_buffer.set('mark_bot_user', user_id, (user_id, datetime.now()))
+    bot_index.add(user_id)
+
+async def load_membership_indexes():
+    """Davet edilmiş (sunucu başına) ve bot kullanıcı indekslerini veritabanından kurar"""
+    async def load_guild_index(guild):
+        store = await guild_storage.get(guild.id)
+        invited_indexes[guild.id].load(row[0] for row in await store.db.fetchall('invited_user_ids', (guild.id,)))
+    
+    await asyncio.gather(*(load_guild_index(guild) for guild in bot.guilds))
+    bot_rows = await db.fetchall('bot_user_ids')
+    bot_index.load(row[0] for row in bot_rows)
+    invited_total = sum(len(index) for index in invited_indexes.values())
+    logger.info("🛡️ Üyelik indeksleri yüklendi: %s davetli (%s sunucu), %s bot", invited_total, len(invited_indexes), len(bot_index))
 
-def can_user_invite(inviter_id, invited_user_id):
+async def can_user_invite(guild_id, inviter_id, invited_user_id):
     """Kullanıcının davet yapıp yapamayacağını kontrol eder"""
     # Bot koruması (config'den kontrol et)
-    if Config.SECURITY['BOT_PROTECTION'] and is_bot_user(invited_user_id):
+    if Config.SECURITY['BOT_PROTECTION'] and await is_bot_user(invited_user_id):
         return False, "Bu kullanıcı bir bot ve davet edilemez!"
-    
+
     # Zaten davet edilmiş mi kontrol et (config'den kontrol et)
-    if Config.SECURITY['DUPLICATE_INVITE_PROTECTION'] and is_user_already_invited(invited_user_id):
+    if Config.SECURITY['DUPLICATE_INVITE_PROTECTION'] and await is_user_already_invited(guild_id, invited_user_id):
         return False, "Bu kullanıcı zaten davet edilmiş!"
-    
+
     # Şüpheli davet eden kontrol et (config'den kontrol et)
     if Config.SECURITY['SUSPICIOUS_ACTIVITY_LOGGING'] and is_suspicious_inviter(inviter_id):
-        log_suspicious_activity(inviter_id)
+        await log_suspicious_activity(inviter_id)
         return False, f"Çok fazla davet yapıyorsun! Saatte maksimum {Config.SECURITY['MAX_INVITES_PER_HOUR']}, günde maksimum {Config.SECURITY['MAX_INVITES_PER_DAY']} davet yapabilirsin."
-    
+
     return True, "Davet yapılabilir"
 
-def user_has_invite_link(user_id):
-    """Kullanıcının zaten davet linki olup olmadığını kontrol eder"""
-    conn = sqlite3.connect(Config.DATABASE_NAME)
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT code FROM invite_codes WHERE user_id = ?', (user_id,))
-    result = cursor.fetchone()
-    
-    conn.close()
+async def get_leaderboard(guild_id):
+    """Sunucunun davet sıralamasını getirir (yoksa veritabanından kurar)"""
+    board = leaderboards.get(guild_id)
+    if board is None:
+        store = await guild_storage.get(guild_id)
+        rows = await store.db.fetchall('inviter_totals_in_guild', (guild_id,))
+        # Beklerken başka bir görev kurduysa onu kullan
+        board = leaderboards.get(guild_id)
+        if board is None:
+            board = leaderboards[guild_id] = Leaderboard()
+            board.load(rows)
+    return board
+
+async def user_has_invite_link(guild_id, user_id):
+    """Kullanıcının bu sunucuda zaten davet linki olup olmadığını kontrol eder"""
+    store = await guild_storage.get(guild_id)
+    result = await store.db.fetchone('invite_code_exists_for_user', (guild_id, user_id))
     return result is not None
 
-def get_user_invite_link(user_id):
-    """Kullanıcının mevcut davet linkini getirir"""
-    conn = sqlite3.connect(Config.DATABASE_NAME)
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT code, uses FROM invite_codes WHERE user_id = ?', (user_id,))
-    result = cursor.fetchone()
-    
-    conn.close()
-    return result
+async def get_user_invite_link(guild_id, user_id):
+    """Kullanıcının bu sunucudaki mevcut davet linkini getirir"""
+    store = await guild_storage.get(guild_id)
+    return await store.db.fetchone('invite_link_for_user', (guild_id, user_id))
 
 # Ticket Sistemi Fonksiyonları
-def get_ticket_config(guild_id):
-    """Sunucunun ticket konfigürasyonunu getirir"""
-    try:
-        conn = sqlite3.connect(Config.DATABASE_NAME)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM ticket_config WHERE guild_id = ?', (guild_id,))
-        result = cursor.fetchone()
-        
-        conn.close()
-        
-        if result:
-            logger.debug(f"Ticket config bulundu: guild_id={guild_id}")
-            return {
-                'guild_id': result[0],
-                'category_id': result[1],
-                'support_role_id': result[2],
-                'ticket_counter': result[3],
-                'daily_limit': result[4],
-                'log_channel_id': result[5]
-            }
-        else:
-            logger.debug(f"Ticket config bulunamadı: guild_id={guild_id}")
-        return None
-    except Exception as e:
-        logger.error(f"get_ticket_config hatası: {e}")
-        return None
+async def load_ticket_config(guild_id):
+    """Sunucunun ticket konfigürasyonunu veritabanından okur"""
+    result = await db.fetchone('ticket_config', (guild_id,))
 
-def save_ticket_config(guild_id, category_id, support_role_id, daily_limit=3, log_channel_id=None):
-    """Ticket konfigürasyonunu kaydeder"""
-    try:
-        conn = sqlite3.connect(Config.DATABASE_NAME)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO ticket_config 
-            (guild_id, category_id, support_role_id, daily_limit, log_channel_id) 
-            VALUES (?, ?, ?, ?, ?)
-        ''', (guild_id, category_id, support_role_id, daily_limit, log_channel_id))
-        
-        conn.commit()
-        conn.close()
-        logger.info(f"Ticket config kaydedildi: guild_id={guild_id}, category_id={category_id}, support_role_id={support_role_id}")
-    except Exception as e:
-        logger.error(f"save_ticket_config hatası: {e}")
-        logger.error(f"Config detayları: guild_id={guild_id}, category_id={category_id}, support_role_id={support_role_id}")
+    if result:
+        logger.debug("Ticket config bulundu: guild_id=%s", guild_id)
+        return {
+            'guild_id': result[0],
+            'category_id': result[1],
+            'support_role_id': result[2],
+            'ticket_counter': result[3],
+            'daily_limit': result[4],
+            'log_channel_id': result[5]
+        }
+    logger.debug("Ticket config bulunamadı: guild_id=%s", guild_id)
+    return None
 
-def get_user_daily_tickets(guild_id, user_id):
-    """Kullanıcının günlük ticket sayısını getirir"""
+async def get_ticket_config(guild_id):
+    """Sunucunun ticket konfigürasyonunu getirir (önbellekten)"""
     try:
-        conn = sqlite3.connect(Config.DATABASE_NAME)
-        cursor = conn.cursor()
-        
-        today = datetime.now().strftime('%Y-%m-%d')
-        cursor.execute('''
-            SELECT count FROM user_daily_tickets 
-            WHERE guild_id = ? AND user_id = ? AND date = ?
-        ''', (guild_id, user_id, today))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        count = result[0] if result else 0
-        logger.debug(f"Günlük ticket sayısı: guild_id={guild_id}, user_id={user_id}, count={count}")
-        return count
+        return await ticket_configs.get(guild_id, load_ticket_config)
     except Exception as e:
-        logger.error(f"get_user_daily_tickets hatası: {e}")
-        return 0
+        logger.error("get_ticket_config hatası: %s", e)
+        return None
 
-def increment_user_daily_tickets(guild_id, user_id):
-    """Kullanıcının günlük ticket sayısını artırır"""
+async def save_ticket_config(guild_id, category_id, support_role_id, daily_limit=3, log_channel_id=None):
+    """Ticket konfigürasyonunu kaydeder"""
     try:
-        conn = sqlite3.connect(Config.DATABASE_NAME)
-        cursor = conn.cursor()
-        
-        today = datetime.now().strftime('%Y-%m-%d')
-        cursor.execute('''
-            INSERT OR REPLACE INTO user_daily_tickets 
-            (guild_id, user_id, date, count) 
-            VALUES (?, ?, ?, COALESCE((SELECT count + 1 FROM user_daily_tickets WHERE guild_id = ? AND user_id = ? AND date = ?), 1))
-        ''', (guild_id, user_id, today, guild_id, user_id, today))
-        
-        conn.commit()
-        conn.close()
-        logger.info(f"Günlük ticket sayısı artırıldı: guild_id={guild_id}, user_id={user_id}, date={today}")
-    except Exception as e:
-        logger.error(f"increment_user_daily_tickets hatası: {e}")
-        logger.error(f"Detaylar: guild_id={guild_id}, user_id={user_id}, date={today}")
+        await db.execute('save_ticket_config', (guild_id, category_id, support_role_id, daily_limit, log_channel_id))
+        ticket_configs.invalidate(guild_id)
 
-def create_ticket_record(guild_id, ticket_number, user_id, channel_id, category_id, category_name):
-    """Yeni ticket kaydı oluşturur"""
-    try:
-        logger.info(f"create_ticket_record başlatıldı: ticket_number={ticket_number}, user_id={user_id}, channel_id={channel_id}")
-        conn = sqlite3.connect(Config.DATABASE_NAME)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO tickets 
-            (guild_id, ticket_number, user_id, channel_id, category_id, category_name) 
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (guild_id, ticket_number, user_id, channel_id, category_id, category_name))
-        
-        conn.commit()
-        conn.close()
-        logger.info(f"Ticket kaydı veritabanına eklendi: ticket_number={ticket_number}")
+        logger.info("Ticket config kaydedildi: guild_id=%s, category_id=%s, support_role_id=%s", guild_id, category_id, support_role_id)
     except Exception as e:
-        logger.error(f"create_ticket_record hatası: {e}")
-        logger.error(f"Detaylar: guild_id={guild_id}, ticket_number={ticket_number}, user_id={user_id}, channel_id={channel_id}")
-        raise
+        logger.error("save_ticket_config hatası: %s", e)
+        logger.error("Config detayları: guild_id=%s, category_id=%s, support_role_id=%s", guild_id, category_id, support_role_id)
 
-def get_user_active_ticket(guild_id, user_id):
-    """Kullanıcının aktif ticket'ını getirir"""
-    try:
-        conn = sqlite3.connect(Config.DATABASE_NAME)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM tickets 
-            WHERE guild_id = ? AND user_id = ? AND status = 'open'
-            ORDER BY created_at DESC LIMIT 1
-        ''', (guild_id, user_id))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result:
-            logger.debug(f"Aktif ticket bulundu: guild_id={guild_id}, user_id={user_id}, ticket_id={result[0]}")
-            return {
-                'id': result[0],
-                'guild_id': result[1],
-                'ticket_number': result[2],
-                'user_id': result[3],
-                'channel_id': result[4],
-                'category_id': result[5],
-                'category_name': result[6],
-                'status': result[7],
-                'created_at': result[8]
-            }
-        else:
-            logger.debug(f"Aktif ticket bulunamadı: guild_id={guild_id}, user_id={user_id}")
-        return None
-    except Exception as e:
-        logger.error(f"get_user_active_ticket hatası: {e}")
-        return None
+async def load_open_tickets():
+    """Açık ticket kanalları indeksini veritabanından kurar"""
+    # Kanalı hiç oluşturulamamış yarım kalmış kabulleri temizle
+    await db.execute('delete_stale_ticket_admissions')
+    rows = await db.fetchall('open_ticket_channels')
+    open_tickets.load(rows)
+    logger.info("🎫 %s açık ticket kanalı yüklendi", len(open_tickets))
 
-def close_ticket(ticket_id, closed_by):
+async def close_ticket(ticket_id, closed_by):
     """Ticket'ı kapatır"""
     try:
-        conn = sqlite3.connect(Config.DATABASE_NAME)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE tickets 
-            SET status = 'closed', closed_at = ?, closed_by = ? 
-            WHERE id = ?
-        ''', (datetime.now(), closed_by, ticket_id))
-        
-        conn.commit()
-        conn.close()
-        logger.info(f"Ticket {ticket_id} veritabanında kapatıldı, kapatan: {closed_by}")
-    except Exception as e:
-        logger.error(f"close_ticket hatası: {e}")
-        logger.error(f"Ticket ID: {ticket_id}, Kapatan: {closed_by}")
+        def close(cursor):
+            cursor.execute('close_ticket', (datetime.now(), closed_by, ticket_id))
+            if cursor.rowcount == 0:
+                return None
+            cursor.execute('ticket_channel_by_id', (ticket_id,))
+            return cursor.fetchone()
 
-def get_next_ticket_number(guild_id):
-    """Sonraki ticket numarasını getirir"""
-    try:
-        logger.info(f"get_next_ticket_number başlatıldı: guild_id={guild_id}")
-        conn = sqlite3.connect(Config.DATABASE_NAME)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT ticket_counter FROM ticket_config WHERE guild_id = ?', (guild_id,))
-        result = cursor.fetchone()
-        
+        result = await db.transaction(close)
         if result:
-            ticket_number = result[0]
-            logger.info(f"Mevcut ticket sayacı: {ticket_number}")
-            # Sayaçı artır
-            cursor.execute('UPDATE ticket_config SET ticket_counter = ? WHERE guild_id = ?', (ticket_number + 1, guild_id))
-            conn.commit()
-            conn.close()
-            logger.info(f"Ticket sayacı artırıldı: {ticket_number} -> {ticket_number + 1}")
-            return ticket_number
-        else:
-            logger.warning(f"Ticket sayacı bulunamadı, varsayılan 1 döndürülüyor")
-        
-        conn.close()
-        return 1
+            open_tickets.remove(result[0])
+
+        logger.info("Ticket %s veritabanında kapatıldı, kapatan: %s", ticket_id, closed_by)
     except Exception as e:
-        logger.error(f"get_next_ticket_number hatası: {e}")
-        logger.error(f"Detaylar: guild_id={guild_id}")
-        return 1
+        logger.error("close_ticket hatası: %s", e)
+        logger.error("Ticket ID: %s, Kapatan: %s", ticket_id, closed_by)
 
 # Ticket kategorileri
 TICKET_CATEGORIES = [
@@ -595,61 +511,38 @@ TICKET_CATEGORIES = [
 
 # Ticket oluşturma fonksiyonu
 async def create_ticket_with_category(interaction, selected_category):
-    """Kategori ile yeni ticket oluşturur"""
-    logger.info(f"create_ticket_with_category başlatıldı: user={interaction.user.display_name}, category={selected_category['name']}")
+    """Kategori ile yeni ticket oluşturur; aynı kullanıcının eşzamanlı istekleri tek oluşturmaya katılır"""
+    key = (interaction.guild.id, interaction.user.id)
+    if ticket_admissions.in_flight(key):
+        logger.info("Devam eden ticket oluşturmaya katılındı: user=%s", interaction.user.display_name)
+    reply = await ticket_admissions.run(key, open_ticket, interaction, selected_category)
+    try:
+        await interaction.followup.send(reply, ephemeral=True)
+    except Exception as e:
+        logger.error("Followup mesaj hatası: %s", e)
+
+async def open_ticket(interaction, selected_category):
+    """Ticket'ı oluşturur, kullanıcıya gösterilecek yanıtı döndürür"""
+    logger.info("open_ticket başlatıldı: user=%s, category=%s", interaction.user.display_name, selected_category['name'])
     guild_id = interaction.guild.id
     user_id = interaction.user.id
-    logger.info(f"Guild ID: {guild_id}, User ID: {user_id}")
+    today = datetime.now().strftime('%Y-%m-%d')
     
-    # Ticket konfigürasyonunu kontrol et
-    logger.info("Ticket konfigürasyonu kontrol ediliyor...")
-    config = get_ticket_config(guild_id)
+    # Ticket konfigürasyonunu kontrol et (önbellekten)
+    config = await get_ticket_config(guild_id)
     if not config:
-        logger.warning(f"Ticket konfigürasyonu bulunamadı: guild_id={guild_id}")
-        await interaction.followup.send("❌ Ticket sistemi kurulmamış! Lütfen admin ile iletişime geçin.", ephemeral=True)
-        return
-    logger.info(f"Ticket konfigürasyonu bulundu: category_id={config['category_id']}, support_role_id={config['support_role_id']}")
-    
-    # Günlük limit kontrolü
-    logger.info("Günlük limit kontrol ediliyor...")
-    daily_count = get_user_daily_tickets(guild_id, user_id)
-    logger.info(f"Günlük ticket sayısı: {daily_count}/{config['daily_limit']}")
-    if daily_count >= config['daily_limit']:
-        logger.warning(f"Günlük limit doldu: {daily_count}/{config['daily_limit']}")
-        await interaction.followup.send(f"❌ Günlük ticket limitiniz doldu! ({config['daily_limit']}/gün)", ephemeral=True)
-        return
+        logger.warning("Ticket konfigürasyonu bulunamadı: guild_id=%s", guild_id)
+        return "❌ Ticket sistemi kurulmamış! Lütfen admin ile iletişime geçin."
     
-    # Kullanıcının zaten açık ticket'ı var mı?
-    logger.info("Aktif ticket kontrol ediliyor...")
-    active_ticket = get_user_active_ticket(guild_id, user_id)
-    if active_ticket:
-        logger.warning(f"Aktif ticket bulundu: #{active_ticket['ticket_number']}")
-        await interaction.followup.send("❌ Zaten açık bir ticket'ınız var!", ephemeral=True)
-        return
-    logger.info("Aktif ticket bulunamadı, devam ediliyor...")
-    
-    # Ticket kanalı oluştur
-    logger.info("Ticket kanalı oluşturuluyor...")
     category = interaction.guild.get_channel(config['category_id'])
     support_role = interaction.guild.get_role(config['support_role_id'])
-    
-    logger.info(f"Kategori bulundu: {category.name if category else 'Bulunamadı'}")
-    logger.info(f"Destek rolü bulundu: {support_role.name if support_role else 'Bulunamadı'}")
-    
     if not category:
-        logger.error(f"Ticket kategorisi bulunamadı: category_id={config['category_id']}")
-        await interaction.followup.send("❌ Ticket kategorisi bulunamadı!", ephemeral=True)
-        return
-    
-    ticket_number = get_next_ticket_number(guild_id)
-    channel_name = f"ticket-{ticket_number}"
-    logger.info(f"Ticket numarası: {ticket_number}, Kanal adı: {channel_name}")
+        logger.error("Ticket kategorisi bulunamadı: category_id=%s", config['category_id'])
+        return "❌ Ticket kategorisi bulunamadı!"
     
-    try:
-        # Kanal oluştur
-        logger.info("Discord kanalı oluşturuluyor...")
-        channel = await interaction.guild.create_text_channel(
-            name=channel_name,
+    async def create_channel(ticket_number):
+        return await interaction.guild.create_text_channel(
+            name=f"ticket-{ticket_number}",
             category=category,
             overwrites={
                 interaction.guild.default_role: discord.PermissionOverwrite(read_messages=False),
@@ -658,19 +551,30 @@ async def create_ticket_with_category(interaction, selected_category):
                 interaction.guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True)
             }
         )
-        
-        # Ticket kaydını oluştur
-        logger.info("Ticket kaydı veritabanında oluşturuluyor...")
-        create_ticket_record(guild_id, ticket_number, user_id, channel.id, selected_category["id"], selected_category["name"])
-        logger.info(f"Ticket kaydı oluşturuldu: ticket_number={ticket_number}, channel_id={channel.id}")
-        
-        # Günlük sayacı artır
-        logger.info("Günlük ticket sayacı artırılıyor...")
-        increment_user_daily_tickets(guild_id, user_id)
-        logger.info("Günlük ticket sayacı artırıldı")
+    
+    try:
+        # Limit kontrolü, aktif ticket kontrolü, numara ayırma, kayıt ve günlük sayaç tek transaction'da;
+        # kanal açılamazsa kabul geri alınır (kullanıcının günlük hakkı iade edilir)
+        status, value = await open_ticket_channel(
+            db, guild_id, user_id, today, config['daily_limit'],
+            selected_category["id"], selected_category["name"], create_channel
+        )
+        if status == 'limit':
+            logger.warning("Günlük limit doldu: %s/%s", value, config['daily_limit'])
+            return f"❌ Günlük ticket limitiniz doldu! ({config['daily_limit']}/gün)"
+        if status == 'active':
+            logger.warning("Aktif ticket bulundu: #%s", value)
+            return "❌ Zaten açık bir ticket'ınız var!"
+        if status == 'no_config':
+            logger.warning("Ticket sayacı bulunamadı: guild_id=%s", guild_id)
+            return "❌ Ticket sistemi kurulmamış! Lütfen admin ile iletişime geçin."
+        
+        ticket_id, ticket_number, daily_count, channel = value
+        ticket_configs.update(guild_id, ticket_counter=ticket_number + 1)
+        open_tickets.add(channel.id, guild_id, ticket_number, user_id)
+        logger.info("Ticket kabul edildi: #%s, günlük %s/%s", ticket_number, daily_count + 1, config['daily_limit'])
         
         # Hoş geldin mesajı
-        logger.info("Hoş geldin embed'i oluşturuluyor...")
         embed = discord.Embed(
             title=f"🎉 {selected_category['emoji']} {selected_category['name']} Ticket'ı Oluşturuldu!",
             description=f"Merhaba {interaction.user.mention}!\n\n**Kategori:** {selected_category['emoji']} {selected_category['name']}\n**Açıklama:** {selected_category['description']}\n\nDestek ekibimiz en kısa sürede size yardımcı olacaktır.",
@@ -682,78 +586,79 @@ async def create_ticket_with_category(interaction, selected_category):
             inline=False
         )
         embed.add_field(name="📝 Bilgi", value="Lütfen sorununuzu detaylı bir şekilde açıklayın.", inline=False)
-
         
-        # Ticket mesajını gönder (kapatma butonu olmadan)
-        logger.info("Ticket mesajı gönderiliyor...")
-        await channel.send(embed=embed)
-        logger.info("Hoş geldin mesajı kanala gönderildi")
-        
-        # Kullanıcıya bilgi ver
-        logger.info("Kullanıcıya followup mesajı gönderiliyor...")
-        try:
-            await interaction.followup.send(f"✅ **{selected_category['emoji']} {selected_category['name']}** ticket'ı oluşturuldu! {channel.mention}", ephemeral=True)
-            logger.info("Kullanıcıya followup mesajı gönderildi")
-        except Exception as e:
-            logger.error(f"Followup mesaj hatası: {e}")
-        
-        # Destek ekibine bildirim
+        # Birbirinden bağımsız Discord istekleri eşzamanlı gönderilir
+        sends = {
+            "Hoş geldin mesajı": channel.send(embed=embed),
+            "Ticket aktivite logu": log_ticket_activity(guild_id, "Oluşturuldu", ticket_number, user_id, channel.id, f"Kategori: {selected_category['name']}")
+        }
         if support_role:
-            logger.info("Destek ekibine bildirim gönderiliyor...")
-            try:
-                notification_embed = discord.Embed(
-                    title="🆕 Yeni Ticket",
-                    description=f"**Kategori:** {selected_category['emoji']} {selected_category['name']}\n**Kullanıcı:** {interaction.user.mention}\n**Kanal:** {channel.mention}\n**Numara:** #{ticket_number}",
-                    color=0x5865F2  # Mavi
-                )
-                await channel.send(f"{support_role.mention}", embed=notification_embed)
-                logger.info("Destek ekibine bildirim gönderildi")
-            except Exception as e:
-                logger.error(f"Destek ekibine bildirim hatası: {e}")
+            notification_embed = discord.Embed(
+                title="🆕 Yeni Ticket",
+                description=f"**Kategori:** {selected_category['emoji']} {selected_category['name']}\n**Kullanıcı:** {interaction.user.mention}\n**Kanal:** {channel.mention}\n**Numara:** #{ticket_number}",
+                color=0x5865F2  # Mavi
+            )
+            sends["Destek ekibi bildirimi"] = channel.send(f"{support_role.mention}", embed=notification_embed)
         else:
             logger.warning("Destek rolü bulunamadı, bildirim gönderilmedi")
         
-        # Ticket oluşturma logunu gönder
-        logger.info("Ticket aktivite logu gönderiliyor...")
-        try:
-            await log_ticket_activity(guild_id, "Oluşturuldu", ticket_number, user_id, channel.id, f"Kategori: {selected_category['name']}")
-            logger.info("Ticket aktivite logu gönderildi")
-        except Exception as e:
-            logger.error(f"Ticket log hatası: {e}")
+        results = await asyncio.gather(*sends.values(), return_exceptions=True)
+        for name, result in zip(sends, results):
+            if isinstance(result, Exception):
+                logger.error("%s hatası: %s", name, result)
         
-        logger.info(f"Ticket #{ticket_number} başarıyla oluşturuldu ve tüm işlemler tamamlandı")
+        logger.info("Ticket #%s başarıyla oluşturuldu ve tüm işlemler tamamlandı", ticket_number)
+        return f"✅ **{selected_category['emoji']} {selected_category['name']}** ticket'ı oluşturuldu! {channel.mention}"
         
     except discord.Forbidden:
         logger.error("Discord Forbidden hatası: Yetki yetersiz")
-        try:
-            await interaction.followup.send("❌ Ticket oluşturulamıyor! Yetki hatası.", ephemeral=True)
-        except Exception as e:
-            logger.error(f"Forbidden followup hatası: {e}")
+        return "❌ Ticket oluşturulamıyor! Yetki hatası."
     except Exception as e:
-        logger.error(f"Ticket oluşturma genel hatası: {e}")
-        logger.error(f"Exception type: {type(e)}")
-        logger.error(f"Exception args: {e.args}")
-        try:
-            await interaction.followup.send(f"❌ Ticket oluşturulurken hata oluştu: {str(e)}", ephemeral=True)
-        except Exception as e2:
-            logger.error(f"Exception followup hatası: {e2}")
-            logger.error(f"Original error: {e}")
+        logger.error("Ticket oluşturma genel hatası: %s", e)
+        logger.error("Exception type: %s", type(e))
+        logger.error("Exception args: %s", e.args)
+        return f"❌ Ticket oluşturulurken hata oluştu: {str(e)}"
+
+@bot.event
+async def on_shard_ready(shard_id):
+    logger.info('🧩 Shard %s hazır', shard_id)
 
 @bot.event
 async def on_ready():
-    logger.info(f'✅ {bot.user} olarak giriş yapıldı!')
-    logger.info(f'📊 {len(bot.guilds)} sunucuda aktif')
-    logger.info(f'🎯 {Config.BOT_NAME} hazır!')
+    logger.info('✅ %s olarak giriş yapıldı!', bot.user)
+    if bot.shard_count:
+        logger.info('📊 %s sunucuda aktif (shard %s, toplam %s)', len(bot.guilds), bot.shard_ids, bot.shard_count)
+    else:
+        logger.info('📊 %s sunucuda aktif', len(bot.guilds))
+    logger.info('🎯 %s hazır!', Config.BOT_NAME)
     
     # Slash komutları senkronize et
     try:
         synced = await bot.tree.sync()
-        logger.info(f'✅ {len(synced)} slash komut senkronize edildi! (invite, stats, leaderboard, adminstats, suspicious, reset, help)')
+        logger.info('✅ %s slash komut senkronize edildi! (invite, stats, leaderboard, adminstats, suspicious, reset, help)', len(synced))
     except Exception as e:
-        logger.error(f'❌ Slash komut senkronizasyon hatası: {e}')
-    
-    # Mevcut davetleri yükle
-    await load_invites()
+        logger.error('❌ Slash komut senkronizasyon hatası: %s', e)
+    
+    # Başlangıç adımlarını süreleriyle çalıştır
+    async def load_leaderboard():
+        leaderboards.clear()
+        await asyncio.gather(*(get_leaderboard(guild.id) for guild in bot.guilds))
+    
+    timings = []
+    for name, step in (
+        ("davetler", load_invites),
+        ("hız sayaçları", load_invite_rates),
+        ("üyelik indeksleri", load_membership_indexes),
+        ("sıralama", load_leaderboard),
+        ("açık ticket'lar", load_open_tickets),
+    ):
+        step_start = time.perf_counter()
+        await step()
+        timings.append(f"{name}: {(time.perf_counter() - step_start) * 1000:.0f} ms")
+    logger.info("⏱️ Başlangıç süreleri: %s", ', '.join(timings))
+    
+    # Veritabanı bakım görevini başlat (yeniden bağlanmada tekrar başlatılmaz)
+    db_maintenance.start()
     
     # Persistent view'ları kaydet
     logger.info("Persistent view'lar kaydediliyor...")
@@ -761,283 +666,240 @@ async def on_ready():
     logger.info("Persistent view'lar kaydedildi")
 
 # Davet takip sistemi
+async def load_guild_invites(guild):
+    """Tek sunucunun davetlerini toplu olarak veritabanına yazar, yüklenen davet sayısını döndürür"""
+    set_log_guild(guild.id)
+    start = time.perf_counter()
+    try:
+        # Bot'un davet izni var mı kontrol et
+        if not guild.me.guild_permissions.manage_guild:
+            logger.warning('⚠️ %s sunucusunda davet izni yok, atlanıyor...', guild.name)
+            return None
+        
+        invites = await guild.invites()
+        
+        # Tüm davetleri tek transaction'da toplu UPSERT ile kaydet
+        rows = [
+            (invite.code, invite.inviter.id if invite.inviter else 0, invite.uses, invite.created_at)
+            for invite in invites
+        ]
+        
+        # Sunucusu bilinmeyen eski kayıtları davet kodlarından ve üyelikten sahiplen (bot tek sunucudaysa hepsini)
+        claim_all = len(bot.guilds) == 1 or guild.id == Config.LEGACY_INVITE_GUILD_ID
+        claimed = await db.transaction(
+            claim_legacy_invites, guild.id, [invite.code for invite in invites], claim_all,
+            [member.id for member in guild.members]
+        )
+        if claimed:
+            logger.info('🗂️ %s sunucusuna %s eski davet kaydı atandı', guild.name, claimed)
+        
+        store = await guild_storage.get(guild.id)
+        inviter_ids = await store.db.transaction(sync_invite_rows, rows, bot.user.id, guild.id)
+        
+        # Bellekteki anlık görüntüyü güncel kullanım sayılarıyla kur
+        invite_cache.seed(guild.id, [(invite.code, invite.uses, inviter_id) for invite, inviter_id in zip(invites, inviter_ids)])
+        
+        # Davet detayları sadece trace modundaki sunucularda (isimler paralel çözülür)
+        if log_budget.traced(guild.id):
+            inviters = await user_cache.get_many(inviter_ids, guild)
+            for invite, inviter_id in zip(invites, inviter_ids):
+                inviter_user = inviters[inviter_id]
+                inviter_name = inviter_user.display_name if inviter_user else f"ID: {inviter_id}"
+                logger.debug('   • %s (ID: %s): %s', inviter_name, inviter_id, invite.code)
+        
+        logger.info('📊 %s sunucusunda %s davet yüklendi (%.0f ms)', guild.name, len(invites), (time.perf_counter() - start) * 1000)
+        return len(invites)
+        
+    except discord.Forbidden:
+        logger.warning('⚠️ %s sunucusunda davet izni yok, atlanıyor...', guild.name)
+    except Exception as e:
+        logger.error('❌ %s sunucusunda davet yüklenirken hata: %s', guild.name, e)
+        logger.error('❌ Hata detayı: %s: %s', type(e).__name__, str(e))
+    return None
+
 async def load_invites():
-    """Sunucudaki mevcut davetleri yükler ve veritabanına kaydeder"""
-    logger.info("🔄 load_invites() fonksiyonu başlatıldı")
+    """Tüm sunuculardaki mevcut davetleri paralel olarak yükler ve veritabanına kaydeder"""
+    logger.info("🔄 %s sunucunun davetleri yükleniyor...", len(bot.guilds))
+    start = time.perf_counter()
     
-    for guild in bot.guilds:
-        try:
-            logger.info(f"🔍 {guild.name} sunucusu kontrol ediliyor...")
-            
-            # Bot'un davet izni var mı kontrol et
-            if not guild.me.guild_permissions.manage_guild:
-                logger.warning(f'⚠️ {guild.name} sunucusunda davet izni yok, atlanıyor...')
-                continue
-                
-            logger.info(f"✅ {guild.name} sunucusunda davet izni var, davetler alınıyor...")
-            invites = await guild.invites()
-            logger.info(f'📊 {guild.name} sunucusunda {len(invites)} davet bulundu')
-            
-            # Mevcut davetleri veritabanına yükle
-            logger.info(f"💾 {len(invites)} davet veritabanına yükleniyor...")
-            conn = sqlite3.connect(Config.DATABASE_NAME)
-            cursor = conn.cursor()
-            
-            invite_details = []
-            for i, invite in enumerate(invites, 1):
-                logger.info(f"📝 Davet {i}/{len(invites)} işleniyor: {invite.code}")
-                
-                # Davet oluşturan kişiyi doğru şekilde al
-                inviter_id = invite.inviter.id if invite.inviter else 0
-                
-                # Eğer bot tarafından oluşturulduysa, veritabanından bul
-                if inviter_id == bot.user.id:
-                    # Veritabanından bu daveti bul
-                    cursor.execute('SELECT user_id FROM invite_codes WHERE code = ?', (invite.code,))
-                    result = cursor.fetchone()
-                    if result:
-                        inviter_id = result[0]
-                
-                # Önce bu davet kodu zaten var mı kontrol et
-                cursor.execute('SELECT id FROM invite_codes WHERE code = ?', (invite.code,))
-                existing_invite = cursor.fetchone()
-                
-                if existing_invite:
-                    # Mevcut daveti güncelle
-                    cursor.execute('''
-                        UPDATE invite_codes 
-                        SET user_id = ?, uses = ?, created_at = ?
-                        WHERE code = ?
-                    ''', (inviter_id, invite.uses, invite.created_at, invite.code))
-                    logger.info(f"🔄 Davet {invite.code} güncellendi")
-                else:
-                    # Yeni davet ekle
-                    cursor.execute('''
-                        INSERT INTO invite_codes (code, user_id, created_at, uses)
-                        VALUES (?, ?, ?, ?)
-                    ''', (invite.code, inviter_id, invite.created_at, invite.uses))
-                    logger.info(f"➕ Yeni davet {invite.code} eklendi")
-                
-                # Davet detaylarını hazırla
-                try:
-                    inviter_user = await bot.fetch_user(inviter_id)
-                    inviter_name = inviter_user.display_name if inviter_user else f"ID: {inviter_id}"
-                except:
-                    inviter_name = f"ID: {inviter_id}"
-                    
-                invite_details.append(f"{inviter_name} (ID: {inviter_id}): {invite.code}")
-            
-            conn.commit()
-            conn.close()
-            logger.info(f"💾 Veritabanı işlemleri tamamlandı")
-            
-            # Davet detaylarını göster
-            logger.info(f'📊 {guild.name} sunucusunda {len(invites)} davet yüklendi:')
-            for detail in invite_details:
-                logger.info(f'   • {detail}')
-            
-        except discord.Forbidden:
-            logger.warning(f'⚠️ {guild.name} sunucusunda davet izni yok, atlanıyor...')
-        except Exception as e:
-            logger.error(f'❌ {guild.name} sunucusunda davet yüklenirken hata: {e}')
-            logger.error(f'❌ Hata detayı: {type(e).__name__}: {str(e)}')
+    # Sunucular eşzamanlı işlenir; veritabanı yazıları tek yazıcı thread'inde sıralanır
+    results = await asyncio.gather(*(load_guild_invites(guild) for guild in bot.guilds))
+    loaded = [count for count in results if count is not None]
+    
+    logger.info(
+        "✅ load_invites() tamamlandı: %s/%s sunucu, %s davet, %.2f sn",
+        len(loaded), len(bot.guilds), sum(loaded), time.perf_counter() - start
+    )
     
-    logger.info("✅ load_invites() fonksiyonu tamamlandı")
+    # Sahiplenilemeyen eski kayıtlar tekrar davet kontrolüne girmez (aynı kişi yeniden sayılabilir)
+    legacy = await db.fetchone('legacy_invited_user_count')
+    if legacy and legacy[0]:
+        logger.warning(
+            "⚠️ %s eski davet kaydının sunucusu bulunamadı (guild_id = 0); "
+            "LEGACY_INVITE_GUILD_ID ayarlanarak bir sunucuya atanabilir", legacy[0]
+        )
 
 @bot.event
 async def on_invite_create(invite):
     """Yeni davet oluşturulduğunda"""
+    set_log_guild(invite.guild.id)
     try:
         # Bot'un davet izni var mı kontrol et
         if not invite.guild.me.guild_permissions.manage_guild:
-            logger.warning(f'⚠️ {invite.guild.name} sunucusunda davet izni yok, davet takibi yapılamıyor')
+            logger.warning('⚠️ %s sunucusunda davet izni yok, davet takibi yapılamıyor', invite.guild.name)
             return
             
         # Davet oluşturan kişiyi doğru şekilde al
         inviter_id = invite.inviter.id if invite.inviter else 0
         
+        store = await guild_storage.get(invite.guild.id)
+        
         # Eğer bot tarafından oluşturulduysa, son kullanıcıyı bul
         if inviter_id == bot.user.id:
             # Veritabanından en son davet oluşturan kullanıcıyı bul
-            conn = sqlite3.connect(Config.DATABASE_NAME)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT user_id FROM invite_codes 
-                WHERE code = ? 
-                ORDER BY created_at DESC 
-                LIMIT 1
-            ''', (invite.code,))
+            result = await store.db.fetchone('invite_code_owner', (invite.code,))
             
-            result = cursor.fetchone()
             if result:
                 inviter_id = result[0]
-            
-            conn.close()
-        
-        conn = sqlite3.connect(Config.DATABASE_NAME)
-        cursor = conn.cursor()
-        
-        # Önce bu davet kodu zaten var mı kontrol et
-        cursor.execute('SELECT id FROM invite_codes WHERE code = ?', (invite.code,))
-        existing_invite = cursor.fetchone()
-        
-        if existing_invite:
-            # Mevcut daveti güncelle
-            cursor.execute('''
-                UPDATE invite_codes 
-                SET user_id = ?, uses = ?, created_at = ?
-                WHERE code = ?
-            ''', (inviter_id, invite.uses, invite.created_at, invite.code))
-        else:
-            # Yeni davet ekle
-            cursor.execute('''
-                INSERT INTO invite_codes (code, user_id, created_at, uses)
-                VALUES (?, ?, ?, ?)
-            ''', (invite.code, inviter_id, invite.created_at, invite.uses))
         
-        conn.commit()
-        conn.close()
+        # Daveti ekle ya da güncelle
+        await store.db.execute('upsert_invite_code', (invite.code, inviter_id, invite.created_at, invite.uses, invite.guild.id))
+        invite_cache.set(invite.guild.id, invite.code, invite.uses, inviter_id)
         
         # Davet eden kullanıcı adını al
-        try:
-            inviter_user = await bot.fetch_user(inviter_id)
-            inviter_name = inviter_user.display_name if inviter_user else f"ID: {inviter_id}"
-        except:
-            inviter_name = f"ID: {inviter_id}"
+        inviter_name = await user_cache.display_name(inviter_id, invite.guild)
         
-        # Toplam davet sayısını al ve logla
-        try:
-            all_invites = await invite.guild.invites()
-            logger.info(f'🔗 Yeni davet oluşturuldu: {invite.code} (Kullanıcı: {inviter_name})')
-            logger.info(f'📊 Sunucuda toplam {len(all_invites)} davet bulundu')
-        except:
-            logger.info(f'🔗 Yeni davet oluşturuldu: {invite.code} (Kullanıcı: {inviter_name})')
+        # Toplam davet sayısını logla (bellekteki anlık görüntüden)
+        logger.info('🔗 Yeni davet oluşturuldu: %s (Kullanıcı: %s)', invite.code, inviter_name)
+        logger.info('📊 Sunucuda toplam %s davet bulundu', invite_cache.count(invite.guild.id))
             
     except Exception as e:
-        logger.error(f'❌ Davet kaydedilirken hata: {e}')
+        logger.error('❌ Davet kaydedilirken hata: %s', e)
+
+@bot.event
+async def on_invite_delete(invite):
+    """Davet silindiğinde anlık görüntüden çıkarır"""
+    if invite.guild:
+        invite_cache.remove(invite.guild.id, invite.code)
+
+async def seed_invite_cache(guild_id):
+    """Sunucunun davet anlık görüntüsünü veritabanından yükler"""
+    store = await guild_storage.get(guild_id)
+    await store.buffer.flush()
+    rows = await store.db.fetchall('invite_codes_in_guild', (guild_id,))
+    invite_cache.seed(guild_id, rows)
 
 @bot.event
 async def on_member_join(member):
     """Yeni üye katıldığında davet takibi"""
+    set_log_guild(member.guild.id)
     try:
         # Bot'un davet izni var mı kontrol et
         if not member.guild.me.guild_permissions.manage_guild:
-            logger.warning(f'⚠️ {member.guild.name} sunucusunda davet izni yok, üye takibi yapılamıyor')
+            logger.warning('⚠️ %s sunucusunda davet izni yok, üye takibi yapılamıyor', member.guild.name)
             return
         
         # Bot koruması - Eğer katılan üye bir bot ise (config'den kontrol et)
         if Config.SECURITY['BOT_PROTECTION'] and member.bot:
-            mark_user_as_bot(member.id)
-            logger.info(f'🤖 Bot tespit edildi: {member.display_name} (ID: {member.id})')
+            await mark_user_as_bot(member.id)
+            logger.info('🤖 Bot tespit edildi: %s (ID: %s)', member.display_name, member.id)
+            return
+        
+        # Anlık görüntü henüz yoksa veritabanından yükle
+        if not invite_cache.is_seeded(member.guild.id):
+            await seed_invite_cache(member.guild.id)
+        
+        # Aynı anda katılan üyeler tek bir davet sorgusunda toplanır
+        attribution = await join_queue.submit(member.guild, member)
+        if not attribution:
             return
         
-        # Sunucudaki tüm davetleri al
-        invites = await member.guild.invites()
+        # Davet oluşturan kişiyi doğru şekilde al (kayıtlı sahip öncelikli)
+        invite, inviter_id = attribution
+        if not inviter_id:
+            inviter_id = invite.inviter.id if invite.inviter else 0
         
-        # Hangi davet kullanıldığını bul
-        for invite in invites:
-            if invite.uses > 0:  # Davet kullanılmış
-                # Veritabanında bu daveti bul
-                conn = sqlite3.connect(Config.DATABASE_NAME)
-                cursor = conn.cursor()
+        # Fake davet koruması kontrol et
+        can_invite, reason = await can_user_invite(member.guild.id, inviter_id, member.id)
+        
+        if not can_invite:
+            logger.warning('🚫 Fake davet engellendi: %s - %s', member.display_name, reason)
+            
+            # Davet eden kullanıcıya uyarı gönder
+            try:
+                inviter_user = await user_cache.get(inviter_id, member.guild)
+                if inviter_user:
+                    embed = discord.Embed(
+                        title="🚫 Davet Engellendi!",
+                        description=f"**{member.display_name}** kullanıcısı davet edilemedi!\n\n**Sebep:** {reason}",
+                        color=0xED4245,
+                        timestamp=datetime.now()
+                    )
+                    await inviter_user.send(embed=embed)
+            except:
+                pass
+            
+            return
+        
+        # Davet eden kullanıcıya DM gönder
+        if inviter_id != bot.user.id:
+            guild_id = member.guild.id
+            
+            def record_invite(cursor):
+                cursor.execute('insert_invited_user', (guild_id, inviter_id, member.id, datetime.now(), invite.code))
                 
-                cursor.execute('SELECT uses FROM invite_codes WHERE code = ?', (invite.code,))
-                result = cursor.fetchone()
+                # Sıralama toplamını artır
+                cursor.execute('increment_inviter_total', (guild_id, inviter_id))
+            
+            store = await guild_storage.get(guild_id)
+            try:
+                await store.db.transaction(record_invite)
+            except sqlite3.IntegrityError:
+                # Kullanıcı bu sunucuya zaten davet edilmiş
+                logger.warning('🚫 Kullanıcı zaten davet edilmiş: %s', member.display_name)
+                invited_indexes[guild_id].add(member.id)
+                return
+            # Davet kullanım sayısı toplu yazılır
+            store.buffer.set('update_invite_uses', invite.code, (invite.uses, invite.code))
+            invite_rates.record(inviter_id)
+            invited_indexes[guild_id].add(member.id)
+            # Sıralama henüz yüklenmediyse ilk erişimde veritabanından güncel haliyle kurulur
+            if guild_id in leaderboards:
+                leaderboards[guild_id].increment(inviter_id)
+            
+            # Davet eden kullanıcı adını al
+            inviter_user = await user_cache.get(inviter_id, member.guild)
+            inviter_name = inviter_user.display_name if inviter_user else f"ID: {inviter_id}"
                 
-                if result and result[0] < invite.uses:
-                    # Davet oluşturan kişiyi doğru şekilde al
-                    inviter_id = invite.inviter.id if invite.inviter else 0
-                    
-                    # Eğer bot tarafından oluşturulduysa, veritabanından bul
-                    if inviter_id == bot.user.id:
-                        cursor.execute('SELECT user_id FROM invite_codes WHERE code = ?', (invite.code,))
-                        inviter_result = cursor.fetchone()
-                        if inviter_result:
-                            inviter_id = inviter_result[0]
-                    
-                    # Fake davet koruması kontrol et
-                    can_invite, reason = can_user_invite(inviter_id, member.id)
-                    
-                    if not can_invite:
-                        logger.warning(f'🚫 Fake davet engellendi: {member.display_name} - {reason}')
-                        
-                        # Davet eden kullanıcıya uyarı gönder
-                        try:
-                            inviter_user = await bot.fetch_user(inviter_id)
-                            if inviter_user:
-                                embed = discord.Embed(
-                                    title="🚫 Davet Engellendi!",
-                                    description=f"**{member.display_name}** kullanıcısı davet edilemedi!\n\n**Sebep:** {reason}",
-                                    color=0xED4245,
-                                    timestamp=datetime.now()
-                                )
-                                await inviter_user.send(embed=embed)
-                        except:
-                            pass
-                        
-                        conn.close()
-                        continue
-                    
-                    # Davet eden kullanıcıya DM gönder
-                    if inviter_id != bot.user.id:
-                        try:
-                            cursor.execute('''
-                                INSERT INTO invited_users (inviter_id, invited_user_id, invited_at, invite_code)
-                                VALUES (?, ?, ?, ?)
-                            ''', (inviter_id, member.id, datetime.now(), invite.code))
-                            
-                            # Davet kullanım sayısını güncelle
-                            cursor.execute('UPDATE invite_codes SET uses = ? WHERE code = ?', (invite.uses, invite.code))
-                            
-                            conn.commit()
-                            conn.close()
-                            
-                            # Davet eden kullanıcı adını al
-                            try:
-                                inviter_user = await bot.fetch_user(inviter_id)
-                                inviter_name = inviter_user.display_name if inviter_user else f"ID: {inviter_id}"
-                            except:
-                                inviter_name = f"ID: {inviter_id}"
-                                
-                            logger.info(f'🎉 Yeni üye {member.display_name} {inviter_name} tarafından davet edildi!')
-                            
-                            # Davet eden kullanıcıya DM gönder
-                            try:
-                                embed = discord.Embed(
-                                    title="🎉 Yeni Davet!",
-                                    description=f"**{member.display_name}** senin davet linkinle sunucuya katıldı!",
-                                    color=0x57F287,
-                                    timestamp=datetime.now()
-                                )
-                                embed.add_field(
-                                    name="🛡️ Güvenlik",
-                                    value="Bu davet güvenlik kontrollerinden geçti ve sayıldı.",
-                                    inline=False
-                                )
-                                await inviter_user.send(embed=embed)
-                            except:
-                                pass  # DM gönderilemezse sessizce geç
-                            
-                            break
-                        except sqlite3.IntegrityError:
-                            # Kullanıcı zaten davet edilmiş
-                            logger.warning(f'🚫 Kullanıcı zaten davet edilmiş: {member.display_name}')
-                            conn.close()
-                            continue
-                    
-                    conn.close()
+            logger.info('🎉 Yeni üye %s %s tarafından davet edildi!', member.display_name, inviter_name)
+            
+            # Davet eden kullanıcıya DM gönder
+            try:
+                embed = discord.Embed(
+                    title="🎉 Yeni Davet!",
+                    description=f"**{member.display_name}** senin davet linkinle sunucuya katıldı!",
+                    color=0x57F287,
+                    timestamp=datetime.now()
+                )
+                embed.add_field(
+                    name="🛡️ Güvenlik",
+                    value="Bu davet güvenlik kontrollerinden geçti ve sayıldı.",
+                    inline=False
+                )
+                await inviter_user.send(embed=embed)
+            except:
+                pass  # DM gönderilemezse sessizce geç
     except Exception as e:
-        logger.error(f'❌ Üye katılım takibinde hata: {e}')
+        logger.error('❌ Üye katılım takibinde hata: %s', e)
 
 # Slash Komutlar
 @bot.tree.command(name="invite", description="Sunucu için davet linki oluşturur veya mevcut linkini gösterir")
 async def invite_command(interaction: discord.Interaction):
     try:
         # Kullanıcının zaten davet linki var mı kontrol et
-        if user_has_invite_link(interaction.user.id):
+        if await user_has_invite_link(interaction.guild.id, interaction.user.id):
             # Mevcut davet linkini getir
-            invite_data = get_user_invite_link(interaction.user.id)
+            invite_data = await get_user_invite_link(interaction.guild.id, interaction.user.id)
             if invite_data:
                 code, uses = invite_data
                 invite_url = f"https://discord.gg/{code}"
@@ -1075,32 +937,13 @@ async def invite_command(interaction: discord.Interaction):
         
         # Davet kodunu veritabanına kaydet (response gönderildikten sonra)
         try:
-            conn = sqlite3.connect(Config.DATABASE_NAME)
-            cursor = conn.cursor()
-            
-            # Önce bu davet kodu zaten var mı kontrol et
-            cursor.execute('SELECT id FROM invite_codes WHERE code = ?', (invite_link.code,))
-            existing_invite = cursor.fetchone()
-            
-            if existing_invite:
-                # Mevcut daveti güncelle
-                cursor.execute('''
-                    UPDATE invite_codes 
-                    SET user_id = ?, created_at = ?
-                    WHERE code = ?
-                ''', (interaction.user.id, datetime.now(), invite_link.code))
-            else:
-                # Yeni davet ekle
-                cursor.execute('''
-                    INSERT INTO invite_codes (code, user_id, created_at, uses)
-                    VALUES (?, ?, ?, ?)
-                ''', (invite_link.code, interaction.user.id, datetime.now(), 0))
-            
-            conn.commit()
-            conn.close()
-            logger.info(f'🔗 Yeni davet linki veritabanına kaydedildi: {invite_link.code} (Kullanıcı: {interaction.user.display_name})')
+            # Daveti ekle ya da sahibini güncelle (kullanım sayısı korunur)
+            store = await guild_storage.get(interaction.guild.id)
+            await store.db.execute('upsert_invite_link', (invite_link.code, interaction.user.id, datetime.now(), interaction.guild.id))
+            invite_cache.set_inviter(interaction.guild.id, invite_link.code, interaction.user.id)
+            logger.info('🔗 Yeni davet linki veritabanına kaydedildi: %s (Kullanıcı: %s)', invite_link.code, interaction.user.display_name)
         except Exception as e:
-            logger.error(f'❌ Davet veritabanına kaydedilirken hata: {e}')
+            logger.error('❌ Davet veritabanına kaydedilirken hata: %s', e)
             # Veritabanı hatası olsa bile kullanıcıya tekrar mesaj gönderme
         
     except discord.Forbidden:
@@ -1127,19 +970,9 @@ async def invite_command(interaction: discord.Interaction):
 
 @bot.tree.command(name="leaderboard", description="Davet sıralamasını gösterir")
 async def leaderboard_command(interaction: discord.Interaction):
-    conn = sqlite3.connect(Config.DATABASE_NAME)
-    cursor = conn.cursor()
-    
-    # Davet sıralamasını getir (en çok davet edenler)
-    cursor.execute('''
-        SELECT inviter_id, COUNT(*) as invite_count
-        FROM invited_users 
-        GROUP BY inviter_id 
-        ORDER BY invite_count DESC 
-        LIMIT 10
-    ''')
-    
-    leaderboard_data = cursor.fetchall()
+    # Davet sıralamasını getir (en çok davet edenler, sunucunun bellekteki sıralamasından)
+    leaderboard = await get_leaderboard(interaction.guild.id)
+    leaderboard_data = leaderboard.top(10)
     
     if not leaderboard_data:
         embed = discord.Embed(
@@ -1152,9 +985,10 @@ async def leaderboard_command(interaction: discord.Interaction):
     else:
         # Sıralama listesini oluştur
         leaderboard_list = []
+        users = await user_cache.get_many([inviter_id for inviter_id, _ in leaderboard_data], interaction.guild)
         for i, (inviter_id, invite_count) in enumerate(leaderboard_data, 1):
             try:
-                user = await bot.fetch_user(inviter_id)
+                user = users[inviter_id]
                 # Emoji ile sıralama
                 if i == 1:
                     medal = "🥇"
@@ -1178,20 +1012,19 @@ async def leaderboard_command(interaction: discord.Interaction):
         
         # Kullanıcının kendi sıralamasını da göster
         user_id = interaction.user.id
-        cursor.execute('SELECT COUNT(*) FROM invited_users WHERE inviter_id = ?', (user_id,))
-        user_invites = cursor.fetchone()[0]
+        user_invites = leaderboard.count(user_id)
+        user_rank = leaderboard.rank(user_id)
+        rank_text = f"#{user_rank:,} / {len(leaderboard):,}" if user_rank else "Sıralamada değilsin"
         
         embed.add_field(
             name="📈 Senin İstatistiğin",
-            value=f"**Davet Ettiğin Kişi Sayısı:** `{user_invites}`",
+            value=f"**Davet Ettiğin Kişi Sayısı:** `{user_invites}`\n**Sıran:** `{rank_text}`",
             inline=False
         )
         
         embed.set_footer(text=Config.BOT_NAME, icon_url=bot.user.avatar.url if bot.user.avatar and bot.user.avatar.url else None)
         embed.set_author(name=interaction.user.display_name, icon_url=interaction.user.avatar.url if interaction.user.avatar and interaction.user.avatar.url else None)
     
-    conn.close()
-    
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
 
@@ -1202,16 +1035,10 @@ async def stats_command(interaction: discord.Interaction):
         # Interaction'ı defer et (timeout'u önle)
         await interaction.response.defer(ephemeral=True)
         
-        conn = sqlite3.connect(Config.DATABASE_NAME)
-        cursor = conn.cursor()
-        
         # Kullanıcının davet linkini getir
-        cursor.execute('''
-            SELECT code, uses, created_at FROM invite_codes 
-            WHERE user_id = ?
-        ''', (interaction.user.id,))
-        
-        user_invite = cursor.fetchone()
+        store = await guild_storage.get(interaction.guild.id)
+        await store.buffer.flush()
+        user_invite = await store.db.fetchone('invite_stats_for_user', (interaction.guild.id, interaction.user.id))
         
         if not user_invite:
             embed = discord.Embed(
@@ -1243,7 +1070,6 @@ async def stats_command(interaction: discord.Interaction):
         embed.set_footer(text=Config.BOT_NAME, icon_url=bot.user.avatar.url if bot.user.avatar and bot.user.avatar.url else None)
         embed.set_author(name=interaction.user.display_name, icon_url=interaction.user.avatar.url if interaction.user.avatar and interaction.user.avatar.url else None)
         
-        conn.close()
         await interaction.followup.send(embed=embed, ephemeral=True)
         
     except Exception as e:
@@ -1257,7 +1083,7 @@ async def stats_command(interaction: discord.Interaction):
             'error code: 10062',
             'Unknown interaction'
         ]):
-            logger.error(f'❌ Stats komutu hatası: {e}')
+            logger.error('❌ Stats komutu hatası: %s', e)
         embed = discord.Embed(
             title="❌ Hata",
             description="İstatistikler alınırken bir hata oluştu!",
@@ -1290,16 +1116,10 @@ async def adminstats_command(interaction: discord.Interaction):
         # Interaction'ı defer et (timeout'u önle)
         await interaction.response.defer(ephemeral=True)
         
-        conn = sqlite3.connect(Config.DATABASE_NAME)
-        cursor = conn.cursor()
-        
         # Tüm davetleri getir (en çok kullanılanlar üstte)
-        cursor.execute('''
-            SELECT code, user_id, uses, created_at FROM invite_codes 
-            ORDER BY uses DESC, created_at DESC
-        ''')
-        
-        all_invites = cursor.fetchall()
+        store = await guild_storage.get(interaction.guild.id)
+        await store.buffer.flush()
+        all_invites = await store.db.fetchall('invite_codes_by_uses', (interaction.guild.id,))
         
         if not all_invites:
             embed = discord.Embed(
@@ -1315,12 +1135,10 @@ async def adminstats_command(interaction: discord.Interaction):
             
             # Davet detaylarını hazırla
             invite_details = []
+            users = await user_cache.get_many([invite[1] for invite in all_invites[:15]], interaction.guild)
             for i, (code, user_id, uses, created_at) in enumerate(all_invites[:15], 1):  # En çok 15 davet göster
-                try:
-                    user = await bot.fetch_user(user_id)
-                    user_name = user.display_name if user else f"ID: {user_id}"
-                except:
-                    user_name = f"ID: {user_id}"
+                user = users[user_id]
+                user_name = user.display_name if user else f"ID: {user_id}"
                 
                 try:
                     # Tarih formatını dönüştür
@@ -1357,7 +1175,6 @@ async def adminstats_command(interaction: discord.Interaction):
         embed.set_footer(text=Config.BOT_NAME, icon_url=bot.user.avatar.url if bot.user.avatar and bot.user.avatar.url else None)
         embed.set_author(name=interaction.user.display_name, icon_url=interaction.user.avatar.url if interaction.user.avatar and interaction.user.avatar.url else None)
         
-        conn.close()
         await interaction.followup.send(embed=embed, ephemeral=True)
         
     except Exception as e:
@@ -1371,7 +1188,7 @@ async def adminstats_command(interaction: discord.Interaction):
             'error code: 10062',
             'Unknown interaction'
         ]):
-            logger.error(f'❌ AdminStats komutu hatası: {e}')
+            logger.error('❌ AdminStats komutu hatası: %s', e)
         embed = discord.Embed(
             title="❌ Hata",
             description="İstatistikler alınırken bir hata oluştu!",
@@ -1424,7 +1241,7 @@ async def help_command(interaction: discord.Interaction):
         if interaction.user.guild_permissions.administrator:
             embed.add_field(
                 name="⚙️ **Admin Komutları**",
-                value="• `/adminstats` - Admin davet istatistiklerini gösterir\n• `/suspicious` - Şüpheli davet aktivitelerini gösterir\n• `/reset` - Tüm davet verilerini sıfırlar",
+                value="• `/adminstats` - Admin davet istatistiklerini gösterir\n• `/suspicious` - Şüpheli davet aktivitelerini gösterir\n• `/db-stats` - Veritabanı sorgu sürelerini gösterir\n• `/log-trace` - Sunucu için ayrıntılı log kaydını açar/kapatır\n• `/reset` - Tüm davet verilerini sıfırlar",
                 inline=False
             )
         
@@ -1451,7 +1268,7 @@ async def help_command(interaction: discord.Interaction):
             'error code: 10062',
             'Unknown interaction'
         ]):
-            logger.error(f'❌ Help komut hatası: {e}')
+            logger.error('❌ Help komut hatası: %s', e)
         try:
             embed = discord.Embed(
                 title="❌ Hata",
@@ -1485,17 +1302,9 @@ async def suspicious_command(interaction: discord.Interaction):
         # Interaction'ı defer et (timeout'u önle)
         await interaction.response.defer(ephemeral=True)
         
-        conn = sqlite3.connect(Config.DATABASE_NAME)
-        cursor = conn.cursor()
-        
         # Şüpheli davet aktivitelerini getir
-        cursor.execute('''
-            SELECT inviter_id, invite_count, first_invite_at, last_invite_at
-            FROM suspicious_invites 
-            ORDER BY invite_count DESC, last_invite_at DESC
-        ''')
-        
-        suspicious_data = cursor.fetchall()
+        await counter_buffer.flush()
+        suspicious_data = await db.fetchall('suspicious_invites_all')
         
         if not suspicious_data:
             embed = discord.Embed(
@@ -1507,12 +1316,10 @@ async def suspicious_command(interaction: discord.Interaction):
         else:
             # Şüpheli aktivite detaylarını hazırla
             suspicious_list = []
+            users = await user_cache.get_many([row[0] for row in suspicious_data[:10]], interaction.guild)
             for i, (inviter_id, invite_count, first_invite_at, last_invite_at) in enumerate(suspicious_data[:10], 1):
-                try:
-                    user = await bot.fetch_user(inviter_id)
-                    user_name = user.display_name if user else f"ID: {inviter_id}"
-                except:
-                    user_name = f"ID: {inviter_id}"
+                user = users[inviter_id]
+                user_name = user.display_name if user else f"ID: {inviter_id}"
                 
                 try:
                     # Tarih formatını dönüştür
@@ -1551,7 +1358,6 @@ async def suspicious_command(interaction: discord.Interaction):
         embed.set_footer(text=Config.BOT_NAME, icon_url=bot.user.avatar.url if bot.user.avatar and bot.user.avatar.url else None)
         embed.set_author(name=interaction.user.display_name, icon_url=interaction.user.avatar.url if interaction.user.avatar and bot.user.avatar.url else None)
         
-        conn.close()
         await interaction.followup.send(embed=embed, ephemeral=True)
         
     except Exception as e:
@@ -1565,7 +1371,7 @@ async def suspicious_command(interaction: discord.Interaction):
             'error code: 10062',
             'Unknown interaction'
         ]):
-            logger.error(f'❌ Suspicious komutu hatası: {e}')
+            logger.error('❌ Suspicious komutu hatası: %s', e)
         embed = discord.Embed(
             title="❌ Hata",
             description="Şüpheli aktivite bilgileri alınırken bir hata oluştu!",
@@ -1580,6 +1386,101 @@ async def suspicious_command(interaction: discord.Interaction):
             except:
                 pass  # Sessizce geç, log spam yapma
 
+@bot.tree.command(name="db-stats", description="Veritabanı sorgu sürelerini gösterir (Sadece Yönetici)")
+async def db_stats_command(interaction: discord.Interaction):
+    """En çok süre harcayan sorguları gösterir"""
+    if not interaction.user.guild_permissions.administrator:
+        embed = discord.Embed(
+            title="❌ Yetki Hatası",
+            description="Bu komutu kullanmak için **Yönetici (Administrator)** yetkisine sahip olmalısın!",
+            color=0xED4245,  # Kırmızı
+            timestamp=datetime.now()
+        )
+        embed.set_footer(text=Config.BOT_NAME, icon_url=bot.user.avatar.url if bot.user.avatar and bot.user.avatar.url else None)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
+    try:
+        snapshot = db.stats.snapshot()
+        total_calls = sum(entry['count'] for entry in snapshot)
+        embed = discord.Embed(
+            title="🗄️ Veritabanı Sorgu İstatistikleri",
+            description=f"```\n{db.stats.format_report()[:3900]}\n```",
+            color=0x5865F2,
+            timestamp=datetime.now()
+        )
+        embed.add_field(name="📊 Toplam Sorgu", value=f"`{total_calls}`", inline=True)
+        embed.add_field(name="🏷️ Farklı İfade", value=f"`{len(snapshot)}`", inline=True)
+        maintenance = db_maintenance.stats
+        embed.add_field(
+            name="🧹 Bakım",
+            value=(
+                f"Checkpoint: `{maintenance['checkpoints']}` • WAL: `{maintenance['wal_pages']}` sayfa • Optimize: `{maintenance['optimizes']}`"
+                + (f"\nAçık sunucu shard'ı: `{len(guild_storage)}`" if guild_storage.sharded else "")
+            ),
+            inline=False
+        )
+        buffered = counter_buffer.stats
+        embed.add_field(
+            name="📝 Toplu Yazma",
+            value=(
+                f"Bekleyen: `{counter_buffer.pending()}` • Flush: `{buffered['flushes']}` • Birleştirilen: `{buffered['coalesced']}`\n"
+                f"Son/maks toplu iş: `{buffered['last_batch']}`/`{buffered['max_batch']}` • "
+                f"Son/maks süre: `{buffered['last_flush_ms']:.1f}`/`{buffered['max_flush_ms']:.1f}` ms • Hata: `{buffered['failed']}`"
+            ),
+            inline=False
+        )
+        embed.set_footer(text=Config.BOT_NAME, icon_url=bot.user.avatar.url if bot.user.avatar and bot.user.avatar.url else None)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    except Exception as e:
+        logger.error('❌ DB-Stats komutu hatası: %s', e)
+
+@bot.tree.command(name="log-trace", description="Bu sunucu için ayrıntılı (DEBUG) log kaydını açar/kapatır (Sadece Yönetici)")
+async def log_trace_command(interaction: discord.Interaction, enabled: bool):
+    """Sunucu bazlı trace modunu değiştirir"""
+    if not interaction.user.guild_permissions.administrator:
+        embed = discord.Embed(
+            title="❌ Yetki Hatası",
+            description="Bu komutu kullanmak için **Yönetici (Administrator)** yetkisine sahip olmalısın!",
+            color=0xED4245,  # Kırmızı
+            timestamp=datetime.now()
+        )
+        embed.set_footer(text=Config.BOT_NAME, icon_url=bot.user.avatar.url if bot.user.avatar and bot.user.avatar.url else None)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
+    try:
+        minutes = Config.LOGGING['TRACE_MINUTES']
+        if enabled:
+            log_budget.enable_trace(interaction.guild.id, minutes * 60)
+            logger.info('🔬 %s sunucusunda trace modu %s dakikalığına açıldı (%s)', interaction.guild.name, minutes, interaction.user)
+        else:
+            log_budget.disable_trace(interaction.guild.id)
+            logger.info('🔬 %s sunucusunda trace modu kapatıldı (%s)', interaction.guild.name, interaction.user)
+        
+        budget = log_budget.stats
+        embed = discord.Embed(
+            title="🔬 Trace Modu",
+            description=(
+                f"Bu sunucunun tüm log kayıtları (DEBUG dahil) **{minutes} dakika** boyunca örneklenmeden yazılacak."
+                if enabled else "Trace modu kapatıldı, log bütçesi yeniden uygulanıyor."
+            ),
+            color=0x57F287 if enabled else 0x5865F2,
+            timestamp=datetime.now()
+        )
+        embed.add_field(
+            name="📜 Log Bütçesi",
+            value=(
+                f"Yazılan: `{budget['passed']}` • Örneklenen: `{budget['sampled']}` • Bastırılan tekrar: `{budget['suppressed']}`\n"
+                f"Hata bağlamı: `{budget['context']}` • Kuyruktan atılan: `{log_pipeline.stats['dropped']}`"
+            ),
+            inline=False
+        )
+        embed.set_footer(text=Config.BOT_NAME, icon_url=bot.user.avatar.url if bot.user.avatar and bot.user.avatar.url else None)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    except Exception as e:
+        logger.error('❌ Log-Trace komutu hatası: %s', e)
+
 @bot.tree.command(name="reset", description="Tüm davet verilerini sıfırlar (Sadece Yönetici)")
 async def reset_command(interaction: discord.Interaction):
     # Sadece Yönetici (Administrator) yetkisi kontrol et
@@ -1598,7 +1499,7 @@ async def reset_command(interaction: discord.Interaction):
         # Onay embed'i gönder
         embed = discord.Embed(
             title="⚠️ DİKKAT: Veri Sıfırlama",
-            description="**Bu komut tüm davet verilerini kalıcı olarak silecek!**\n\n**Silinecek veriler:**\n• Tüm davet kodları\n• Tüm davet edilen kullanıcılar\n• Şüpheli aktivite kayıtları\n• Bot koruma kayıtları\n• Ticket sistemi kurulumu (kategori, destek rolü, log kanalı)\n• Tüm ticket'lar\n• Ticket günlük sayıları\n• Log dosyaları\n\n**Bu işlem geri alınamaz!**\n\nDevam etmek için **'EVET'** yazın.",
+            description="**Bu komut tüm davet verilerini kalıcı olarak silecek!**\n\n**Silinecek veriler:**\n• Tüm davet kodları\n• Tüm davet edilen kullanıcılar\n• Şüpheli aktivite kayıtları\n• Bot koruma kayıtları\n• Ticket sistemi kurulumu (kategori, destek rolü, log kanalı)\n• Tüm ticket'lar\n• Ticket panelleri ve transkriptleri\n• Ticket günlük sayıları\n• Log dosyaları\n\n**Bu işlem geri alınamaz!**\n\nDevam etmek için **'EVET'** yazın.",
             color=0xFF6B6B,  # Uyarı rengi
             timestamp=datetime.now()
         )
@@ -1625,53 +1526,87 @@ async def reset_command(interaction: discord.Interaction):
                         for invite in invites:
                             try:
                                 await invite.delete(reason=f"Reset komutu ile {interaction.user.display_name} tarafından silindi")
-                                logger.info(f'🗑️ Discord daveti silindi: {invite.code}')
+                                logger.info('🗑️ Discord daveti silindi: %s', invite.code)
                             except Exception as e:
-                                logger.error(f'❌ Discord daveti silinirken hata: {e}')
-                        logger.info(f'✅ {guild.name} sunucusundaki {len(invites)} davet silindi')
+                                logger.error('❌ Discord daveti silinirken hata: %s', e)
+                        logger.info('✅ %s sunucusundaki %s davet silindi', guild.name, len(invites))
             except Exception as e:
-                logger.error(f'❌ Discord davetleri silinirken hata: {e}')
+                logger.error('❌ Discord davetleri silinirken hata: %s', e)
             
             # Sonra veritabanını temizle
-            conn = sqlite3.connect(Config.DATABASE_NAME)
-            cursor = conn.cursor()
+            def clear_tables(cursor):
+                # Tüm tabloları temizle
+                for table in RESET_TABLES:
+                    cursor.execute(f'DELETE FROM {table}')
             
-            # Tüm tabloları temizle
-            cursor.execute('DELETE FROM invite_codes')
-            cursor.execute('DELETE FROM invited_users')
-            cursor.execute('DELETE FROM suspicious_invites')
-            cursor.execute('DELETE FROM bot_protection')
-            cursor.execute('DELETE FROM ticket_config')
-            cursor.execute('DELETE FROM tickets')
-            cursor.execute('DELETE FROM user_daily_tickets')
+            # Bekleyen sayaçlar sıfırlamadan sonra yazılıp verileri geri getirmesin
+            await guild_storage.flush()
+            # Ortak veritabanı (sunucusu bilinmeyen guild_id = 0 eski kayıtlar dahil) temizlenir
+            await db.transaction(clear_tables)
             
-            conn.commit()
-            conn.close()
+            def clear_invite_tables(cursor):
+                for table in INVITE_TABLES:
+                    cursor.execute(f'DELETE FROM {table}')
+            
+            # Shard modunda bu sunucunun davet dosyası da temizlenir (bu süreçte açılmamış olsa bile);
+            # diğer sunucuların shard dosyalarına ve bellekteki verilerine dokunulmaz
+            if guild_storage.sharded:
+                store = await guild_storage.get(interaction.guild.id)
+                await store.buffer.flush()
+                await store.db.transaction(clear_invite_tables)
+                clear_invite_state(invite_cache, invited_indexes, leaderboards, interaction.guild.id)
+            else:
+                clear_invite_state(invite_cache, invited_indexes, leaderboards)
+            # Hız sayaçları davet eden başına tüm sunucular genelinde: kalan kayıtlardan yeniden kurulur
+            await load_invite_rates()
+            bot_index.clear()
+            open_tickets.clear()
+            ticket_configs.invalidate()
+            
+            # Ticket transkript dosyalarını da sil (numaralar sıfırdan başlar)
+            try:
+                import shutil
+                
+                transcript_directory = Config.TRANSCRIPTS['DIRECTORY']
+                if os.path.isdir(transcript_directory):
+                    shutil.rmtree(transcript_directory)
+                    logger.info('🗑️ Transkript dosyaları silindi: %s', transcript_directory)
+            except Exception as e:
+                logger.error('❌ Transkript dosyaları silinirken hata: %s', e)
             
             # Log dosyalarını da temizle
             try:
                 import glob
                 import os
                 
-                # logs klasöründeki tüm .log dosyalarını bul ve sil
-                log_files = glob.glob('logs/*.log')
+                # Bu sürecin aktif dosyası boşaltılır, arşivleri silinir
+                log_file_handler = log_pipeline.handlers[0]
+                log_file_handler.discard()
+                removed = log_file_handler.archiver.purge()
+                logger.info('🗑️ %s log arşivi dosyası silindi', removed)
+                
+                # logs klasöründeki diğer log dosyalarını ve arşivleri bul ve sil
+                log_files = [
+                    path for path in glob.glob('logs/*.log') + glob.glob('logs/*.log.gz') + glob.glob('logs/*.log.gz.idx')
+                    if os.path.abspath(path) != log_file_handler.baseFilename
+                ]
                 for log_file in log_files:
                     try:
                         os.remove(log_file)
-                        logger.info(f'🗑️ Log dosyası silindi: {log_file}')
+                        logger.info('🗑️ Log dosyası silindi: %s', log_file)
                     except Exception as e:
-                        logger.error(f'❌ Log dosyası silinirken hata: {e}')
+                        logger.error('❌ Log dosyası silinirken hata: %s', e)
                 
                 # Yeni temiz log dosyası oluştur
                 logger.info('🆕 Yeni log dosyası oluşturuldu')
                 
             except Exception as e:
-                logger.error(f'❌ Log dosyaları temizlenirken hata: {e}')
+                logger.error('❌ Log dosyaları temizlenirken hata: %s', e)
             
             # Başarı mesajı
             success_embed = discord.Embed(
                 title="✅ Veriler Başarıyla Sıfırlandı!",
-                description="**Tüm davet verileri, Discord davetleri ve loglar kalıcı olarak silindi:**\n\n• 🗑️ Discord sunucusundaki davetler silindi\n• 🗑️ Veritabanı temizlendi\n• 🗑️ Davet kodları temizlendi\n• 🗑️ Davet edilen kullanıcılar silindi\n• 🗑️ Şüpheli aktivite kayıtları silindi\n• 🗑️ Bot koruma kayıtları silindi\n• 🗑️ Ticket sistemi kurulumu (kategori, destek rolü, log kanalı) silindi\n• 🗑️ Tüm ticket'lar silindi\n• 🗑️ Ticket günlük sayıları silindi\n• 🗑️ Log dosyaları temizlendi\n\n**Sunucu artık tamamen temiz bir başlangıç yapabilir!**",
+                description="**Tüm davet verileri, Discord davetleri ve loglar kalıcı olarak silindi:**\n\n• 🗑️ Discord sunucusundaki davetler silindi\n• 🗑️ Veritabanı temizlendi\n• 🗑️ Davet kodları temizlendi\n• 🗑️ Davet edilen kullanıcılar silindi\n• 🗑️ Şüpheli aktivite kayıtları silindi\n• 🗑️ Bot koruma kayıtları silindi\n• 🗑️ Ticket sistemi kurulumu (kategori, destek rolü, log kanalı) silindi\n• 🗑️ Tüm ticket'lar silindi\n• 🗑️ Ticket panelleri ve transkriptleri silindi\n• 🗑️ Ticket günlük sayıları silindi\n• 🗑️ Log dosyaları temizlendi\n\n**Sunucu artık tamamen temiz bir başlangıç yapabilir!**",
                 color=0x57F287,  # Yeşil
                 timestamp=datetime.now()
             )
@@ -1692,7 +1627,7 @@ async def reset_command(interaction: discord.Interaction):
             await interaction.followup.send(embed=timeout_embed, ephemeral=True)
             
     except Exception as e:
-        logger.error(f'❌ Reset komutu hatası: {e}')
+        logger.error('❌ Reset komutu hatası: %s', e)
         error_embed = discord.Embed(
             title="❌ Hata",
             description="Veriler sıfırlanırken bir hata oluştu!",
@@ -1722,7 +1657,7 @@ async def ticket_setup_command(interaction: discord.Interaction, category: disco
     
     try:
         # Ticket konfigürasyonunu kaydet (log kanalı ile)
-        save_ticket_config(interaction.guild.id, category.id, support_role.id, 5, log_channel.id)
+        await save_ticket_config(interaction.guild.id, category.id, support_role.id, 5, log_channel.id)
         
         embed = discord.Embed(
             title="✅ Ticket Sistemi Kuruldu",
@@ -1746,7 +1681,7 @@ async def ticket_setup_command(interaction: discord.Interaction, category: disco
             'error code: 10062',
             'Unknown interaction'
         ]):
-            logger.error(f'❌ Ticket setup hatası: {e}')
+            logger.error('❌ Ticket setup hatası: %s', e)
         embed = discord.Embed(
             title="❌ Hata",
             description="Ticket sistemi kurulurken bir hata oluştu!",
@@ -1761,6 +1696,67 @@ async def ticket_setup_command(interaction: discord.Interaction, category: disco
             except:
                 pass  # Sessizce geç, log spam yapma
 
+def build_ticket_panel_embed():
+    """Ticket paneli embed'ini oluşturur"""
+    embed = discord.Embed(
+        title="🎫 Destek Sistemi",
+        description="Aşağıdaki kategorilerden birini seçerek ticket açabilirsiniz.",
+        color=0xFFD700,  # Altın rengi
+        timestamp=datetime.now()
+    )
+    
+    # Ana resim (büyük resim ortada)
+    embed.set_image(url="https://cdn.discordapp.com/attachments/1405597411606270142/1406059134549233695/Untitled_design_1.png?ex=68a5b35c&is=68a461dc&hm=8d635c79cf83614e89533cadfae4d9a594b993a3b407325d738c6236452f4727&")
+    
+    # Küçük resim (sağ üst köşede)
+    embed.set_thumbnail(url="https://cdn.discordapp.com/attachments/1405597411606270142/1406059008372113409/nexusrp_1.png?ex=68a5b33e&is=68a461be&hm=e04a649e91ce85bc5d0c30ed3d4d1f0081d477db3a1e8a967d705016b11f4d9a&")
+    
+    # Kurallar
+    embed.add_field(
+        name="📋 Kurallar",
+        value="Ticket açmadan önce sunucu kurallarını okuduğunuzdan emin olun.",
+        inline=True
+    )
+    
+    embed.add_field(
+        name="⏰ Günlük Limit",
+        value="Günde maksimum 5 ticket açabilirsiniz.",
+        inline=True
+    )
+    
+    embed.add_field(
+        name="ℹ️ Bilgi",
+        value="Ticket açtıktan sonra destek ekibimiz size yardımcı olacaktır.",
+        inline=True
+    )
+    
+    embed.set_footer(text=Config.BOT_NAME, icon_url=bot.user.avatar.url if bot.user.avatar and bot.user.avatar.url else None)
+    return embed
+
+async def refresh_ticket_panels(guild_id):
+    """Sunucunun kayıtlı ticket panellerini geçmiş taramadan doğrudan düzenler"""
+    panels = await db.fetchall('ticket_panels_in_guild', (guild_id,))
+    embed = build_ticket_panel_embed()
+    
+    for channel_id, message_id in panels:
+        channel = bot.get_channel(channel_id)
+        try:
+            if channel:
+                await channel.get_partial_message(message_id).edit(embed=embed, view=TicketCategoryView(TICKET_CATEGORIES))
+                logger.info('🔄 Ticket panel yenilendi: %s', channel.name)
+                continue
+        except discord.NotFound:
+            pass
+        except Exception as e:
+            logger.error('❌ Panel yenileme hatası: %s', e)
+            continue
+        # Silinmiş panel/kanal kaydını temizle
+        await db.execute('delete_ticket_panel', (message_id,))
+        logger.info("Silinmiş ticket panel kaydı kaldırıldı: message_id=%s", message_id)
+
+# Panel yenilemeleri sunucu başına birleştirilir
+ticket_panel_refresher = DebouncedRefresher(refresh_ticket_panels, Config.TICKET_PANEL_REFRESH_DELAY)
+
 @bot.tree.command(name="ticket-panel", description="Ticket paneli oluşturur (Sadece Yönetici)")
 async def ticket_panel_command(interaction: discord.Interaction):
     """Ticket paneli oluşturur"""
@@ -1778,7 +1774,7 @@ async def ticket_panel_command(interaction: discord.Interaction):
     
     try:
         # Ticket konfigürasyonunu kontrol et
-        config = get_ticket_config(interaction.guild.id)
+        config = await get_ticket_config(interaction.guild.id)
         if not config:
             embed = discord.Embed(
                 title="❌ Hata",
@@ -1790,41 +1786,7 @@ async def ticket_panel_command(interaction: discord.Interaction):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
-        embed = discord.Embed(
-            title="🎫 Destek Sistemi",
-            description="Aşağıdaki kategorilerden birini seçerek ticket açabilirsiniz.",
-            color=0xFFD700,  # Altın rengi
-            timestamp=datetime.now()
-        )
-        
-        # Ana resim (büyük resim ortada)
-        embed.set_image(url="https://cdn.discordapp.com/attachments/1405597411606270142/1406059134549233695/Untitled_design_1.png?ex=68a5b35c&is=68a461dc&hm=8d635c79cf83614e89533cadfae4d9a594b993a3b407325d738c6236452f4727&")
-        
-        # Küçük resim (sağ üst köşede)
-        embed.set_thumbnail(url="https://cdn.discordapp.com/attachments/1405597411606270142/1406059008372113409/nexusrp_1.png?ex=68a5b33e&is=68a461be&hm=e04a649e91ce85bc5d0c30ed3d4d1f0081d477db3a1e8a967d705016b11f4d9a&")
-        
-        # Kurallar
-        embed.add_field(
-            name="📋 Kurallar",
-            value="Ticket açmadan önce sunucu kurallarını okuduğunuzdan emin olun.",
-            inline=True
-        )
-        
-        embed.add_field(
-            name="⏰ Günlük Limit",
-            value="Günde maksimum 5 ticket açabilirsiniz.",
-            inline=True
-        )
-        
-        embed.add_field(
-            name="ℹ️ Bilgi",
-            value="Ticket açtıktan sonra destek ekibimiz size yardımcı olacaktır.",
-            inline=True
-        )
-        
-
-        
-        embed.set_footer(text=Config.BOT_NAME, icon_url=bot.user.avatar.url if bot.user.avatar and bot.user.avatar.url else None)
+        embed = build_ticket_panel_embed()
         
         # Kategorili select menü (kapatma butonu yok, sadece ticket açma)
         try:
@@ -1835,19 +1797,26 @@ async def ticket_panel_command(interaction: discord.Interaction):
             await interaction.response.send_message(embed=embed, view=view)
             logger.info("Ticket panel view mesajı gönderildi")
             
+            # Panel mesajını kaydet (yenilemeler doğrudan bu mesajı düzenler)
+            try:
+                message = await interaction.original_response()
+                await db.execute('save_ticket_panel', (message.id, interaction.guild.id, message.channel.id))
+            except Exception as e:
+                logger.error("Ticket panel kaydı hatası: %s", e)
+            
             # View'ı persistent yap
             try:
                 await view.wait()
                 logger.info("Ticket panel view tamamlandı")
             except Exception as e:
-                logger.error(f"Ticket panel view wait hatası: {e}")
+                logger.error("Ticket panel view wait hatası: %s", e)
         except Exception as e:
-            logger.error(f"Ticket panel view oluşturma hatası: {e}")
+            logger.error("Ticket panel view oluşturma hatası: %s", e)
             # Hata durumunda view olmadan gönder
             await interaction.response.send_message(embed=embed)
         
     except Exception as e:
-        logger.error(f'❌ Ticket panel hatası: {e}')
+        logger.error('❌ Ticket panel hatası: %s', e)
         # Hata durumunda followup kullan
         try:
             error_embed = discord.Embed(
@@ -1867,6 +1836,32 @@ async def ticket_panel_command(interaction: discord.Interaction):
             )
             await interaction.channel.send(embed=error_embed, delete_after=10.0)
 
+def serialize_transcript_message(message):
+    """Discord mesajını transkript satırına çevirir"""
+    return {
+        'id': message.id,
+        'author_id': message.author.id,
+        'author': message.author.display_name,
+        'bot': message.author.bot,
+        'created_at': message.created_at.isoformat(),
+        'edited_at': message.edited_at.isoformat() if message.edited_at else None,
+        'content': message.content,
+        'attachments': [attachment.url for attachment in message.attachments],
+        'embeds': [embed.to_dict() for embed in message.embeds]
+    }
+
+async def archive_ticket_transcript(channel, ticket):
+    """Ticket kanalının tüm mesajlarını sayfa sayfa sıkıştırılmış transkripte yazar ve kaydeder"""
+    path = transcript_path(Config.TRANSCRIPTS['DIRECTORY'], ticket['guild_id'], ticket['ticket_number'], ticket['id'])
+    start = time.perf_counter()
+    # history() mesajları 100'lük sayfalarla çeker; hepsi belleğe alınmaz
+    count, size = await write_transcript(
+        channel.history(limit=None, oldest_first=True), path, serialize_transcript_message
+    )
+    await db.execute('save_ticket_transcript', (ticket['id'], ticket['guild_id'], ticket['ticket_number'], channel.id, path, count, size))
+    logger.info("📜 Ticket #%s transkripti kaydedildi: %s mesaj, %s bayt, %.2f sn", ticket['ticket_number'], count, f"{size:,}", time.perf_counter() - start)
+    return path
+
 @bot.tree.command(name="close", description="Bu kanalın ticket'ını kapatır (Sadece Yönetici)")
 async def close_ticket_command(interaction: discord.Interaction):
     """Bu kanalın ticket'ını kapatır - Sadece yöneticiler kullanabilir"""
@@ -1898,16 +1893,7 @@ async def close_ticket_command(interaction: discord.Interaction):
         channel_id = interaction.channel.id
         
         # Bu kanalın ticket olup olmadığını kontrol et
-        conn = sqlite3.connect(Config.DATABASE_NAME)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM tickets 
-            WHERE guild_id = ? AND channel_id = ? AND status = 'open'
-        ''', (guild_id, channel_id))
-        
-        ticket_data = cursor.fetchone()
-        conn.close()
+        ticket_data = await db.fetchone('open_ticket_in_guild_channel', (guild_id, channel_id))
         
         if not ticket_data:
             embed = discord.Embed(
@@ -1932,80 +1918,26 @@ async def close_ticket_command(interaction: discord.Interaction):
             'created_at': ticket_data[8]
         }
         
+        # Transkript uzun sürebilir, etkileşimi beklemeye al
+        await interaction.response.defer(ephemeral=True)
+        
+        # Kanal silinmeden önce transkripti arşivle (başarısız olursa ticket kapatılmaz)
+        channel = interaction.guild.get_channel(active_ticket['channel_id'])
+        if channel and Config.TRANSCRIPTS['ENABLED']:
+            await archive_ticket_transcript(channel, active_ticket)
+        
         # Ticket'ı kapat
-        close_ticket(active_ticket['id'], interaction.user.id)
+        await close_ticket(active_ticket['id'], interaction.user.id)
         
         # Kanalı sil
-        channel = interaction.guild.get_channel(active_ticket['channel_id'])
         if channel:
             try:
                 await channel.delete()
             except discord.Forbidden:
                 pass
         
-        # Ticket panelini yenile (eğer ticket kanalında ise)
-        try:
-            # Ticket panel mesajını bul ve yenile
-            async for message in interaction.channel.history(limit=50):
-                if message.author == bot.user and message.embeds:
-                    for embed in message.embeds:
-                        if "🎫 Destek Sistemi" in embed.title:
-                            # Panel mesajını yenile
-                            new_embed = discord.Embed(
-                                title="🎫 Destek Sistemi",
-                                description="Aşağıdaki kategorilerden birini seçerek ticket açabilirsiniz.",
-                                color=0xFFD700,
-                                timestamp=datetime.now()
-                            )
-                            
-                            # Ana resim ve thumbnail
-                            new_embed.set_image(url="https://cdn.discordapp.com/attachments/1405597411606270142/1406059134549233695/Untitled_design_1.png?ex=68a5b35c&is=68a461dc&hm=8d635c79cf83614e89533cadfae4d9a594b993a3b407325d738c6236452f4727&")
-                            new_embed.set_thumbnail(url="https://cdn.discordapp.com/attachments/1405597411606270142/1406059008372113409/nexusrp_1.png?ex=68a5b33e&is=68a461be&hm=e04a649e91ce85bc5d0c30ed3d4d1f0081d477db3a1e8a967d705016b11f4d9a&")
-                            
-                            # Kurallar
-                            new_embed.add_field(
-                                name="📋 Kurallar",
-                                value="Ticket açmadan önce sunucu kurallarını okuduğunuzdan emin olun.",
-                                inline=True
-                            )
-                            
-                            # Günlük limit (güncellenmiş)
-                            new_embed.add_field(
-                                name="⏰ Günlük Limit",
-                                value="Günde maksimum 5 ticket açabilirsiniz.",
-                                inline=True
-                            )
-                            
-                            # Bilgi
-                            new_embed.add_field(
-                                name="ℹ️ Bilgi",
-                                value="Ticket açtıktan sonra destek ekibimiz size yardımcı olacaktır.",
-                                inline=True
-                            )
-                            
-                            
-                            
-                            new_embed.set_footer(text=Config.BOT_NAME, icon_url=bot.user.avatar.url if bot.user.avatar and bot.user.avatar.url else None)
-                            
-                            # View'ı yeniden oluştur
-                            view = TicketCategoryView(TICKET_CATEGORIES)
-                            
-                            # Mesajı güncelle
-                            await message.edit(embed=new_embed, view=view)
-                            logger.info(f'🔄 Ticket panel yenilendi: {interaction.channel.name}')
-                            break
-        except Exception as e:
-            # Sadece gerçek hataları logla, Discord interaction hatalarını loglama
-            if not any(error_type in str(e) for error_type in [
-                'Interaction has already been acknowledged',
-                'Unknown Channel',
-                '404 Not Found',
-                'error code: 40060',
-                'error code: 10003',
-                'error code: 10062',
-                'Unknown interaction'
-            ]):
-                logger.error(f'❌ Panel yenileme hatası: {e}')
+        # Sunucunun ticket panellerini yenile (kısa sürede kapatılan ticket'lar tek düzenlemede birleşir)
+        ticket_panel_refresher.schedule(guild_id)
         
         # Ticket kapatma logunu gönder
         await log_ticket_activity(guild_id, "Kapatıldı", active_ticket['ticket_number'], active_ticket['user_id'], active_ticket['channel_id'], f"Kapatıldı: {interaction.user.display_name}")
@@ -2018,7 +1950,7 @@ async def close_ticket_command(interaction: discord.Interaction):
         )
         embed.set_footer(text=Config.BOT_NAME, icon_url=bot.user.avatar.url if bot.user.avatar and bot.user.avatar.url else None)
         
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
         
     except Exception as e:
         # Sadece gerçek hataları logla, Discord interaction hatalarını loglama
@@ -2031,7 +1963,7 @@ async def close_ticket_command(interaction: discord.Interaction):
             'error code: 10062',
             'Unknown interaction'
         ]):
-            logger.error(f'❌ Ticket kapatma hatası: {e}')
+            logger.error('❌ Ticket kapatma hatası: %s', e)
         
         # Hata mesajını sessizce gönder, log spam yapma
         try:
@@ -2055,7 +1987,7 @@ async def ticket_stats_command(interaction: discord.Interaction):
         guild_id = interaction.guild.id
         
         # Ticket konfigürasyonunu kontrol et
-        config = get_ticket_config(guild_id)
+        config = await get_ticket_config(guild_id)
         if not config:
             embed = discord.Embed(
                 title="❌ Hata",
@@ -2067,18 +1999,11 @@ async def ticket_stats_command(interaction: discord.Interaction):
             return
         
         # Veritabanından istatistikleri al
-        conn = sqlite3.connect(Config.DATABASE_NAME)
-        cursor = conn.cursor()
-        
         # Aktif ticket sayısı
-        cursor.execute('SELECT COUNT(*) FROM tickets WHERE guild_id = ? AND status = "open"', (guild_id,))
-        active_count = cursor.fetchone()[0]
+        active_count = (await db.fetchone('count_open_tickets', (guild_id,)))[0]
         
         # Toplam ticket sayısı
-        cursor.execute('SELECT COUNT(*) FROM tickets WHERE guild_id = ?', (guild_id,))
-        total_count = cursor.fetchone()[0]
-        
-        conn.close()
+        total_count = (await db.fetchone('count_tickets', (guild_id,)))[0]
         
         embed = discord.Embed(
             title="📊 Ticket İstatistikleri",
@@ -2090,6 +2015,11 @@ async def ticket_stats_command(interaction: discord.Interaction):
         embed.add_field(name="📈 Toplam Oluşturulan", value=total_count, inline=True)
         embed.add_field(name="🔒 Kapatılan", value=total_count - active_count, inline=True)
         embed.add_field(name="⏰ Günlük Limit", value=f"{config['daily_limit']} ticket", inline=True)
+        embed.add_field(
+            name="⚡ Config Önbelleği",
+            value=f"{ticket_configs.stats['hits']:,} isabet / {ticket_configs.stats['misses']:,} ıska (%{ticket_configs.hit_rate() * 100:.1f})",
+            inline=True
+        )
         
         embed.set_footer(text=Config.BOT_NAME, icon_url=bot.user.avatar.url if bot.user.avatar and bot.user.avatar.url else None)
         embed.set_author(name=interaction.user.display_name, icon_url=interaction.user.avatar.url if interaction.user.avatar and interaction.user.avatar.url else None)
@@ -2107,7 +2037,7 @@ async def ticket_stats_command(interaction: discord.Interaction):
             'error code: 10062',
             'Unknown interaction'
         ]):
-            logger.error(f'❌ Ticket stats hatası: {e}')
+            logger.error('❌ Ticket stats hatası: %s', e)
         embed = discord.Embed(
             title="❌ Hata",
             description="Ticket istatistikleri alınırken bir hata oluştu!",
@@ -2125,25 +2055,26 @@ async def ticket_stats_command(interaction: discord.Interaction):
 @bot.event
 async def on_interaction(interaction):
     """Button interaction'ları yakalar"""
+    set_log_guild(interaction.guild_id)
     if interaction.type == discord.InteractionType.component:
         try:
-            logger.info(f"Component interaction detected: type={interaction.type}")
-            logger.info(f"Interaction data type: {type(interaction.data)}")
-            logger.info(f"Interaction data: {interaction.data}")
+            # Tüm interaction verisi yalnızca DEBUG'da (her bileşen etkileşiminde yazılmasın)
+            logger.info("Component interaction detected: type=%s", interaction.type)
+            logger.debug("Interaction data: %s", interaction.data)
             
             # Discord.py versiyonuna göre custom_id'yi al
             custom_id = None
             if hasattr(interaction, 'custom_id'):
                 custom_id = interaction.custom_id
-                logger.info(f"Direct custom_id: {custom_id}")
+                logger.debug("Direct custom_id: %s", custom_id)
             elif hasattr(interaction, 'data') and hasattr(interaction.data, 'custom_id'):
                 custom_id = interaction.data.custom_id
-                logger.info(f"Data.custom_id: {custom_id}")
+                logger.debug("Data.custom_id: %s", custom_id)
             elif hasattr(interaction, 'data') and isinstance(interaction.data, dict) and 'custom_id' in interaction.data:
                 custom_id = interaction.data['custom_id']
-                logger.info(f"Data dict custom_id: {custom_id}")
+                logger.debug("Data dict custom_id: %s", custom_id)
             
-            logger.info(f"Final custom_id: {custom_id}")
+            logger.info("Final custom_id: %s", custom_id)
             
             if custom_id == "ticket_category_select":
                 logger.info("Ticket category select detected, this should be handled by the view")
@@ -2151,7 +2082,7 @@ async def on_interaction(interaction):
                 # Global handler'da işlemiyoruz, view'a bırakıyoruz
                 return
             else:
-                logger.info(f"Unknown custom_id: {custom_id}")
+                logger.info("Unknown custom_id: %s", custom_id)
         except Exception as e:
             # Sadece gerçek hataları logla, Discord interaction hatalarını loglama
             if not any(error_type in str(e) for error_type in [
@@ -2163,12 +2094,12 @@ async def on_interaction(interaction):
                 'error code: 10062',
                 'Unknown interaction'
             ]):
-                logger.error(f"Button interaction hatası: {e}")
-                logger.error(f"Interaction type: {interaction.type}")
-                logger.error(f"Interaction data: {getattr(interaction, 'data', 'No data')}")
-                logger.error(f"Interaction attributes: {dir(interaction)}")
-                logger.error(f"Exception type: {type(e)}")
-                logger.error(f"Exception args: {e.args}")
+                logger.error("Button interaction hatası: %s", e)
+                logger.error("Interaction type: %s", interaction.type)
+                logger.error("Interaction data: %s", getattr(interaction, 'data', 'No data'))
+                logger.error("Interaction attributes: %s", dir(interaction))
+                logger.error("Exception type: %s", type(e))
+                logger.error("Exception args: %s", e.args)
 
 @bot.event
 async def on_message(message):
@@ -2176,24 +2107,20 @@ async def on_message(message):
     # Bot mesajlarını loglama
     if message.author.bot:
         return
+    set_log_guild(message.guild.id if message.guild else None)
     
     # Ticket kanalında mı kontrol et
     try:
-        # Veritabanından ticket bilgisini al
-        conn = sqlite3.connect(Config.DATABASE_NAME)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT guild_id, ticket_number, user_id 
-            FROM tickets 
-            WHERE channel_id = ? AND status = 'open'
-        ''', (message.channel.id,))
-        
-        result = cursor.fetchone()
-        conn.close()
+        # Açık ticket indeksinden bak (yüklenene kadar veritabanından)
+        if open_tickets.loaded:
+            result = open_tickets.get(message.channel.id)
+        else:
+            result = await db.fetchone('open_ticket_by_channel', (message.channel.id,))
         
         if result:
             guild_id, ticket_number, user_id = result
+            if not Config.TICKET_LOG['FORWARD_MESSAGES']:
+                return
             
             # Ticket mesajını logla
             try:
@@ -2209,7 +2136,7 @@ async def on_message(message):
                     'error code: 10062',
                     'Unknown interaction'
                 ]):
-                    logger.error(f"Ticket mesaj log hatası: {e}")
+                    logger.error("Ticket mesaj log hatası: %s", e)
             
     except Exception as e:
         # Log hatası olursa sessizce devam et
@@ -2223,7 +2150,7 @@ async def on_message(message):
             'error code: 10062',
             'Unknown interaction'
         ]):
-            logger.error(f"Ticket mesaj kontrol hatası: {e}")
+            logger.error("Ticket mesaj kontrol hatası: %s", e)
     
     # Bot komutlarını işle
     try:
@@ -2239,7 +2166,7 @@ async def on_message(message):
             'error code: 10062',
             'Unknown interaction'
         ]):
-            logger.error(f"Bot komut işleme hatası: {e}")
+            logger.error("Bot komut işleme hatası: %s", e)
 
 
 
@@ -2264,26 +2191,7 @@ async def ticket_list_command(interaction: discord.Interaction):
         guild_id = interaction.guild.id
         
         # Aktif ticket'ları getir
-        conn = sqlite3.connect(Config.DATABASE_NAME)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT t.*, u.display_name 
-            FROM tickets t 
-            LEFT JOIN (
-                SELECT DISTINCT user_id, display_name 
-                FROM (
-                    SELECT user_id, display_name, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY created_at DESC) as rn
-                    FROM tickets
-                ) ranked 
-                WHERE rn = 1
-            ) u ON t.user_id = u.user_id
-            WHERE t.guild_id = ? AND t.status = 'open'
-            ORDER BY t.created_at DESC
-        ''', (guild_id,))
-        
-        active_tickets = cursor.fetchall()
-        conn.close()
+        active_tickets = await db.fetchall('open_tickets_in_guild', (guild_id,))
         
         if not active_tickets:
             embed = discord.Embed(
@@ -2303,12 +2211,11 @@ async def ticket_list_command(interaction: discord.Interaction):
         )
         
         for ticket in active_tickets:
-            user_name = ticket[8] if ticket[8] else "Bilinmeyen Kullanıcı"
-            created_at = datetime.fromisoformat(ticket[7]) if ticket[7] else datetime.now()
+            created_at = datetime.fromisoformat(ticket[8]) if ticket[8] else datetime.now()
             
             embed.add_field(
                 name=f"🎫 Ticket #{ticket[2]}",
-                value=f"**Kullanıcı:** {user_name}\n**Kategori:** {ticket[6]}\n**Oluşturulma:** {created_at.strftime('%d/%m/%Y %H:%M')}\n**Durum:** {ticket[7]}",
+                value=f"**Kullanıcı:** <@{ticket[3]}>\n**Kategori:** {ticket[6]}\n**Oluşturulma:** {created_at.strftime('%d/%m/%Y %H:%M')}\n**Durum:** {ticket[7]}",
                 inline=False
             )
         
@@ -2328,7 +2235,7 @@ async def ticket_list_command(interaction: discord.Interaction):
             'error code: 10062',
             'Unknown interaction'
         ]):
-            logger.error(f'❌ Ticket list hatası: {e}')
+            logger.error('❌ Ticket list hatası: %s', e)
         embed = discord.Embed(
             title="❌ Hata",
             description="Ticket listesi alınırken bir hata oluştu!",
@@ -2349,23 +2256,18 @@ async def ticket_list_command(interaction: discord.Interaction):
 async def log_ticket_activity(guild_id, action, ticket_number, user_id, channel_id, details=""):
     """Ticket aktivitelerini log kanalına gönderir"""
     try:
-        config = get_ticket_config(guild_id)
+        config = await get_ticket_config(guild_id)
         if not config or not config.get('log_channel_id'):
-            logger.debug(f"Log kanalı bulunamadı: guild_id={guild_id}")
+            logger.debug("Log kanalı bulunamadı: guild_id=%s", guild_id)
             return
         
         log_channel = bot.get_channel(config['log_channel_id'])
         if not log_channel:
-            logger.warning(f"Log kanalı bulunamadı: {config['log_channel_id']}")
+            logger.warning("Log kanalı bulunamadı: %s", config['log_channel_id'])
             return
         
         # Kullanıcı bilgisini al
-        try:
-            user = await bot.fetch_user(user_id)
-            user_name = user.display_name if user else f"ID: {user_id}"
-        except Exception as e:
-            logger.error(f"Kullanıcı bilgisi alınamadı: {e}")
-            user_name = f"ID: {user_id}"
+        user_name = await user_cache.display_name(user_id, bot.get_guild(guild_id))
         
         # Log embed'i oluştur
         embed = discord.Embed(
@@ -2378,16 +2280,45 @@ async def log_ticket_activity(guild_id, action, ticket_number, user_id, channel_
         embed.set_footer(text=Config.BOT_NAME, icon_url=bot.user.avatar.url if bot.user.avatar and bot.user.avatar.url else None)
         
         await log_channel.send(embed=embed)
-        logger.info(f"Ticket log gönderildi: #{ticket_number} - {action}")
+        logger.info("Ticket log gönderildi: #%s - %s", ticket_number, action)
         
     except Exception as e:
-        logger.error(f"❌ Ticket log hatası: {e}")
-        logger.error(f"Log detayları: guild_id={guild_id}, action={action}, ticket_number={ticket_number}")
+        logger.error("❌ Ticket log hatası: %s", e)
+        logger.error("Log detayları: guild_id=%s, action=%s, ticket_number=%s", guild_id, action, ticket_number)
+
+async def send_ticket_log_page(channel_id, fields, dropped):
+    """Biriken ticket mesajlarını tek embed olarak log kanalına gönderir"""
+    log_channel = bot.get_channel(channel_id)
+    if not log_channel:
+        raise LookupError(f"Log kanalı bulunamadı: {channel_id}")
+    
+    embed = discord.Embed(
+        title=f"💬 Ticket Mesajları ({len(fields)})",
+        color=0x57F287,
+        timestamp=datetime.now()
+    )
+    for name, value in fields:
+        embed.add_field(name=name, value=value, inline=False)
+    
+    footer = Config.BOT_NAME if not dropped else f"{Config.BOT_NAME} • {dropped} mesaj yoğunluk nedeniyle atlandı"
+    embed.set_footer(text=footer, icon_url=bot.user.avatar.url if bot.user.avatar and bot.user.avatar.url else None)
+    
+    await log_channel.send(embed=embed)
+    logger.debug("Ticket mesaj logları gönderildi: %s mesaj, kanal=%s", len(fields), channel_id)
+
+# Ticket mesaj logları log kanalı başına biriktirilip hız sınırına uygun gönderilir
+ticket_log_forwarder = LogForwarder(
+    send_ticket_log_page,
+    window=Config.TICKET_LOG['WINDOW'],
+    max_queue=Config.TICKET_LOG['MAX_QUEUE'],
+    rate=Config.TICKET_LOG['RATE'],
+    per=Config.TICKET_LOG['PER']
+)
 
 async def log_ticket_message(guild_id, ticket_number, user_id, channel_id, message_content):
-    """Ticket mesajlarını log kanalına gönderir"""
+    """Ticket mesajlarını log kanalı kuyruğuna ekler"""
     try:
-        config = get_ticket_config(guild_id)
+        config = await get_ticket_config(guild_id)
         if not config or not config.get('log_channel_id'):
             return
         
@@ -2396,30 +2327,43 @@ async def log_ticket_message(guild_id, ticket_number, user_id, channel_id, messa
             return
         
         # Kullanıcı bilgisini al
-        try:
-            user = await bot.fetch_user(user_id)
-            user_name = user.display_name if user else f"ID: {user_id}"
-        except Exception as e:
-            logger.error(f"Mesaj log için kullanıcı bilgisi alınamadı: {e}")
-            user_name = f"ID: {user_id}"
-        
-        # Mesaj embed'i oluştur
-        embed = discord.Embed(
-            title=f"💬 Ticket #{ticket_number} - Yeni Mesaj",
-            description=f"**Kullanıcı:** {user_name} ({user_id})\n**Kanal:** <#{channel_id}>\n\n**Mesaj:**\n{message_content[:1000]}{'...' if len(message_content) > 1000 else ''}",
-            color=0x57F287,
-            timestamp=datetime.now()
+        user_name = await user_cache.display_name(user_id, bot.get_guild(guild_id))
+        
+        # Alan adı ve değeri embed sınırlarına kuyrukta kısaltılır
+        content = message_content or "*(içerik yok)*"
+        ticket_log_forwarder.submit(
+            log_channel.id,
+            f"#{ticket_number} • {user_name} ({user_id})",
+            f"<#{channel_id}>\n{content}"
         )
         
-        embed.set_footer(text=Config.BOT_NAME, icon_url=bot.user.avatar.url if bot.user.avatar and bot.user.avatar.url else None)
-        
-        await log_channel.send(embed=embed)
-        logger.debug(f"Ticket mesaj log gönderildi: #{ticket_number}")
-        
     except Exception as e:
-        logger.error(f"❌ Ticket mesaj log hatası: {e}")
-        logger.error(f"Mesaj log detayları: guild_id={guild_id}, ticket_number={ticket_number}")
+        logger.error("❌ Ticket mesaj log hatası: %s", e)
+        logger.error("Mesaj log detayları: guild_id=%s, ticket_number=%s", guild_id, ticket_number)
 
 # Bot'u çalıştır
 if __name__ == '__main__':
-    bot.run(Config.DISCORD_TOKEN)
\ No newline at end of file
+    # Başlatıcı süreçleri SIGTERM ile durdurur; kapanış adımları (tampon yazımı) çalışsın
+    signal.signal(signal.SIGTERM, raise_keyboard_interrupt)
+    try:
+        bot.run(Config.DISCORD_TOKEN)
+    finally:
+        # Bekleyen sayaç güncellemelerini yaz (bot.run event loop'u kapatmış olur)
+        async def flush_on_shutdown():
+            return await guild_storage.close() + await counter_buffer.close()
+        
+        try:
+            written = asyncio.run(flush_on_shutdown())
+            logger.info("📝 Kapanışta %s bekleyen güncelleme yazıldı", written)
+        except Exception as e:
+            logger.error("❌ Kapanışta bekleyen güncellemeler yazılamadı: %s", e)
+        logger.info("🗄️ Sorgu süreleri:\n%s", db.stats.format_report())
+        db.close()
+        log_budget.flush()
+        log_stats = log_pipeline.stats
+        logger.info(
+            "📜 Log kuyruğu: %s kayıt yazıldı, %s kayıt atıldı • bütçe: %s örneklendi, %s tekrar bastırıldı",
+            log_stats['queued'], log_stats['dropped'], log_budget.stats['sampled'], log_budget.stats['suppressed']
+        )
+        # Kuyrukta kalan kayıtları yaz
+        log_pipeline.stop()
@@ -19,6 +19,73 @@ class Config:
     # Veritabanı ayarları
     DATABASE_NAME = 'invites.db'
     
+    # SQLite bağlantı ayarları (None = SQLite varsayılanı)
+    DATABASE_PRAGMAS = {
+        'JOURNAL_MODE': 'WAL',          # Okuyucular yazıcıyı beklemez
+        'SYNCHRONOUS': 'NORMAL',        # WAL'de commit başına fsync yok (elektrik kesintisinde son commit'ler kaybolabilir, bozulma olmaz)
+        'CACHE_SIZE': -16000,           # Bağlantı başına sayfa önbelleği (negatif = KiB)
+        'MMAP_SIZE': 64 * 1024 * 1024,  # Bellek eşlemeli okuma (bayt)
+        'BUSY_TIMEOUT': 30000,          # Kilitli veritabanında bekleme (ms)
+        'WAL_AUTOCHECKPOINT': 1000      # Bu kadar WAL sayfasında otomatik checkpoint
+    }
+    
+    # Veritabanı bakım görevi
+    DATABASE_MAINTENANCE = {
+        'CHECKPOINT_INTERVAL': 300,     # PASSIVE WAL checkpoint aralığı (saniye)
+        'OPTIMIZE_INTERVAL': 3600       # PRAGMA optimize aralığı (saniye)
+    }
+    
+    # Write-behind tamponu - sayaç güncellemeleri bu aralıkta ya da bu kadar kayıt birikince tek transaction'da yazılır
+    WRITE_BEHIND = {
+        'INTERVAL': 0.5,    # saniye
+        'MAX_PENDING': 500
+    }
+    
+    # Gateway sharding - ENABLED ise tek süreçte AutoShardedBot; çok süreç için launcher.py kullanılır
+    # (launcher.py ile çalışırken sunucu başına davet dosyaları otomatik açılır)
+    SHARDING = {
+        'ENABLED': False,
+        'SHARD_COUNT': None,    # None = Discord'un önerdiği sayı (yalnızca tek süreçte)
+        'PROCESSES': 1          # launcher.py varsayılan süreç sayısı
+    }
+    
+    # Sunucu başına davet veritabanı (shard) - açıkken her sunucunun davet verisi DIRECTORY/guild_<id>.db dosyasında tutulur
+    INVITE_SHARDS = {
+        'ENABLED': False,
+        'DIRECTORY': 'shards'
+    }
+    
+    # Sunucusu bilinmeyen eski davet kayıtlarının (guild_id sütunu öncesi) atanacağı sunucu
+    # None ise kayıtlar davet kodlarından eşleştirilir; bot tek sunucudaysa hepsi o sunucuya atanır
+    LEGACY_INVITE_GUILD_ID = None
+    
+    # Log hattı - kayıtlar bu boyutta bir kuyruğa konur ve arka plan thread'inde yazılır (kuyruk doluysa atılır ve sayılır)
+    LOGGING = {
+        'QUEUE_SIZE': 10000,
+        # Çağrı yeri ('modül.fonksiyon') -> INFO kayıtlarının yazılma oranı (her satırın ilk kaydı her zaman yazılır)
+        # WARNING ve üstü örneklenmez; hata yazılınca aynı sunucuda atlanan son kayıtlar hatanın önüne eklenir
+        'SAMPLING': {
+            'bot.on_interaction': 0.05,
+            'bot.callback': 0.1,
+            'bot.__init__': 0.1,
+            'bot.create_ticket_with_category': 0.1,
+            'bot.open_ticket': 0.1,
+            'bot.load_guild_invites': 0.1
+        },
+        'REPEAT_WINDOW': 60,    # Aynı şablondaki kayıtlar için pencere (saniye)
+        'REPEAT_BURST': 20,     # Pencere başına yazılacak aynı şablonlu kayıt; fazlası özetlenir
+        'ERROR_CONTEXT': 50,    # Hata bağlamı için saklanan atlanmış kayıt sayısı
+        'TRACE_MINUTES': 30,    # /log-trace ile açılan DEBUG modunun süresi
+        # Aktif dosya (logs/bot.log) bu aralıkta (gece yarısına hizalı) ya da bu boyutta döndürülür ve gzip'lenir
+        'ROTATE_SECONDS': 86400,
+        'ROTATE_BYTES': 50 * 1024 * 1024,
+        # Arşiv saklama sınırları (hangisi önce aşılırsa en eski arşivler silinir; None = sınırsız)
+        'RETENTION_DAYS': 30,
+        'RETENTION_FILES': 90,
+        'RETENTION_BYTES': 500 * 1024 * 1024,
+        'ARCHIVE_BLOCK_BYTES': 256 * 1024   # Zaman indeksindeki blok boyutu (sıkıştırılmamış)
+    }
+    
     # Davet kodu uzunluğu
     INVITE_CODE_LENGTH = 8
     
@@ -31,6 +98,35 @@ class Config:
         'NEUTRAL': 0x808080   # Gri
     }
     
+    # Davet takibi - aynı pencerede katılan üyeler tek davet sorgusunda eşleştirilir (saniye)
+    JOIN_ATTRIBUTION_WINDOW = 1.0
+    
+    # Kullanıcı çözümleme önbelleği
+    USER_CACHE = {
+        'TTL': 600,             # Bulunan kullanıcılar kaç saniye önbellekte kalır
+        'NEGATIVE_TTL': 300,    # Bulunamayan kullanıcılar kaç saniye önbellekte kalır
+        'MAX_SIZE': 10000,      # Maksimum önbellek boyutu (LRU)
+        'CONCURRENCY': 5        # Aynı anda yapılabilecek fetch_user isteği
+    }
+    
+    # Ticket mesaj logları - log kanalı başına toplu gönderim
+    TICKET_LOG = {
+        'WINDOW': 2.0,      # Mesajlar kaç saniye biriktirilip tek embed'de gönderilir
+        'MAX_QUEUE': 500,   # Kanal başına bekleyen maksimum mesaj (dolunca en eskiler atılır)
+        'RATE': 5,          # PER saniyede en fazla kaç gönderim
+        'PER': 5.0,
+        'FORWARD_MESSAGES': True  # Mesajlar log kanalına iletilsin mi (transkriptler açıkken kapatılabilir)
+    }
+    
+    # Ticket transkriptleri - kapatılan ticket'ların mesajları sıkıştırılmış JSONL olarak saklanır
+    TRANSCRIPTS = {
+        'ENABLED': True,
+        'DIRECTORY': 'transcripts'
+    }
+    
+    # Ticket kapatıldıktan sonra panel yenilemesi için bekleme süresi (saniye) - bu sürede kapatılanlar tek düzenlemede birleşir
+    TICKET_PANEL_REFRESH_DELAY = 60
+    
     # Mesaj ayarları
     MAX_INVITES_DISPLAY = 10  # Davet listesinde gösterilecek maksimum kişi sayısı
     
@@ -43,6 +139,10 @@ class Config:
         'SUSPICIOUS_ACTIVITY_LOGGING': True   # Şüpheli aktivite loglaması aktif mi
     }
     
+    # Üyelik indekslerinde Bloom filtresi bu kayıt sayısından sonra devreye girer (None = kapalı)
+    # Not: saf Python Bloom, ikili aramadan yavaştır; yalnızca çok büyük sunucularda açın
+    MEMBERSHIP_BLOOM_THRESHOLD = None
+    
     @classmethod
     def validate(cls):
         """Konfigürasyon doğrulaması"""
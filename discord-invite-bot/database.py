@@ -0,0 +1,283 @@
+"""
+Paylaşımlı asenkron veritabanı katmanı.
+Tek bir yazıcı bağlantısı ve birkaç okuyucu bağlantısı, event loop'u
+bloklamamak için ayrı thread'lerde çalıştırılır. Sorgular queries.SQL'deki
+adlarıyla ya da doğrudan SQL metniyle çağrılabilir; hepsinin süresi ölçülür.
+Bağlantılar Config'teki PRAGMA ayarlarıyla (WAL, synchronous, önbellek) açılır.
+"""
+
+import asyncio
+import functools
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from queries import SQL, QueryStats
+
+logger = logging.getLogger(__name__)
+
+# Config anahtarı -> PRAGMA adı (journal_mode önce uygulanır)
+PRAGMAS = [
+    ('JOURNAL_MODE', 'journal_mode'),
+    ('SYNCHRONOUS', 'synchronous'),
+    ('CACHE_SIZE', 'cache_size'),
+    ('MMAP_SIZE', 'mmap_size'),
+    ('BUSY_TIMEOUT', 'busy_timeout'),
+    ('WAL_AUTOCHECKPOINT', 'wal_autocheckpoint'),
+]
+
+
+def apply_pragmas(conn, pragmas):
+    """Config sözlüğündeki PRAGMA ayarlarını bağlantıya uygular"""
+    for key, pragma in PRAGMAS:
+        value = (pragmas or {}).get(key)
+        if value is None:
+            continue
+        # PRAGMA parametre kabul etmez; değerler yalnızca Config'ten gelir
+        if not str(value).lstrip('-').isalnum():
+            raise ValueError(f"Geçersiz {pragma} değeri: {value!r}")
+        conn.execute(f'PRAGMA {pragma} = {value}')
+
+
+class StatementCursor:
+    """sqlite3 cursor sarmalayıcı: ifade adlarını çözer ve süreleri kaydeder"""
+
+    def __init__(self, cursor, resolve, stats):
+        self._cursor = cursor
+        self._resolve = resolve
+        self._stats = stats
+
+    def execute(self, sql, params=()):
+        name, sql = self._resolve(sql)
+        start = time.perf_counter()
+        try:
+            self._cursor.execute(sql, params)
+        finally:
+            self._stats.record(name, time.perf_counter() - start)
+        return self
+
+    def executemany(self, sql, seq):
+        name, sql = self._resolve(sql)
+        start = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, seq)
+        finally:
+            self._stats.record(name, time.perf_counter() - start)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, attr):
+        # fetchone, fetchall, lastrowid, rowcount ...
+        return getattr(self._cursor, attr)
+
+
+class Database:
+    """Uzun ömürlü SQLite bağlantı havuzu (1 yazıcı + N okuyucu)"""
+
+    def __init__(self, path, readers=4, statements=SQL, cached_statements=256, pragmas=None, stats=None):
+        self.path = path
+        self.pragmas = pragmas or {}
+        self.statements = statements
+        self.cached_statements = cached_statements
+        # Birden fazla havuz (ör. sunucu shard'ları) aynı istatistikleri paylaşabilir
+        self.stats = stats if stats is not None else QueryStats()
+        self._labels = {}
+        # Yazma işlemleri tek thread'de sıralanır, okumalar paralel çalışır
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='db-reader')
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """Yeni bir SQLite bağlantısı açar"""
+        conn = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False, cached_statements=self.cached_statements
+        )
+        apply_pragmas(conn, self.pragmas)
+        return conn
+
+    def _resolve(self, sql):
+        """İfade adını (ad, SQL) çiftine çevirir; ham SQL kısaltılmış metniyle etiketlenir"""
+        statement = self.statements.get(sql)
+        if statement is not None:
+            return sql, statement
+        label = self._labels.get(sql)
+        if label is None:
+            label = self._labels[sql] = ' '.join(sql.split())[:60]
+        return label, sql
+
+    def _cursor(self):
+        return StatementCursor(self._connection().cursor(), self._resolve, self.stats)
+
+    def _connection(self):
+        """Mevcut thread'e ait bağlantıyı getirir (yoksa açar)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    async def _run(self, executor, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(func, *args))
+
+    # Thread içinde çalışan senkron işlemler
+    def _fetchone(self, sql, params):
+        return self._cursor().execute(sql, params).fetchone()
+
+    def _fetchall(self, sql, params):
+        return self._cursor().execute(sql, params).fetchall()
+
+    def _execute(self, sql, params):
+        conn = self._connection()
+        try:
+            cursor = self._cursor().execute(sql, params)
+            conn.commit()
+            return cursor.rowcount
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _executemany(self, sql, seq):
+        conn = self._connection()
+        try:
+            cursor = self._cursor().executemany(sql, seq)
+            conn.commit()
+            return cursor.rowcount
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _transaction(self, func, args):
+        conn = self._connection()
+        start = time.perf_counter()
+        try:
+            result = func(self._cursor(), *args)
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            # Transaction'ın tamamı (commit dahil) ayrıca ölçülür
+            self.stats.record(f"tx:{func.__name__}", time.perf_counter() - start)
+
+    def _read(self, func, args):
+        return func(self._cursor(), *args)
+
+    def _pragma(self, statement):
+        return self._cursor().execute(statement).fetchone()
+
+    # Asenkron API
+    async def fetchone(self, sql, params=()):
+        """Tek satır okur (okuyucu havuzundan); sql bir ifade adı ya da SQL metni olabilir"""
+        return await self._run(self._readers, self._fetchone, sql, params)
+
+    async def fetchall(self, sql, params=()):
+        """Tüm satırları okur (okuyucu havuzundan)"""
+        return await self._run(self._readers, self._fetchall, sql, params)
+
+    async def execute(self, sql, params=()):
+        """Tek bir yazma sorgusu çalıştırır ve commit eder"""
+        return await self._run(self._writer, self._execute, sql, params)
+
+    async def executemany(self, sql, seq):
+        """Toplu yazma sorgusu çalıştırır ve commit eder"""
+        return await self._run(self._writer, self._executemany, sql, list(seq))
+
+    async def transaction(self, func, *args):
+        """func(cursor, *args) fonksiyonunu yazıcı thread'inde tek transaction olarak çalıştırır"""
+        return await self._run(self._writer, self._transaction, func, args)
+
+    async def read(self, func, *args):
+        """func(cursor, *args) fonksiyonunu okuyucu thread'inde çalıştırır"""
+        return await self._run(self._readers, self._read, func, args)
+
+    async def checkpoint(self, mode='PASSIVE'):
+        """WAL checkpoint çalıştırır: (busy, wal sayfası, aktarılan sayfa)"""
+        if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+            raise ValueError(f"Geçersiz checkpoint modu: {mode}")
+        return await self._run(self._writer, self._pragma, f'PRAGMA wal_checkpoint({mode})')
+
+    async def optimize(self):
+        """PRAGMA optimize ile sorgu planlayıcı istatistiklerini günceller"""
+        return await self._run(self._writer, self._pragma, 'PRAGMA optimize')
+
+    def close(self):
+        """Thread havuzlarını durdurur ve tüm bağlantıları kapatır"""
+        # Kapanışta planlayıcı istatistiklerini güncelle (SQLite önerisi)
+        try:
+            self._writer.submit(self._pragma, 'PRAGMA optimize').result()
+        except Exception as e:
+            logger.warning("⚠️ PRAGMA optimize başarısız: %s", e)
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections.clear()
+
+
+class DatabaseMaintenance:
+    """Arka planda periyodik WAL checkpoint ve PRAGMA optimize çalıştırır"""
+
+    def __init__(self, db, checkpoint_interval=300, optimize_interval=3600):
+        self.db = db
+        self.checkpoint_interval = checkpoint_interval
+        self.optimize_interval = optimize_interval
+        self._task = None
+        self.stats = {'checkpoints': 0, 'optimizes': 0, 'busy': 0, 'wal_pages': 0, 'failed': 0}
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Bakım görevini başlatır (zaten çalışıyorsa bir şey yapmaz)"""
+        if not self.running:
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_checkpoint(self):
+        # PASSIVE: okuyucu/yazıcıları beklemez, yalnızca aktarılabilen sayfaları aktarır
+        busy, wal_pages, checkpointed = await self.db.checkpoint('PASSIVE')
+        self.stats['checkpoints'] += 1
+        self.stats['busy'] += busy
+        self.stats['wal_pages'] = wal_pages
+        logger.debug("🗄️ WAL checkpoint: %s/%s sayfa", checkpointed, wal_pages)
+
+    async def run_optimize(self):
+        await self.db.optimize()
+        self.stats['optimizes'] += 1
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        next_optimize = loop.time() + self.optimize_interval
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            try:
+                await self.run_checkpoint()
+                if loop.time() >= next_optimize:
+                    await self.run_optimize()
+                    next_optimize = loop.time() + self.optimize_interval
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error("❌ Veritabanı bakım hatası: %s", e)
@@ -0,0 +1,189 @@
+"""
+Sunucu bazlı davet verisi depolaması.
+Davet tabloları guild_id ile bölümlenmiştir; varsayılan olarak tüm sunucular
+ortak veritabanındadır. Shard modunda her sunucunun davet verisi ayrı bir
+dosyada tutulur ve sunucuya ilk erişimde açılır, böylece bir sunucunun
+sorgu maliyeti diğer sunucuların veri boyutundan etkilenmez.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+from collections import namedtuple
+
+from database import Database, apply_pragmas
+from migrations import init_schema
+from queries import INVITE_TABLES
+from write_buffer import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+# Sunucunun davet verisinin bulunduğu veritabanı ve write-behind tamponu
+GuildDatabase = namedtuple('GuildDatabase', ['db', 'buffer'])
+
+
+def claim_legacy_invites(cursor, guild_id, codes, claim_all=False, member_ids=(), chunk_size=500):
+    """
+    Sunucusu bilinmeyen (guild_id = 0) eski davet kayıtlarını sunucuya taşır.
+    codes: sunucunun Discord'daki davet kodları. claim_all ise kalan tüm eski
+    kayıtlar bu sunucuya verilir (bot tek sunucudaysa). member_ids: sunucunun
+    üyeleri; davet kodu artık olmayan kayıtlar, davet eden ve edilen bu sunucudaysa
+    sahiplenilir. Taşınan kayıt sayısını döndürür.
+    """
+    codes = list(codes)
+    claimed = 0
+    for start in range(0, len(codes), chunk_size):
+        chunk = codes[start:start + chunk_size]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(
+            f'UPDATE invite_codes SET guild_id = ? WHERE guild_id = 0 AND code IN ({placeholders})',
+            (guild_id, *chunk)
+        )
+        claimed += cursor.rowcount
+    if claim_all:
+        cursor.execute('UPDATE invite_codes SET guild_id = ? WHERE guild_id = 0', (guild_id,))
+        claimed += cursor.rowcount
+
+    # Davet edilenler kullandıkları davetin sunucusunu alır
+    if claim_all:
+        cursor.execute('UPDATE OR IGNORE invited_users SET guild_id = ? WHERE guild_id = 0', (guild_id,))
+    else:
+        cursor.execute('''
+            UPDATE OR IGNORE invited_users SET guild_id = ?
+            WHERE guild_id = 0 AND invite_code IN (SELECT code FROM invite_codes WHERE guild_id = ?)
+        ''', (guild_id, guild_id))
+    claimed += cursor.rowcount
+
+    # Davet kodu silinmiş kayıtlar üyelikten eşleştirilir (yalnızca eşleşmemiş kayıt kaldıysa)
+    if not claim_all and member_ids and cursor.execute('SELECT 1 FROM invited_users WHERE guild_id = 0 LIMIT 1').fetchone():
+        cursor.execute('CREATE TEMP TABLE IF NOT EXISTS legacy_members (user_id INTEGER PRIMARY KEY)')
+        cursor.executemany('INSERT OR IGNORE INTO legacy_members (user_id) VALUES (?)', ((member_id,) for member_id in member_ids))
+        cursor.execute('''
+            UPDATE OR IGNORE invited_users SET guild_id = ?
+            WHERE guild_id = 0
+              AND invited_user_id IN (SELECT user_id FROM legacy_members)
+              AND inviter_id IN (SELECT user_id FROM legacy_members)
+        ''', (guild_id,))
+        claimed += cursor.rowcount
+        cursor.execute('DELETE FROM legacy_members')
+
+    if claimed:
+        # Sıralama toplamlarını taşınan kayıtlardan yeniden hesapla
+        cursor.execute('DELETE FROM inviter_totals WHERE guild_id IN (0, ?)', (guild_id,))
+        cursor.execute('''
+            INSERT INTO inviter_totals (guild_id, inviter_id, invite_count)
+            SELECT guild_id, inviter_id, COUNT(*) FROM invited_users
+            WHERE guild_id IN (0, ?)
+            GROUP BY guild_id, inviter_id
+        ''', (guild_id,))
+    return claimed
+
+
+def clear_invite_state(invite_cache, invited_indexes, leaderboards, guild_id=None):
+    """
+    /reset sonrası bellekteki davet durumunu boşaltır: guild_id verilirse yalnızca
+    o sunucunun, verilmezse tüm sunucuların. Diğer sunucuların indeks ve
+    sıralamalarına dokunulmaz.
+    """
+    invite_cache.clear(guild_id)
+    guild_ids = set(invited_indexes) | set(leaderboards) if guild_id is None else {guild_id}
+    for target in guild_ids:
+        # Sunucunun verisi silindi: indeks yüklü ve boş kalır
+        invited_indexes[target].clear()
+        board = leaderboards.get(target)
+        if board is not None:
+            board.clear()
+
+
+class GuildStorage:
+    """Sunucu -> davet veritabanı eşlemesi (ortak dosya ya da sunucu başına shard)"""
+
+    def __init__(self, db, buffer, shard_directory=None, pragmas=None, readers=1,
+                 buffer_interval=0.5, buffer_max_pending=500):
+        self.db = db
+        self.buffer = buffer
+        self.shard_directory = shard_directory
+        self.pragmas = pragmas
+        self.readers = readers
+        self.buffer_interval = buffer_interval
+        self.buffer_max_pending = buffer_max_pending
+        self._shards = {}
+        self._lock = asyncio.Lock()
+
+    @property
+    def sharded(self):
+        return self.shard_directory is not None
+
+    def shard_path(self, guild_id):
+        return os.path.join(self.shard_directory, f"guild_{guild_id}.db")
+
+    async def get(self, guild_id):
+        """Sunucunun davet verisinin veritabanını getirir (shard modunda ilk erişimde açar)"""
+        if not self.sharded:
+            return GuildDatabase(self.db, self.buffer)
+        shard = self._shards.get(guild_id)
+        if shard is not None:
+            return shard
+        async with self._lock:
+            shard = self._shards.get(guild_id)
+            if shard is None:
+                moved = await asyncio.get_running_loop().run_in_executor(None, self._prepare_shard, guild_id)
+                if moved:
+                    logger.info("🗂️ %s sunucusunun %s davet kaydı shard dosyasına taşındı", guild_id, moved)
+                # Sorgu süreleri tek raporda toplanır
+                db = Database(self.shard_path(guild_id), readers=self.readers, pragmas=self.pragmas, stats=self.db.stats)
+                shard = GuildDatabase(db, WriteBehindBuffer(db, self.buffer_interval, self.buffer_max_pending))
+                self._shards[guild_id] = shard
+        return shard
+
+    def _prepare_shard(self, guild_id):
+        """Shard dosyasını oluşturur ve ortak veritabanındaki kayıtlarını taşır"""
+        os.makedirs(self.shard_directory, exist_ok=True)
+        conn = sqlite3.connect(self.shard_path(guild_id), timeout=30)
+        try:
+            apply_pragmas(conn, self.pragmas)
+            init_schema(conn)
+            conn.execute('ATTACH DATABASE ? AS shared', (self.db.path,))
+            # Kopyalama tekrarlanabilir: yarıda kalırsa sonraki açılışta kalanlar taşınır
+            moved = 0
+            with conn:
+                for table in INVITE_TABLES:
+                    moved += conn.execute(
+                        f'INSERT OR IGNORE INTO main.{table} SELECT * FROM shared.{table} WHERE guild_id = ?',
+                        (guild_id,)
+                    ).rowcount
+            with conn:
+                for table in INVITE_TABLES:
+                    conn.execute(f'DELETE FROM shared.{table} WHERE guild_id = ?', (guild_id,))
+            conn.execute('DETACH DATABASE shared')
+            return moved
+        finally:
+            conn.close()
+
+    def databases(self):
+        """Açık tüm davet veritabanları (ortak veritabanı dahil)"""
+        return [self.db] + [shard.db for shard in self._shards.values()]
+
+    def buffers(self):
+        return [self.buffer] + [shard.buffer for shard in self._shards.values()]
+
+    def __len__(self):
+        return len(self._shards)
+
+    async def flush(self):
+        """Tüm tamponlardaki bekleyen güncellemeleri yazar"""
+        results = await asyncio.gather(*(buffer.flush() for buffer in self.buffers()))
+        return sum(results)
+
+    async def close(self):
+        """Shard tamponlarını yazar ve shard bağlantılarını kapatır (ortak veritabanı hariç)"""
+        written = 0
+        for guild_id, shard in list(self._shards.items()):
+            try:
+                written += await shard.buffer.close()
+            except Exception as e:
+                logger.error("❌ %s shard tamponu yazılamadı: %s", guild_id, e)
+            shard.db.close()
+        self._shards.clear()
+        return written
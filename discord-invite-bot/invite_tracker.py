@@ -0,0 +1,189 @@
+"""
+Davet takip yardımcıları.
+Sunucu bazlı davet kullanım sayılarını bellekte tutar, böylece üye
+katılımında hangi davetin kullanıldığı veritabanına gitmeden bulunur.
+"""
+
+import asyncio
+
+UPSERT_INVITE_SQL = '''
+    INSERT INTO invite_codes (code, user_id, created_at, uses, guild_id)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(code) DO UPDATE SET
+        guild_id = excluded.guild_id,
+        user_id = excluded.user_id,
+        created_at = excluded.created_at,
+        uses = excluded.uses
+'''
+
+
+def sync_invite_rows(cursor, rows, bot_user_id, guild_id=0, chunk_size=500):
+    """
+    Sunucudaki davetleri (guild_id) tek executemany UPSERT ile veritabanına yazar.
+    rows: (code, inviter_id, uses, created_at) kayıtları. Bot tarafından
+    oluşturulan davetlerin gerçek sahibi veritabanından alınır.
+    Her kayıt için kullanılan inviter_id listesini döndürür.
+    """
+    rows = list(rows)
+
+    # Bot'un oluşturduğu davetlerin sahiplerini toplu sorgula
+    bot_codes = [code for code, inviter_id, _, _ in rows if inviter_id == bot_user_id]
+    owners = {}
+    for start in range(0, len(bot_codes), chunk_size):
+        chunk = bot_codes[start:start + chunk_size]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(f'SELECT code, user_id FROM invite_codes WHERE code IN ({placeholders})', chunk)
+        owners.update(cursor.fetchall())
+
+    inviter_ids = [
+        owners.get(code, inviter_id) if inviter_id == bot_user_id else inviter_id
+        for code, inviter_id, _, _ in rows
+    ]
+    cursor.executemany(UPSERT_INVITE_SQL, (
+        (code, inviter_id, created_at, uses, guild_id)
+        for (code, _, uses, created_at), inviter_id in zip(rows, inviter_ids)
+    ))
+    return inviter_ids
+
+
+class InviteUsesCache:
+    """Sunucu bazlı davet kullanım anlık görüntüsü (guild_id -> code -> [uses, inviter_id])"""
+
+    def __init__(self):
+        self._guilds = {}
+
+    def is_seeded(self, guild_id):
+        """Sunucu için anlık görüntü yüklenmiş mi"""
+        return guild_id in self._guilds
+
+    def seed(self, guild_id, entries):
+        """Sunucunun anlık görüntüsünü (code, uses, inviter_id) kayıtlarıyla baştan kurar"""
+        self._guilds[guild_id] = {code: [uses, inviter_id] for code, uses, inviter_id in entries}
+
+    def set(self, guild_id, code, uses, inviter_id):
+        """Tek bir davetin kullanım sayısını ve sahibini günceller"""
+        self._guilds.setdefault(guild_id, {})[code] = [uses, inviter_id]
+
+    def set_inviter(self, guild_id, code, inviter_id):
+        """Davetin sahibini günceller (kullanım sayısı korunur)"""
+        entry = self._guilds.setdefault(guild_id, {}).setdefault(code, [0, inviter_id])
+        entry[1] = inviter_id
+
+    def remove(self, guild_id, code):
+        """Silinen daveti anlık görüntüden çıkarır"""
+        self._guilds.get(guild_id, {}).pop(code, None)
+
+    def clear(self, guild_id=None):
+        """Bir sunucunun (veya tüm sunucuların) anlık görüntüsünü siler"""
+        if guild_id is None:
+            self._guilds.clear()
+        else:
+            self._guilds.pop(guild_id, None)
+
+    def count(self, guild_id):
+        """Sunucuda bilinen davet sayısı"""
+        return len(self._guilds.get(guild_id, {}))
+
+    def inviter_of(self, guild_id, code):
+        """Davetin kayıtlı sahibini getirir"""
+        entry = self._guilds.get(guild_id, {}).get(code)
+        return entry[1] if entry else None
+
+    def uses_of(self, guild_id, code):
+        """Davetin bilinen kullanım sayısını getirir"""
+        entry = self._guilds.get(guild_id, {}).get(code)
+        return entry[0] if entry else None
+
+    def diff(self, guild_id, invites):
+        """
+        Güncel davet listesini anlık görüntüyle karşılaştırır.
+        Kullanım sayısı artan davetler için (invite, önceki_uses, inviter_id) listesi döner
+        ve anlık görüntü güncel sayılarla yenilenir. Bilinmeyen davetler kaydedilir
+        ama kullanılmış sayılmaz.
+        """
+        snapshot = self._guilds.setdefault(guild_id, {})
+        used = []
+        for invite in invites:
+            entry = snapshot.get(invite.code)
+            if entry is None:
+                snapshot[invite.code] = [invite.uses, None]
+                continue
+            if entry[0] < invite.uses:
+                used.append((invite, entry[0], entry[1]))
+                entry[0] = invite.uses
+        return used
+
+
+class JoinAttributionQueue:
+    """
+    Kısa bir pencere içinde katılan üyeleri toplar ve her grup için
+    tek bir davet sorgusuyla (guild.invites()) hepsini eşleştirir.
+    """
+
+    def __init__(self, cache, fetch_invites, window=1.0):
+        self.cache = cache
+        self.fetch_invites = fetch_invites
+        self.window = window
+        self._pending = {}
+        self._workers = {}
+        self.stats = {
+            'joins': 0,
+            'joins_batched': 0,
+            'fetches': 0,
+            'fetches_saved': 0,
+            'unattributed': 0,
+            'ambiguous_batches': 0
+        }
+
+    async def submit(self, guild, member):
+        """Üyeyi kuyruğa ekler; (invite, inviter_id) veya eşleşme yoksa None döner"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(guild.id, []).append((member, future))
+        self.stats['joins'] += 1
+
+        if guild.id not in self._workers:
+            self._workers[guild.id] = asyncio.ensure_future(self._worker(guild))
+
+        return await future
+
+    async def _worker(self, guild):
+        """Sunucu başına tek worker: gruplar sırayla işlenir, anlık görüntü geri gitmez"""
+        try:
+            while self._pending.get(guild.id):
+                await asyncio.sleep(self.window)
+                batch = self._pending.pop(guild.id, [])
+                await self._resolve(guild, batch)
+        finally:
+            self._workers.pop(guild.id, None)
+
+    async def _resolve(self, guild, batch):
+        try:
+            invites = await self.fetch_invites(guild)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.stats['fetches'] += 1
+        self.stats['fetches_saved'] += len(batch) - 1
+        if len(batch) > 1:
+            self.stats['joins_batched'] += len(batch)
+
+        # Her kullanım artışı bir katılım hakkıdır; üyeler katılım sırasıyla dağıtılır
+        used = self.cache.diff(guild.id, invites)
+        slots = []
+        for invite, previous_uses, inviter_id in used:
+            slots.extend([(invite, inviter_id)] * (invite.uses - previous_uses))
+
+        if len(used) > 1 and len(batch) > 1:
+            self.stats['ambiguous_batches'] += 1
+
+        for i, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if i < len(slots):
+                future.set_result(slots[i])
+            else:
+                self.stats['unattributed'] += 1
+                future.set_result(None)
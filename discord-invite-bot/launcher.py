@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Süreç başına shard başlatıcı.
+Shard'ları ardışık aralıklara bölerek her aralık için ayrı bir bot.py süreci
+başlatır; çöken süreçleri bekleme süresiyle yeniden başlatır. Her süreç
+yalnızca kendi shard'larındaki sunucuların önbelleklerini tutar ve sunucu
+başına davet dosyalarını (shards/guild_<id>.db) kullanır; bir sunucu tek
+bir shard'a ait olduğundan aynı davet dosyasına iki süreç yazmaz.
+Kullanım: python launcher.py --shards 8 --processes 2
+"""
+
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+SHARD_IDS_ENV = 'BOT_SHARD_IDS'
+SHARD_COUNT_ENV = 'BOT_SHARD_COUNT'
+
+
+def shard_for_guild(guild_id, shard_count):
+    """Discord'un sunucu -> shard eşlemesi"""
+    return (guild_id >> 22) % shard_count
+
+
+def split_shards(shard_count, processes):
+    """Shard'ları süreçlere ardışık ve dengeli aralıklar halinde böler"""
+    processes = max(1, min(processes, shard_count))
+    base, extra = divmod(shard_count, processes)
+    groups = []
+    start = 0
+    for i in range(processes):
+        size = base + (1 if i < extra else 0)
+        groups.append(list(range(start, start + size)))
+        start += size
+    return groups
+
+
+def shard_env(shard_ids, shard_count):
+    """Alt sürece verilecek shard ortam değişkenleri"""
+    return {SHARD_IDS_ENV: ','.join(map(str, shard_ids)), SHARD_COUNT_ENV: str(shard_count)}
+
+
+def shards_from_env(environ=None):
+    """Başlatıcının verdiği (shard_ids, shard_count); başlatıcı dışında (None, None)"""
+    environ = os.environ if environ is None else environ
+    if not environ.get(SHARD_IDS_ENV):
+        return None, None
+    shard_ids = [int(value) for value in environ[SHARD_IDS_ENV].split(',')]
+    return shard_ids, int(environ[SHARD_COUNT_ENV])
+
+
+class ShardLauncher:
+    """Shard gruplarını ayrı süreçlerde çalıştırır ve çökenleri yeniden başlatır"""
+
+    def __init__(self, command, shard_count, processes, cwd=None, env=None,
+                 restart_delay=5.0, max_restart_delay=300.0, max_restarts=10):
+        self.command = command
+        self.shard_count = shard_count
+        self.groups = split_shards(shard_count, processes)
+        self.cwd = cwd
+        self.env = env
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.max_restarts = max_restarts
+        # grup indeksi -> {'process', 'restarts', 'restart_at', 'done'}
+        self._workers = {}
+        self._stopping = False
+        self.stats = {'started': 0, 'restarts': 0, 'failed': 0}
+
+    def _spawn(self, index):
+        shard_ids = self.groups[index]
+        env = dict(os.environ if self.env is None else self.env)
+        env.update(shard_env(shard_ids, self.shard_count))
+        process = subprocess.Popen(self.command, cwd=self.cwd, env=env)
+        self.stats['started'] += 1
+        logger.info("🧩 Süreç başlatıldı: shard %s-%s / %s (pid %s)", shard_ids[0], shard_ids[-1], self.shard_count, process.pid)
+        return process
+
+    def start(self):
+        for index in range(len(self.groups)):
+            self._workers[index] = {'process': self._spawn(index), 'restarts': 0, 'restart_at': None, 'done': False}
+
+    def poll(self, now=None):
+        """Biten süreçleri işler; çalışan ya da yeniden başlatılacak süreç varsa True"""
+        now = time.monotonic() if now is None else now
+        active = False
+        for index, worker in self._workers.items():
+            if worker['done']:
+                continue
+            active = True
+            if worker['restart_at'] is not None:
+                if now >= worker['restart_at'] and not self._stopping:
+                    worker['process'] = self._spawn(index)
+                    worker['restart_at'] = None
+                continue
+
+            code = worker['process'].poll()
+            if code is None:
+                continue
+            shard_ids = self.groups[index]
+            if code == 0 or self._stopping:
+                worker['done'] = True
+                logger.info("✅ shard %s-%s süreci çıktı (kod %s)", shard_ids[0], shard_ids[-1], code)
+            elif worker['restarts'] >= self.max_restarts:
+                worker['done'] = True
+                self.stats['failed'] += 1
+                logger.error("❌ shard %s-%s %s yeniden başlatmadan sonra durduruldu (kod %s)", shard_ids[0], shard_ids[-1], worker['restarts'], code)
+            else:
+                # Art arda çökmelerde bekleme süresi katlanır
+                delay = min(self.restart_delay * 2 ** worker['restarts'], self.max_restart_delay)
+                worker['restarts'] += 1
+                worker['restart_at'] = now + delay
+                self.stats['restarts'] += 1
+                logger.warning("⚠️ shard %s-%s süreci çöktü (kod %s), %.1f sn sonra yeniden başlatılacak", shard_ids[0], shard_ids[-1], code, delay)
+        return active
+
+    def stop(self, timeout=30.0):
+        """Tüm süreçlere SIGTERM gönderir, süre dolarsa öldürür"""
+        self._stopping = True
+        processes = [worker['process'] for worker in self._workers.values() if worker['process'].poll() is None]
+        for process in processes:
+            process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            try:
+                process.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        for worker in self._workers.values():
+            worker['done'] = True
+
+    def run(self, poll_interval=1.0):
+        """Süreçleri başlatır ve hepsi bitene kadar izler; başarısız süreç sayısını döndürür"""
+        self.start()
+        try:
+            while self.poll():
+                time.sleep(poll_interval)
+        finally:
+            self.stop()
+        return self.stats['failed']
+
+
+def raise_keyboard_interrupt(signum, frame):
+    """SIGTERM'i Ctrl+C gibi ele alır (kapanış adımları çalışsın)"""
+    raise KeyboardInterrupt
+
+
+def main(argv=None):
+    from config import Config
+    from database import apply_pragmas
+    from migrations import init_schema
+    import sqlite3
+
+    parser = argparse.ArgumentParser(description="Bot'u süreç başına shard gruplarıyla çalıştırır")
+    parser.add_argument('--shards', type=int, default=Config.SHARDING['SHARD_COUNT'], help="Toplam shard sayısı")
+    parser.add_argument('--processes', type=int, default=Config.SHARDING['PROCESSES'], help="Süreç sayısı")
+    args = parser.parse_args(argv)
+    if not args.shards:
+        parser.error("--shards gerekli (ya da Config.SHARDING['SHARD_COUNT'])")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)s | launcher | %(message)s')
+
+    # Migration'lar süreçler başlamadan bir kez uygulanır (süreçler aynı anda şemayı değiştirmesin)
+    conn = sqlite3.connect(Config.DATABASE_NAME)
+    apply_pragmas(conn, Config.DATABASE_PRAGMAS)
+    init_schema(conn)
+    conn.close()
+
+    launcher = ShardLauncher([sys.executable, 'bot.py'], args.shards, args.processes, cwd=os.path.dirname(os.path.abspath(__file__)))
+    # run() çıkarken süreçleri durdurur
+    signal.signal(signal.SIGTERM, raise_keyboard_interrupt)
+    try:
+        return launcher.run()
+    except KeyboardInterrupt:
+        logger.info("🛑 Başlatıcı durduruluyor...")
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Davet sıralaması için artımlı güncellenen bellek içi yapı.
+Her başarılı davette tek kullanıcının sayısı değişir; ilk N listesi ve
+bir kullanıcının sırası tüm tabloyu taramadan hesaplanır.
+"""
+
+import heapq
+from bisect import bisect_left, insort
+
+
+class FenwickTree:
+    """Davet sayısı -> kullanıcı adedi için prefix toplam ağacı"""
+
+    def __init__(self, size=64):
+        self.tree = [0] * (size + 1)
+
+    @property
+    def size(self):
+        return len(self.tree) - 1
+
+    def _grow(self, index):
+        size = self.size
+        while size < index:
+            size *= 2
+        # Ağacı yeni boyutla yeniden kur
+        values = [self.point(i) for i in range(1, self.size + 1)]
+        self.tree = [0] * (size + 1)
+        for i, value in enumerate(values, 1):
+            if value:
+                self.add(i, value)
+
+    def add(self, index, delta):
+        if index > self.size:
+            self._grow(index)
+        while index <= self.size:
+            self.tree[index] += delta
+            index += index & -index
+
+    def prefix(self, index):
+        index = min(index, self.size)
+        total = 0
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+    def point(self, index):
+        return self.prefix(index) - self.prefix(index - 1)
+
+
+class Leaderboard:
+    """Kullanıcı başına davet sayıları; ilk N ve sıra sorguları O(log n)"""
+
+    def __init__(self):
+        self._counts = {}
+        self._buckets = {}
+        self._distinct = []
+        self._tree = FenwickTree()
+
+    def _remove(self, user_id, count):
+        bucket = self._buckets[count]
+        bucket.discard(user_id)
+        if not bucket:
+            del self._buckets[count]
+            del self._distinct[bisect_left(self._distinct, count)]
+        self._tree.add(count, -1)
+
+    def _insert(self, user_id, count):
+        bucket = self._buckets.get(count)
+        if bucket is None:
+            bucket = self._buckets[count] = set()
+            insort(self._distinct, count)
+        bucket.add(user_id)
+        self._tree.add(count, 1)
+
+    def increment(self, user_id, delta=1):
+        """Kullanıcının davet sayısını artırır, yeni sayıyı döndürür"""
+        old = self._counts.get(user_id, 0)
+        new = old + delta
+        if old > 0:
+            self._remove(user_id, old)
+        if new > 0:
+            self._counts[user_id] = new
+            self._insert(user_id, new)
+        else:
+            self._counts.pop(user_id, None)
+        return new
+
+    def load(self, rows):
+        """Sıralamayı (user_id, invite_count) kayıtlarıyla baştan kurar"""
+        self.clear()
+        for user_id, count in rows:
+            if count > 0:
+                self._counts[user_id] = count
+                self._insert(user_id, count)
+
+    def clear(self):
+        self._counts = {}
+        self._buckets = {}
+        self._distinct = []
+        self._tree = FenwickTree()
+
+    def count(self, user_id):
+        """Kullanıcının davet sayısı"""
+        return self._counts.get(user_id, 0)
+
+    def rank(self, user_id):
+        """Kullanıcının sırası (1'den başlar); daveti yoksa None"""
+        count = self._counts.get(user_id)
+        if not count:
+            return None
+        # Kendisinden fazla daveti olan kullanıcı sayısı + 1
+        return len(self._counts) - self._tree.prefix(count) + 1
+
+    def top(self, limit=10):
+        """En çok davet eden ilk N kullanıcı: [(user_id, count), ...]"""
+        result = []
+        for count in reversed(self._distinct):
+            remaining = limit - len(result)
+            if remaining <= 0:
+                break
+            for user_id in heapq.nsmallest(remaining, self._buckets[count]):
+                result.append((user_id, count))
+        return result
+
+    def __len__(self):
+        return len(self._counts)
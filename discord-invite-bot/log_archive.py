@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Dönen ve sıkıştırılan log arşivi.
+Aktif log dosyası (logs/bot.log) gece yarısına hizalı aralıklarla ya da boyut
+sınırını aşınca döndürülür. Döndürülen dosya arka plan thread'inde bağımsız
+gzip bloklarına sıkıştırılır ve yanına her bloğun ilk/son zaman damgasını
+tutan bir indeks (.idx) yazılır; zaman aralığıyla arama yalnızca aralığa düşen
+blokları açar. Saklama sınırlarını aşan en eski arşivler silinir.
+Kullanım: python log_archive.py "Ticket #12" --since "2025-08-20 10:00" --until "2025-08-20 12:00"
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from logging.handlers import BaseRotatingHandler
+
+logger = logging.getLogger(__name__)
+
+# Log satırı başındaki zaman damgası (setup_logging formatı); damgasız satırlar öncekinin zamanını alır
+TIMESTAMP_RE = re.compile(rb'^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)')
+ROTATED_TIME_FORMAT = '%Y%m%d-%H%M%S'
+TIME_START = '0000-01-01 00:00:00'
+TIME_END = '9999-12-31 23:59:59'
+
+
+def normalize_time(value, end=False):
+    """'2025-08-20', '2025-08-20 10:00' gibi değerleri karşılaştırılabilir tam zamana tamamlar"""
+    value = value.strip().replace('T', ' ')
+    if not re.fullmatch(r'\d{4}(-\d\d(-\d\d( \d\d(:\d\d(:\d\d)?)?)?)?)?', value):
+        raise ValueError(f"Geçersiz zaman: {value!r} (YYYY-AA-GG SS:DD:ss)")
+    return value + (TIME_END if end else TIME_START)[len(value):]
+
+
+def index_path(archive):
+    return archive + '.idx'
+
+
+def read_index(archive):
+    """Arşivin zaman indeksini okur (yoksa None)"""
+    try:
+        with open(index_path(archive), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_block(target, lines, first, last):
+    offset = target.tell()
+    data = gzip.compress(b''.join(lines), mtime=0)
+    target.write(data)
+    return [first or '', last or first or '', offset, len(data)]
+
+
+def compress_log(path, block_size=256 * 1024):
+    """
+    Log dosyasını zaman indeksli gzip bloklarına sıkıştırır ve kaynağı siler.
+    Bloklar art arda yazılmış gzip üyeleridir (zcat/gzip -d ile okunabilir).
+    Arşiv yolunu döndürür.
+    """
+    archive = path + '.gz'
+    blocks = []
+    lines = 0
+    last_seen = None
+    with open(path, 'rb') as source, open(archive + '.tmp', 'wb') as target:
+        chunk, chunk_size, chunk_first = [], 0, None
+        for line in source:
+            if not chunk:
+                # Blok damgasız devam satırlarıyla başlarsa önceki kaydın zamanını alır
+                chunk_first = last_seen
+            match = TIMESTAMP_RE.match(line)
+            if match:
+                last_seen = match.group(1).decode()
+                chunk_first = chunk_first or last_seen
+            chunk.append(line)
+            chunk_size += len(line)
+            lines += 1
+            if chunk_size >= block_size:
+                blocks.append(_write_block(target, chunk, chunk_first, last_seen))
+                chunk, chunk_size = [], 0
+        if chunk:
+            blocks.append(_write_block(target, chunk, chunk_first, last_seen))
+
+    index = {
+        'first': blocks[0][0] if blocks else '',
+        'last': blocks[-1][1] if blocks else '',
+        'lines': lines,
+        'blocks': blocks
+    }
+    # Sıra önemli: arşiv varsa indeksi de vardır; kaynak en son silinir (yarıda kalırsa yeniden sıkıştırılır)
+    with open(index_path(archive) + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(index_path(archive) + '.tmp', index_path(archive))
+    os.replace(archive + '.tmp', archive)
+    os.remove(path)
+    return archive
+
+
+class LogArchiver:
+    """Döndürülen log dosyalarını arka planda sıkıştırır ve saklama sınırlarını uygular"""
+
+    def __init__(self, directory, prefix, max_age_days=None, max_files=None, max_bytes=None, block_size=256 * 1024):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_age_days = max_age_days
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        # prefix-YYYYMMDD-HHMMSS[-n].log[.gz]
+        self._pattern = re.compile(re.escape(prefix) + r'-(\d{8}-\d{6})(?:-(\d+))?\.log(\.gz)?$')
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {'compressed': 0, 'bytes_in': 0, 'bytes_out': 0, 'deleted': 0, 'failed': 0}
+
+    def rotated_path(self, when):
+        """Döndürülen dosyanın adı (aynı saniyede birden fazla döndürmede sıra eki alır)"""
+        stamp = datetime.fromtimestamp(when).strftime(ROTATED_TIME_FORMAT)
+        # Sıra eki mevcutların en büyüğünden devam eder (silinen eski arşivin adı yeniden kullanılmaz)
+        counters = [counter for existing, counter, _ in self._files(True) + self._files(False) if existing == stamp]
+        if not counters:
+            return os.path.join(self.directory, f"{self.prefix}-{stamp}.log")
+        return os.path.join(self.directory, f"{self.prefix}-{stamp}-{max(counters) + 1}.log")
+
+    def adopt(self, path, when):
+        """Eski adlandırmadaki bir log dosyasını arşive katar (start() ile sıkıştırılır)"""
+        os.replace(path, self.rotated_path(when))
+
+    def _files(self, compressed):
+        # (zaman, sıra, yol) eskiden yeniye
+        files = []
+        for name in os.listdir(self.directory):
+            match = self._pattern.match(name)
+            if match and bool(match.group(3)) == compressed:
+                files.append((match.group(1), int(match.group(2) or 0), os.path.join(self.directory, name)))
+        return sorted(files)
+
+    def start(self):
+        """Arka plan thread'ini başlatır; yarıda kalmış sıkıştırmaları yeniden kuyruğa ekler"""
+        os.makedirs(self.directory, exist_ok=True)
+        for name in os.listdir(self.directory):
+            if name.startswith(f"{self.prefix}-") and name.endswith('.tmp'):
+                os.remove(os.path.join(self.directory, name))
+        for _, _, path in self._files(compressed=False):
+            self._queue.put(path)
+        self._thread = threading.Thread(target=self._run, name='log-archiver', daemon=True)
+        self._thread.start()
+
+    def submit(self, path):
+        self._queue.put(path)
+
+    def stop(self):
+        """Kuyruktaki dosyaları sıkıştırır ve thread'i durdurur"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        # Sınırlar değişmiş olabilir; açılışta da uygulanır
+        self.apply_retention()
+        while True:
+            path = self._queue.get()
+            if path is None:
+                break
+            self.process(path)
+
+    def process(self, path):
+        """Tek dosyayı sıkıştırır ve saklama sınırlarını uygular"""
+        with self._lock:
+            if not os.path.exists(path):
+                return
+            try:
+                size = os.path.getsize(path)
+                archive = compress_log(path, self.block_size)
+                self.stats['compressed'] += 1
+                self.stats['bytes_in'] += size
+                self.stats['bytes_out'] += os.path.getsize(archive)
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error("❌ Log arşivlenemedi (%s): %s", path, e)
+                return
+            self._apply_retention()
+
+    def _apply_retention(self, now=None):
+        now = time.time() if now is None else now
+        archives = [
+            (stamp, path, os.path.getsize(path))
+            for stamp, _, path in self._files(compressed=True)
+        ]
+        total = sum(size for _, _, size in archives)
+        cutoff = now - self.max_age_days * 86400 if self.max_age_days else None
+        # En eskiden başlayarak sınırlar sağlanana kadar silinir
+        for position, (stamp, path, size) in enumerate(archives):
+            expired = cutoff is not None and datetime.strptime(stamp, ROTATED_TIME_FORMAT).timestamp() < cutoff
+            too_many = self.max_files is not None and len(archives) - position > self.max_files
+            too_large = self.max_bytes is not None and total > self.max_bytes
+            if not (expired or too_many or too_large):
+                break
+            for target in (path, index_path(path)):
+                if os.path.exists(target):
+                    os.remove(target)
+            total -= size
+            self.stats['deleted'] += 1
+
+    def apply_retention(self, now=None):
+        with self._lock:
+            self._apply_retention(now)
+
+    def purge(self):
+        """Tüm arşivleri ve sıkıştırılmayı bekleyen dosyaları siler (/reset), silinen dosya sayısını döndürür"""
+        removed = 0
+        with self._lock:
+            for compressed in (True, False):
+                for _, _, path in self._files(compressed):
+                    for target in (path, index_path(path)):
+                        if os.path.exists(target):
+                            os.remove(target)
+                            removed += 1
+        return removed
+
+
+class ArchivingFileHandler(BaseRotatingHandler):
+    """Zaman ve boyut sınırıyla dönen, döndürülen dosyaları arşivleyiciye veren log handler'ı"""
+
+    def __init__(self, filename, archiver, interval=86400, max_bytes=0, encoding='utf-8'):
+        super().__init__(filename, 'a', encoding=encoding)
+        self.archiver = archiver
+        self.interval = interval
+        self.max_bytes = max_bytes
+        # Önceki süreçten kalan dosya kendi aralığı bitmişse ilk kayıtta döndürülür
+        started = os.path.getmtime(self.baseFilename) if os.path.getsize(self.baseFilename) else time.time()
+        self.rollover_at = self.next_rollover(started)
+        self.stats = {'rollovers': 0}
+
+    def next_rollover(self, now):
+        """Sonraki döndürme zamanı; aralık yerel gece yarısına hizalanır (86400 = her gece, 3600 = saat başı)"""
+        if not self.interval:
+            return float('inf')
+        midnight = datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+        return midnight + ((now - midnight) // self.interval + 1) * self.interval
+
+    def shouldRollover(self, record):
+        # Kayıt biçimlendirilmeden kontrol edilir; dosya sınırı en fazla bir kayıt kadar aşar
+        if record.created >= self.rollover_at:
+            return True
+        return bool(self.max_bytes) and self.stream is not None and self.stream.tell() >= self.max_bytes
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        now = time.time()
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename):
+            rotated = self.archiver.rotated_path(now)
+            os.replace(self.baseFilename, rotated)
+            self.archiver.submit(rotated)
+            self.stats['rollovers'] += 1
+        self.rollover_at = self.next_rollover(now)
+        self.stream = self._open()
+
+    def discard(self):
+        """Aktif log dosyasını siler ve boş olarak yeniden açar (/reset)"""
+        self.acquire()
+        try:
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+            if os.path.exists(self.baseFilename):
+                os.remove(self.baseFilename)
+            self.stream = self._open()
+        finally:
+            self.release()
+
+    def close(self):
+        super().close()
+        self.archiver.stop()
+
+
+def _block_lines(data, current):
+    # (zaman, satır); damgasız satırlar önceki satırın zamanını alır
+    for raw in data.splitlines():
+        match = TIMESTAMP_RE.match(raw)
+        if match:
+            current = match.group(1).decode()
+        yield current or '', raw.decode('utf-8', errors='replace')
+
+
+def search_logs(directory, pattern, since=None, until=None, ignore_case=False, stats=None):
+    """
+    Arşivlerde ve aktif log dosyalarında zaman aralığındaki eşleşen satırları
+    (dosya adı, satır) olarak eskiden yeniye döndürür. Arşivlerde yalnızca
+    indeksine göre aralığa düşen bloklar açılır.
+    """
+    regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    since = normalize_time(since) if since else TIME_START
+    until = normalize_time(until, end=True) if until else TIME_END
+    stats = {} if stats is None else stats
+    stats.setdefault('blocks_read', 0)
+    stats.setdefault('blocks_skipped', 0)
+
+    sources = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith('.log.gz'):
+            index = read_index(path)
+            if index is None:
+                # İndekssiz arşiv tek blok olarak okunur
+                sources.append((TIME_START, TIME_END, name, path, None))
+            else:
+                sources.append((index['first'], index['last'], name, path, index['blocks']))
+        elif name.endswith('.log'):
+            # Aktif dosyalar en yeni kayıtları tutar
+            sources.append((TIME_END, TIME_END, name, path, None))
+
+    for first, last, name, path, blocks in sorted(sources):
+        if blocks is not None and (last < since or first > until):
+            stats['blocks_skipped'] += len(blocks)
+            continue
+        if blocks is None:
+            opener = gzip.open if name.endswith('.gz') else open
+            with opener(path, 'rb') as f:
+                chunks = [(None, f.read())]
+            stats['blocks_read'] += 1
+        else:
+            chunks = []
+            with open(path, 'rb') as f:
+                for block_first, block_last, offset, length in blocks:
+                    if block_last < since or block_first > until:
+                        stats['blocks_skipped'] += 1
+                        continue
+                    f.seek(offset)
+                    chunks.append((block_first, gzip.decompress(f.read(length))))
+                    stats['blocks_read'] += 1
+        for block_first, data in chunks:
+            for stamp, line in _block_lines(data, block_first):
+                if since <= stamp <= until and regex.search(line):
+                    yield name, line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Log arşivlerinde zaman aralığına göre arama yapar")
+    parser.add_argument('pattern', help="Aranacak düzenli ifade")
+    parser.add_argument('--since', help="Başlangıç (YYYY-AA-GG [SS:DD[:ss]])")
+    parser.add_argument('--until', help="Bitiş (YYYY-AA-GG [SS:DD[:ss]])")
+    parser.add_argument('--dir', default='logs', help="Log klasörü")
+    parser.add_argument('-i', '--ignore-case', action='store_true', help="Büyük/küçük harf duyarsız")
+    args = parser.parse_args(argv)
+
+    try:
+        found = 0
+        for name, line in search_logs(args.dir, args.pattern, args.since, args.until, args.ignore_case):
+            print(f"{name}:{line}")
+            found += 1
+    except (ValueError, re.error) as e:
+        parser.error(str(e))
+    # grep gibi: eşleşme yoksa 1
+    return 0 if found else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
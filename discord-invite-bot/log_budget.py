@@ -0,0 +1,182 @@
+"""
+Log bütçesi.
+Sık çalışan çağrı yerlerinin INFO kayıtları örneklenir, aynı şablondaki tekrar
+eden INFO/WARNING kayıtları zaman penceresi başına sınırlanır ve bastırılanlar
+tek bir "N benzer kayıt bastırıldı" özetiyle bildirilir. WARNING ve üstü
+örneklenmez, ERROR ve üstü hiç bastırılmaz (tekrarlayan hata anında görünür);
+bir hata yazıldığında aynı sunucuda örneklemeyle atlanan son kayıtlar hatanın
+önüne eklenir. DEBUG kayıtları yalnızca trace modu açık sunucular için yazılır.
+Filtre, kuyruk handler'ına eklenir ve mesaj biçimlendirilmeden önce çalışır.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+
+# Yazılan kayıtların ait olduğu sunucu; olay işleyicisinin task'ı boyunca geçerlidir
+log_guild = contextvars.ContextVar('log_guild', default=None)
+
+
+def set_log_guild(guild_id):
+    """Bu task'ta yazılan kayıtları sunucuya bağlar (trace modu ve hata bağlamı için)"""
+    log_guild.set(guild_id)
+
+
+class LogBudget(logging.Filter):
+    """Örnekleme, tekrar sınırı ve sunucu bazlı trace modu uygulayan log filtresi"""
+
+    def __init__(self, sampling=None, window=60.0, burst=20, error_context=50,
+                 sink=None, trace_loggers=(), clock=time.monotonic):
+        super().__init__()
+        # 'modül.fonksiyon' -> tutulma oranı (0.1 = her 10 kayıttan biri, 0 = hiçbiri)
+        self.sampling = dict(sampling or {})
+        self.window = window
+        self.burst = burst
+        # Özet ve hata bağlamı kayıtlarının gönderileceği yer (kuyruk handler'ının handle'ı)
+        self.sink = sink
+        self.trace_loggers = list(trace_loggers)
+        self.clock = clock
+        # (dosya, satır) -> [her_kaçta_bir, sayaç]
+        self._sites = {}
+        # (logger, seviye, şablon) -> [pencere_başı, kayıt, bastırılan]
+        self._repeats = {}
+        # Örneklemeyle atlanan son kayıtlar: (sunucu, kayıt)
+        self._context = deque(maxlen=error_context)
+        # sunucu -> trace bitiş zamanı (None = süresiz)
+        self._traced = {}
+        self._levels = {}
+        self._lock = threading.Lock()
+        self._next_sweep = clock() + window
+        self.stats = {'passed': 0, 'sampled': 0, 'suppressed': 0, 'summaries': 0, 'context': 0, 'traced': 0}
+
+    def enable_trace(self, guild_id, duration=None):
+        """Sunucunun DEBUG kayıtlarını açar (duration saniye sonra kendiliğinden kapanır)"""
+        with self._lock:
+            self._traced[guild_id] = None if duration is None else self.clock() + duration
+            self._update_levels()
+
+    def disable_trace(self, guild_id):
+        with self._lock:
+            self._traced.pop(guild_id, None)
+            self._update_levels()
+
+    def traced(self, guild_id):
+        """Sunucuda trace modu açık mı"""
+        expires = self._traced.get(guild_id, False)
+        if expires is False:
+            return False
+        if expires is not None and self.clock() >= expires:
+            self.disable_trace(guild_id)
+            return False
+        return True
+
+    def _update_levels(self):
+        # Trace açıkken logger'lar DEBUG kayıt üretir; diğer sunucuların kayıtları filtrede atılır
+        for target in self.trace_loggers:
+            if self._traced:
+                self._levels.setdefault(target, target.level)
+                target.setLevel(logging.DEBUG)
+            elif target in self._levels:
+                target.setLevel(self._levels.pop(target))
+
+    def filter(self, record):
+        if getattr(record, 'budget_exempt', False):
+            return True
+        guild_id = getattr(record, 'guild_id', None)
+        if guild_id is None:
+            guild_id = record.guild_id = log_guild.get()
+
+        # Trace açık sunucunun kayıtları bütçeye takılmaz
+        if guild_id is not None and self.traced(guild_id):
+            self.stats['traced'] += 1
+            return True
+        if record.levelno < logging.INFO:
+            return False
+
+        with self._lock:
+            now = self.clock()
+            extra = self._sweep(now) if now >= self._next_sweep else []
+            keep = self._admit(record, guild_id, now, extra)
+            if keep and record.levelno >= logging.ERROR:
+                extra.extend(self._take_context(guild_id))
+        for item in extra:
+            self.sink(item)
+        return keep
+
+    def _admit(self, record, guild_id, now, extra):
+        if record.levelno < logging.WARNING:
+            site = self._sites.get((record.pathname, record.lineno))
+            if site is None:
+                rate = self.sampling.get(f"{record.module}.{record.funcName}", 1.0)
+                site = self._sites[(record.pathname, record.lineno)] = [round(1 / rate) if rate > 0 else 0, 0]
+            every, count = site
+            if every != 1:
+                site[1] = count + 1
+                if every == 0 or count % every:
+                    self.stats['sampled'] += 1
+                    self._context.append((guild_id, record))
+                    return False
+
+        # Hatalar tekrar sınırına takılmaz
+        if record.levelno >= logging.ERROR:
+            self.stats['passed'] += 1
+            return True
+
+        template = record.msg if isinstance(record.msg, str) else str(record.msg)
+        key = (record.name, record.levelno, template)
+        entry = self._repeats.get(key)
+        if entry is None or now - entry[0] >= self.window:
+            if entry is not None and entry[2]:
+                extra.append(self._summary(key, entry, now))
+            self._repeats[key] = [now, 1, 0]
+        else:
+            entry[1] += 1
+            if entry[1] > self.burst:
+                entry[2] += 1
+                self.stats['suppressed'] += 1
+                return False
+        self.stats['passed'] += 1
+        return True
+
+    def _take_context(self, guild_id):
+        # Hatadan önce aynı sunucuda atlanan kayıtlar sırasıyla yazılır
+        matched = [record for owner, record in self._context if owner == guild_id]
+        if matched:
+            self._context = deque(((owner, record) for owner, record in self._context if owner != guild_id),
+                                  maxlen=self._context.maxlen)
+            for record in matched:
+                record.budget_exempt = True
+            self.stats['context'] += len(matched)
+        return matched
+
+    def _sweep(self, now, force=False):
+        # Penceresi biten tekrar kayıtlarını temizler, bastırılanlar için özet üretir
+        self._next_sweep = now + self.window
+        summaries = []
+        for key, entry in list(self._repeats.items()):
+            if force or now - entry[0] >= self.window:
+                if entry[2]:
+                    summaries.append(self._summary(key, entry, now))
+                del self._repeats[key]
+        return summaries
+
+    def _summary(self, key, entry, now):
+        name, level, template = key
+        self.stats['summaries'] += 1
+        record = logging.LogRecord(
+            name, level, __file__, 0,
+            "🔇 Son %.0f sn içinde %d benzer kayıt bastırıldı: %s",
+            (now - entry[0], entry[2], str(template)[:120]), None
+        )
+        record.budget_exempt = True
+        return record
+
+    def flush(self):
+        """Bekleyen tüm bastırma özetlerini yazar (kapanışta çağrılır)"""
+        with self._lock:
+            summaries = self._sweep(self.clock(), force=True)
+        for record in summaries:
+            self.sink(record)
+        return len(summaries)
@@ -0,0 +1,129 @@
+"""
+Ticket mesaj loglarını log kanalına toplu gönderen kuyruk.
+Her log kanalı için mesajlar kısa bir pencerede biriktirilir, çok alanlı
+sayfalar halinde gönderilir ve kanal başına hız sınırına uyulur. Kuyruk
+dolarsa en eski kayıtlar atılır ve sayılır.
+"""
+
+import asyncio
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+def _shorten(text, limit):
+    """Metni sonuna '...' ekleyerek limit karaktere sığdırır"""
+    return text if len(text) <= limit else text[:limit - 3] + '...'
+
+
+class RateLimiter:
+    """Token bucket: `per` saniyede en çok `rate` istek"""
+
+    def __init__(self, rate, per):
+        self.rate = rate
+        self.per = per
+        self.tokens = rate
+        self.updated = None
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            if self.updated is not None:
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) * self.per / self.rate)
+
+
+class LogForwarder:
+    """
+    Log kanalı başına kuyruk + worker.
+    send_page(channel_id, fields, dropped) her sayfa için bir kez çağrılır;
+    fields [(name, value), ...] listesidir, dropped ise bu sayfadan önce
+    kuyruk dolduğu için atılan kayıt sayısıdır. Alan adı ve değeri Discord'un
+    embed alanı sınırlarına (256 / 1024 karakter) kısaltılır; sınırı aşan tek
+    bir alan bütün sayfanın reddedilmesine yol açar.
+    """
+
+    def __init__(self, send_page, window=2.0, max_fields=25, max_chars=5500, max_queue=500, rate=5, per=5.0,
+                 max_name=256, max_value=1024):
+        self.send_page = send_page
+        self.window = window
+        self.max_fields = max_fields
+        self.max_chars = max_chars
+        self.max_name = max_name
+        self.max_value = max_value
+        self.max_queue = max_queue
+        self.rate = rate
+        self.per = per
+        self._queues = {}
+        self._dropped = {}
+        self._limiters = {}
+        self._workers = {}
+        self.stats = {'queued': 0, 'sent': 0, 'sends': 0, 'dropped': 0, 'failed': 0}
+
+    def submit(self, channel_id, name, value):
+        """Kaydı kanalın kuyruğuna ekler (beklemeden döner)"""
+        queue = self._queues.setdefault(channel_id, deque())
+        if len(queue) >= self.max_queue:
+            # Geri basınç: en eski kaydı at
+            queue.popleft()
+            self._dropped[channel_id] = self._dropped.get(channel_id, 0) + 1
+            self.stats['dropped'] += 1
+        queue.append((_shorten(name, self.max_name), _shorten(value, self.max_value)))
+        self.stats['queued'] += 1
+
+        if channel_id not in self._workers:
+            self._workers[channel_id] = asyncio.ensure_future(self._worker(channel_id))
+
+    def _take_page(self, queue):
+        """Kuyruktan alan sayısı ve karakter sınırına sığan kadar kaydı alır"""
+        page = []
+        chars = 0
+        while queue and len(page) < self.max_fields:
+            name, value = queue[0]
+            size = len(name) + len(value)
+            if page and chars + size > self.max_chars:
+                break
+            page.append(queue.popleft())
+            chars += size
+        return page
+
+    async def _worker(self, channel_id):
+        limiter = self._limiters.get(channel_id)
+        if limiter is None:
+            limiter = self._limiters[channel_id] = RateLimiter(self.rate, self.per)
+        try:
+            while self._queues.get(channel_id):
+                await asyncio.sleep(self.window)
+                queue = self._queues[channel_id]
+                while queue:
+                    # Hız sınırı beklenirken gelen kayıtlar da bir sonraki sayfaya girer
+                    await limiter.acquire()
+                    page = self._take_page(queue)
+                    dropped = self._dropped.pop(channel_id, 0)
+                    try:
+                        await self.send_page(channel_id, page, dropped)
+                    except Exception as e:
+                        self.stats['failed'] += len(page)
+                        logger.warning("Log kanalı %s için %s kayıt gönderilemedi: %s", channel_id, len(page), e)
+                    else:
+                        self.stats['sends'] += 1
+                        self.stats['sent'] += len(page)
+        finally:
+            self._workers.pop(channel_id, None)
+            if not self._queues.get(channel_id):
+                self._queues.pop(channel_id, None)
+
+    def pending(self):
+        """Kuyruklarda bekleyen toplam kayıt sayısı"""
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def flush(self):
+        """Tüm kuyruklar boşalana kadar bekler"""
+        while self._workers:
+            await asyncio.gather(*list(self._workers.values()), return_exceptions=True)
@@ -0,0 +1,84 @@
+"""
+Engellemeyen log hattı.
+Log çağrıları event loop thread'inde yalnızca kaydı sınırlı bir kuyruğa koyar;
+mesajın biçimlendirilmesi ve dosyaya/konsola yazılması arka plandaki
+QueueListener thread'inde yapılır. Kuyruk doluysa kayıt beklemeden atılır,
+atılan kayıtlar sayılır ve kuyruk boşalınca tek bir uyarıyla bildirilir.
+"""
+
+import logging
+import queue
+from collections import defaultdict
+from logging.handlers import QueueHandler, QueueListener
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Kayıtları sınırlı kuyruğa koyar; kuyruk doluysa bekleme yerine atar ve sayar"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.stats = {'queued': 0, 'dropped': 0}
+        self.dropped_by_level = defaultdict(int)
+        # Henüz uyarısı yazılmamış atılan kayıt sayısı
+        self._unreported = 0
+
+    def prepare(self, record):
+        # Biçimlendirme (msg % args, istisna metni) dinleyici thread'ine bırakılır
+        return record
+
+    def enqueue(self, record):
+        # emit() handler kilidi altında çağrılır; sayaçlar thread'ler arasında tutarlı kalır
+        try:
+            if self._unreported:
+                self.queue.put_nowait(self._drop_record(record.created))
+                self._unreported = 0
+            self.queue.put_nowait(record)
+            self.stats['queued'] += 1
+        except queue.Full:
+            self.stats['dropped'] += 1
+            self.dropped_by_level[record.levelname] += 1
+            self._unreported += 1
+
+    def _drop_record(self, created):
+        record = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            "⚠️ Log kuyruğu doldu, %d kayıt atıldı", (self._unreported,), None
+        )
+        record.created = created
+        return record
+
+
+class LogPipeline:
+    """Kuyruk, kuyruğa yazan handler ve arka plan yazıcı thread'ini birlikte yönetir"""
+
+    def __init__(self, handlers, max_queue=10000):
+        self.handlers = list(handlers)
+        self.queue = queue.Queue(max_queue)
+        self.handler = DroppingQueueHandler(self.queue)
+        self.listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self._loggers = []
+        self.running = False
+
+    def start(self, *loggers):
+        """Yazıcı thread'ini başlatır ve handler'ı verilen logger'lara (varsayılan: root) ekler"""
+        self.listener.start()
+        self.running = True
+        for target in loggers or (logging.getLogger(),):
+            target.addHandler(self.handler)
+            self._loggers.append(target)
+
+    def stop(self):
+        """Handler'ı çıkarır, kuyrukta kalanları yazar ve dosyaları kapatır"""
+        for target in self._loggers:
+            target.removeHandler(self.handler)
+        self._loggers.clear()
+        if self.running:
+            self.listener.stop()
+            self.running = False
+        for handler in self.handlers:
+            handler.flush()
+            handler.close()
+
+    @property
+    def stats(self):
+        return {**self.handler.stats, 'pending': self.queue.qsize(), 'max_queue': self.queue.maxsize}
@@ -0,0 +1,286 @@
+"""
+Veritabanı şema migration'ları.
+Her adım bir kez, sırayla ve kendi transaction'ı içinde uygulanır;
+uygulanan sürümler schema_version tablosunda tutulur.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Temel tablolar (migration'lardan önce oluşturulur)
+BASE_SCHEMA = [
+    # Davet kodları tablosu - UNIQUE(user_id) kısıtlaması kaldırıldı
+    '''
+    CREATE TABLE IF NOT EXISTS invite_codes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        code TEXT UNIQUE NOT NULL,
+        user_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        uses INTEGER DEFAULT 0
+    )
+    ''',
+    # Davet edilen kullanıcılar tablosu
+    '''
+    CREATE TABLE IF NOT EXISTS invited_users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        inviter_id INTEGER NOT NULL,
+        invited_user_id INTEGER NOT NULL,
+        invited_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        invite_code TEXT,
+        UNIQUE(invited_user_id)
+    )
+    ''',
+    # Şüpheli davet tespiti için tablo
+    '''
+    CREATE TABLE IF NOT EXISTS suspicious_invites (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        inviter_id INTEGER NOT NULL,
+        invite_count INTEGER DEFAULT 1,
+        first_invite_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_invite_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    # Bot koruması için tablo
+    '''
+    CREATE TABLE IF NOT EXISTS bot_protection (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        is_bot BOOLEAN DEFAULT FALSE,
+        detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    # Ticket sistemi tabloları
+    '''
+    CREATE TABLE IF NOT EXISTS ticket_config (
+        guild_id INTEGER PRIMARY KEY,
+        category_id INTEGER,
+        support_role_id INTEGER,
+        ticket_counter INTEGER DEFAULT 1,
+        daily_limit INTEGER DEFAULT 3,
+        log_channel_id INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS tickets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guild_id INTEGER NOT NULL,
+        ticket_number INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        channel_id INTEGER NOT NULL,
+        category_id TEXT NOT NULL,
+        category_name TEXT NOT NULL,
+        status TEXT DEFAULT 'open',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        closed_at TIMESTAMP,
+        closed_by INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS user_daily_tickets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        count INTEGER DEFAULT 0,
+        UNIQUE(guild_id, user_id, date)
+    )
+    ''',
+]
+
+# (sürüm, açıklama, adımlar) - adımlar SQL metni ya da cursor alan fonksiyon olabilir
+MIGRATIONS = [
+    (1, "Sık kullanılan sorgular için indeksler", [
+        # /stats, /invite: WHERE user_id = ?
+        'CREATE INDEX IF NOT EXISTS idx_invite_codes_user ON invite_codes (user_id, code, uses)',
+        # is_suspicious_inviter, /leaderboard: WHERE inviter_id = ? AND invited_at >= ?
+        'CREATE INDEX IF NOT EXISTS idx_invited_users_inviter ON invited_users (inviter_id, invited_at)',
+        # on_message, /close: WHERE channel_id = ? AND status = 'open'
+        'CREATE INDEX IF NOT EXISTS idx_tickets_channel_status ON tickets (channel_id, status)',
+        # /ticket-stats, /ticket-list: WHERE guild_id = ? AND status = ?
+        'CREATE INDEX IF NOT EXISTS idx_tickets_guild_status ON tickets (guild_id, status)',
+        # get_user_active_ticket: WHERE guild_id = ? AND user_id = ? AND status = 'open'
+        'CREATE INDEX IF NOT EXISTS idx_tickets_guild_user_status ON tickets (guild_id, user_id, status)',
+        # log_suspicious_activity: WHERE inviter_id = ?
+        'CREATE INDEX IF NOT EXISTS idx_suspicious_invites_inviter ON suspicious_invites (inviter_id)',
+        # is_bot_user: WHERE user_id = ?
+        'CREATE INDEX IF NOT EXISTS idx_bot_protection_user ON bot_protection (user_id)',
+    ]),
+    (2, "Davet eden başına toplam davet tablosu (sıralama için)", [
+        '''
+        CREATE TABLE IF NOT EXISTS inviter_totals (
+            inviter_id INTEGER PRIMARY KEY,
+            invite_count INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        # Mevcut davetlerden doldur
+        '''
+        INSERT OR REPLACE INTO inviter_totals (inviter_id, invite_count)
+        SELECT inviter_id, COUNT(*) FROM invited_users GROUP BY inviter_id
+        ''',
+    ]),
+    (3, "Ticket panel mesajları tablosu", [
+        '''
+        CREATE TABLE IF NOT EXISTS ticket_panels (
+            message_id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_ticket_panels_guild ON ticket_panels (guild_id)',
+    ]),
+    (4, "Ticket transkriptleri tablosu", [
+        '''
+        CREATE TABLE IF NOT EXISTS ticket_transcripts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticket_id INTEGER UNIQUE NOT NULL,
+            guild_id INTEGER NOT NULL,
+            ticket_number INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            path TEXT NOT NULL,
+            message_count INTEGER NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_ticket_transcripts_guild ON ticket_transcripts (guild_id, ticket_number)',
+    ]),
+    (5, "Şüpheli davet ve bot kayıtları kullanıcı başına tek satır (UPSERT için)", [
+        # INSERT OR REPLACE benzersiz anahtar olmadığından her seferinde yeni satır ekliyordu;
+        # her satır bir şüpheli aktivite olduğundan satır sayısı toplam sayıdır
+        '''
+        CREATE TABLE suspicious_invites_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            inviter_id INTEGER UNIQUE NOT NULL,
+            invite_count INTEGER DEFAULT 1,
+            first_invite_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_invite_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        INSERT INTO suspicious_invites_new (inviter_id, invite_count, first_invite_at, last_invite_at)
+        SELECT inviter_id, COUNT(*), MIN(first_invite_at), MAX(last_invite_at)
+        FROM suspicious_invites GROUP BY inviter_id
+        ''',
+        'DROP TABLE suspicious_invites',
+        'ALTER TABLE suspicious_invites_new RENAME TO suspicious_invites',
+        '''
+        CREATE TABLE bot_protection_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER UNIQUE NOT NULL,
+            is_bot BOOLEAN DEFAULT FALSE,
+            detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        INSERT INTO bot_protection_new (user_id, is_bot, detected_at)
+        SELECT user_id, MAX(is_bot), MIN(detected_at) FROM bot_protection GROUP BY user_id
+        ''',
+        'DROP TABLE bot_protection',
+        'ALTER TABLE bot_protection_new RENAME TO bot_protection',
+    ]),
+    (6, "Davet verileri sunucu bazlı (guild_id ile bölümlenmiş anahtarlar)", [
+        # Mevcut kayıtların sunucusu bilinmiyor: guild_id = 0 (eski kayıt) olarak taşınır,
+        # bot açılışında davet kodlarından ya da üyelikten sunucusu bulunarak sahiplenilir (claim_legacy_invites)
+        'ALTER TABLE invite_codes ADD COLUMN guild_id INTEGER NOT NULL DEFAULT 0',
+        'DROP INDEX IF EXISTS idx_invite_codes_user',
+        # /invite, /stats: WHERE guild_id = ? AND user_id = ?
+        'CREATE INDEX IF NOT EXISTS idx_invite_codes_guild_user ON invite_codes (guild_id, user_id, code, uses)',
+        # /adminstats, anlık görüntü: WHERE guild_id = ? ORDER BY uses DESC
+        'CREATE INDEX IF NOT EXISTS idx_invite_codes_guild_uses ON invite_codes (guild_id, uses, created_at)',
+        # UNIQUE(invited_user_id) -> UNIQUE(guild_id, invited_user_id): aynı kişi farklı sunuculara davet edilebilir
+        '''
+        CREATE TABLE invited_users_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL DEFAULT 0,
+            inviter_id INTEGER NOT NULL,
+            invited_user_id INTEGER NOT NULL,
+            invited_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            invite_code TEXT,
+            UNIQUE(guild_id, invited_user_id)
+        )
+        ''',
+        '''
+        INSERT INTO invited_users_new (id, guild_id, inviter_id, invited_user_id, invited_at, invite_code)
+        SELECT id, 0, inviter_id, invited_user_id, invited_at, invite_code
+        FROM invited_users
+        ''',
+        'DROP TABLE invited_users',
+        'ALTER TABLE invited_users_new RENAME TO invited_users',
+        # Hız sayaçlarının yüklenmesi: WHERE guild_id = ? AND invited_at >= ?
+        'CREATE INDEX IF NOT EXISTS idx_invited_users_guild_time ON invited_users (guild_id, invited_at)',
+        'CREATE INDEX IF NOT EXISTS idx_invited_users_inviter ON invited_users (inviter_id, invited_at)',
+        '''
+        CREATE TABLE inviter_totals_new (
+            guild_id INTEGER NOT NULL DEFAULT 0,
+            inviter_id INTEGER NOT NULL,
+            invite_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, inviter_id)
+        )
+        ''',
+        '''
+        INSERT INTO inviter_totals_new (guild_id, inviter_id, invite_count)
+        SELECT guild_id, inviter_id, COUNT(*) FROM invited_users GROUP BY guild_id, inviter_id
+        ''',
+        'DROP TABLE inviter_totals',
+        'ALTER TABLE inviter_totals_new RENAME TO inviter_totals',
+    ]),
+]
+
+
+def get_schema_version(conn):
+    """Uygulanmış en yüksek migration sürümünü getirir"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+
+def run_migrations(conn, migrations=MIGRATIONS):
+    """Bekleyen migration'ları sırayla uygular, son sürümü döndürür"""
+    previous_isolation = conn.isolation_level
+    # Transaction'ları elle yönet (DDL dahil her adım atomik olsun)
+    conn.isolation_level = None
+    try:
+        current = get_schema_version(conn)
+        for version, description, steps in sorted(migrations, key=lambda m: m[0]):
+            if version <= current:
+                continue
+
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                for step in steps:
+                    if callable(step):
+                        step(cursor)
+                    else:
+                        cursor.execute(step)
+                cursor.execute(
+                    'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                    (version, description)
+                )
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                logger.error("Migration %s başarısız: %s", version, description)
+                raise
+
+            logger.info("Migration %s uygulandı: %s", version, description)
+            current = version
+        return current
+    finally:
+        conn.isolation_level = previous_isolation
+
+
+def init_schema(conn):
+    """Temel tabloları oluşturur ve bekleyen migration'ları uygular"""
+    cursor = conn.cursor()
+    for statement in BASE_SCHEMA:
+        cursor.execute(statement)
+    conn.commit()
+    return run_migrations(conn)
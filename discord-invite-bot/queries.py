@@ -0,0 +1,195 @@
+"""
+İsimlendirilmiş SQL ifadeleri ve sorgu süre istatistikleri.
+Handler'lar SQL metni yerine ifade adını kullanır; aynı metin tekrar
+kullanıldığından sqlite3'ün bağlantı başına ifade önbelleği her sorguyu
+yeniden ayrıştırmaz. Her ifadenin süresi histogramda toplanır.
+"""
+
+import bisect
+import threading
+
+from invite_tracker import UPSERT_INVITE_SQL
+
+SQL = {
+    # Davet kodları (davet verileri guild_id ile bölümlenir; kod Discord genelinde benzersizdir)
+    'invite_code_owner': 'SELECT user_id FROM invite_codes WHERE code = ?',
+    'invite_code_exists_for_user': 'SELECT code FROM invite_codes WHERE guild_id = ? AND user_id = ?',
+    'invite_link_for_user': 'SELECT code, uses FROM invite_codes WHERE guild_id = ? AND user_id = ?',
+    'invite_stats_for_user': 'SELECT code, uses, created_at FROM invite_codes WHERE guild_id = ? AND user_id = ?',
+    'invite_codes_in_guild': 'SELECT code, uses, user_id FROM invite_codes WHERE guild_id = ?',
+    'invite_codes_by_uses': '''
+        SELECT code, user_id, uses, created_at FROM invite_codes
+        WHERE guild_id = ?
+        ORDER BY uses DESC, created_at DESC
+    ''',
+    'upsert_invite_code': UPSERT_INVITE_SQL,
+    'upsert_invite_link': '''
+        INSERT INTO invite_codes (code, user_id, created_at, uses, guild_id)
+        VALUES (?, ?, ?, 0, ?)
+        ON CONFLICT(code) DO UPDATE SET
+            guild_id = excluded.guild_id,
+            user_id = excluded.user_id,
+            created_at = excluded.created_at
+    ''',
+    # Kullanım sayısı yalnızca artar; geç yazılan eski bir değer yenisini ezmez
+    'update_invite_uses': 'UPDATE invite_codes SET uses = MAX(uses, ?) WHERE code = ?',
+
+    # Davet edilen kullanıcılar ve sıralama
+    'invited_user_exists': 'SELECT id FROM invited_users WHERE guild_id = ? AND invited_user_id = ?',
+    'invited_user_ids': 'SELECT invited_user_id FROM invited_users WHERE guild_id = ?',
+    'legacy_invited_user_count': 'SELECT COUNT(*) FROM invited_users WHERE guild_id = 0',
+    'invites_since': 'SELECT inviter_id, invited_at FROM invited_users WHERE guild_id = ? AND invited_at >= ?',
+    'insert_invited_user': '''
+        INSERT INTO invited_users (guild_id, inviter_id, invited_user_id, invited_at, invite_code)
+        VALUES (?, ?, ?, ?, ?)
+    ''',
+    'increment_inviter_total': '''
+        INSERT INTO inviter_totals (guild_id, inviter_id, invite_count) VALUES (?, ?, 1)
+        ON CONFLICT(guild_id, inviter_id) DO UPDATE SET invite_count = invite_count + 1
+    ''',
+    'inviter_totals_in_guild': 'SELECT inviter_id, invite_count FROM inviter_totals WHERE guild_id = ?',
+
+    # Güvenlik
+    'add_suspicious_invites': '''
+        INSERT INTO suspicious_invites (inviter_id, first_invite_at, last_invite_at, invite_count)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(inviter_id) DO UPDATE SET
+            invite_count = invite_count + excluded.invite_count,
+            last_invite_at = excluded.last_invite_at
+    ''',
+    'suspicious_invites_all': '''
+        SELECT inviter_id, invite_count, first_invite_at, last_invite_at
+        FROM suspicious_invites
+        ORDER BY invite_count DESC, last_invite_at DESC
+    ''',
+    'is_bot_user': 'SELECT is_bot FROM bot_protection WHERE user_id = ?',
+    'mark_bot_user': '''
+        INSERT INTO bot_protection (user_id, is_bot, detected_at) VALUES (?, TRUE, ?)
+        ON CONFLICT(user_id) DO UPDATE SET is_bot = TRUE
+    ''',
+    'bot_user_ids': 'SELECT user_id FROM bot_protection WHERE is_bot',
+
+    # Ticket sistemi
+    'ticket_config': 'SELECT * FROM ticket_config WHERE guild_id = ?',
+    'save_ticket_config': '''
+        INSERT OR REPLACE INTO ticket_config
+        (guild_id, category_id, support_role_id, daily_limit, log_channel_id)
+        VALUES (?, ?, ?, ?, ?)
+    ''',
+    'delete_stale_ticket_admissions': '''
+        DELETE FROM tickets
+        WHERE status = 'open' AND channel_id = 0 AND created_at < datetime('now', '-10 minutes')
+    ''',
+    'open_ticket_channels': '''
+        SELECT channel_id, guild_id, ticket_number, user_id
+        FROM tickets
+        WHERE status = 'open'
+    ''',
+    'open_ticket_by_channel': '''
+        SELECT guild_id, ticket_number, user_id
+        FROM tickets
+        WHERE channel_id = ? AND status = 'open'
+    ''',
+    'open_ticket_in_guild_channel': '''
+        SELECT * FROM tickets
+        WHERE guild_id = ? AND channel_id = ? AND status = 'open'
+    ''',
+    'open_tickets_in_guild': '''
+        SELECT * FROM tickets
+        WHERE guild_id = ? AND status = 'open'
+        ORDER BY created_at DESC
+    ''',
+    'close_ticket': '''
+        UPDATE tickets
+        SET status = 'closed', closed_at = ?, closed_by = ?
+        WHERE id = ?
+    ''',
+    'ticket_channel_by_id': 'SELECT channel_id FROM tickets WHERE id = ?',
+    'count_open_tickets': "SELECT COUNT(*) FROM tickets WHERE guild_id = ? AND status = 'open'",
+    'count_tickets': 'SELECT COUNT(*) FROM tickets WHERE guild_id = ?',
+    'ticket_panels_in_guild': 'SELECT channel_id, message_id FROM ticket_panels WHERE guild_id = ?',
+    'save_ticket_panel': '''
+        INSERT OR REPLACE INTO ticket_panels (message_id, guild_id, channel_id)
+        VALUES (?, ?, ?)
+    ''',
+    'delete_ticket_panel': 'DELETE FROM ticket_panels WHERE message_id = ?',
+    'save_ticket_transcript': '''
+        INSERT OR REPLACE INTO ticket_transcripts
+        (ticket_id, guild_id, ticket_number, channel_id, path, message_count, size_bytes)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''',
+}
+
+# Sunucu bazlı davet tabloları (shard modunda sunucunun kendi dosyasında tutulur)
+INVITE_TABLES = ['invite_codes', 'invited_users', 'inviter_totals']
+
+# /reset ile temizlenen tablolar
+RESET_TABLES = [
+    'invite_codes', 'invited_users', 'inviter_totals', 'suspicious_invites',
+    'bot_protection', 'ticket_config', 'tickets', 'user_daily_tickets',
+    'ticket_panels', 'ticket_transcripts',
+]
+
+
+class QueryStats:
+    """Sorgu başına süre histogramı (thread-safe)"""
+
+    # Kova üst sınırları (ms): 0.025, 0.05, ... ~1.6 sn
+    BOUNDS_MS = [0.025 * 2 ** i for i in range(17)]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queries = {}
+
+    def record(self, name, seconds):
+        ms = seconds * 1000
+        bucket = bisect.bisect_left(self.BOUNDS_MS, ms)
+        with self._lock:
+            entry = self._queries.get(name)
+            if entry is None:
+                entry = self._queries[name] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'buckets': [0] * (len(self.BOUNDS_MS) + 1)}
+            entry['count'] += 1
+            entry['total_ms'] += ms
+            entry['max_ms'] = max(entry['max_ms'], ms)
+            entry['buckets'][bucket] += 1
+
+    def _percentile(self, entry, p):
+        target = entry['count'] * p
+        seen = 0
+        for i, count in enumerate(entry['buckets']):
+            seen += count
+            if seen >= target and count:
+                # Kova üst sınırı (son kova için gözlenen en büyük değer)
+                return min(self.BOUNDS_MS[i], entry['max_ms']) if i < len(self.BOUNDS_MS) else entry['max_ms']
+        return entry['max_ms']
+
+    def snapshot(self):
+        """[{name, count, total_ms, avg_ms, p50_ms, p99_ms, max_ms}, ...] toplam süreye göre azalan"""
+        with self._lock:
+            rows = [
+                {
+                    'name': name,
+                    'count': entry['count'],
+                    'total_ms': entry['total_ms'],
+                    'avg_ms': entry['total_ms'] / entry['count'],
+                    'p50_ms': self._percentile(entry, 0.5),
+                    'p99_ms': self._percentile(entry, 0.99),
+                    'max_ms': entry['max_ms'],
+                }
+                for name, entry in self._queries.items()
+            ]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def format_report(self, limit=10):
+        """En çok süre harcayan sorguların metin tablosu"""
+        lines = [f"{'sorgu':<36} {'adet':>8} {'toplam ms':>10} {'p50':>7} {'p99':>7} {'max':>8}"]
+        for row in self.snapshot()[:limit]:
+            lines.append(
+                f"{row['name'][:36]:<36} {row['count']:>8} {row['total_ms']:>10.1f} "
+                f"{row['p50_ms']:>7.2f} {row['p99_ms']:>7.2f} {row['max_ms']:>8.2f}"
+            )
+        return '\n'.join(lines)
+
+    def clear(self):
+        with self._lock:
+            self._queries.clear()
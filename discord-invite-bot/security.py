@@ -0,0 +1,240 @@
+"""
+Fake davet koruması için bellek içi yapılar.
+Davet hız limitleri ve tekrar davet / bot kontrolleri veritabanına
+gitmeden bellekten yanıtlanır.
+"""
+
+import math
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from itertools import chain
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+class RingWindow:
+    """Sabit sayıda zaman dilimine bölünmüş kayan pencere sayacı"""
+
+    __slots__ = ('buckets', 'bucket_seconds', 'total', 'last_bucket')
+
+    def __init__(self, window_seconds, bucket_count):
+        self.buckets = [0] * bucket_count
+        self.bucket_seconds = window_seconds / bucket_count
+        self.total = 0
+        self.last_bucket = None
+
+    def _advance(self, now):
+        bucket = int(now // self.bucket_seconds)
+        if self.last_bucket is None:
+            self.last_bucket = bucket
+            return bucket
+
+        elapsed = bucket - self.last_bucket
+        if elapsed <= 0:
+            return bucket
+
+        # Pencereden çıkan dilimleri sıfırla
+        size = len(self.buckets)
+        if elapsed >= size:
+            self.buckets = [0] * size
+            self.total = 0
+        else:
+            for b in range(self.last_bucket + 1, bucket + 1):
+                index = b % size
+                self.total -= self.buckets[index]
+                self.buckets[index] = 0
+        self.last_bucket = bucket
+        return bucket
+
+    def add(self, timestamp, now=None):
+        """Belirtilen zamandaki bir olayı sayar (pencere dışındaysa yok sayar)"""
+        current = self._advance(time.time() if now is None else now)
+        bucket = int(timestamp // self.bucket_seconds)
+        if current - bucket >= len(self.buckets) or bucket > current:
+            return
+        self.buckets[bucket % len(self.buckets)] += 1
+        self.total += 1
+
+    def count(self, now=None):
+        """Penceredeki toplam olay sayısı"""
+        self._advance(time.time() if now is None else now)
+        return self.total
+
+
+class InviteRateTracker:
+    """Davet eden başına saatlik ve günlük kayan pencere sayaçları"""
+
+    def __init__(self, hour_buckets=60, day_buckets=96, prune_interval=HOUR):
+        self.hour_buckets = hour_buckets
+        self.day_buckets = day_buckets
+        # Boşta kalan kullanıcılar record() içinde bu aralıkla temizlenir (bellek davet edenlerle büyümesin)
+        self.prune_interval = prune_interval
+        self._next_prune = None
+        self._windows = {}
+
+    def _get(self, inviter_id):
+        windows = self._windows.get(inviter_id)
+        if windows is None:
+            windows = (RingWindow(HOUR, self.hour_buckets), RingWindow(DAY, self.day_buckets))
+            self._windows[inviter_id] = windows
+        return windows
+
+    def record(self, inviter_id, timestamp=None, now=None):
+        """Yeni bir daveti sayaçlara ekler"""
+        now = time.time() if now is None else now
+        timestamp = now if timestamp is None else timestamp
+        if self._next_prune is None:
+            self._next_prune = now + self.prune_interval
+        elif now >= self._next_prune:
+            self.prune(now)
+        hour, day = self._get(inviter_id)
+        hour.add(timestamp, now)
+        day.add(timestamp, now)
+
+    def counts(self, inviter_id, now=None):
+        """(son 1 saat, son 24 saat) davet sayılarını getirir"""
+        windows = self._windows.get(inviter_id)
+        if windows is None:
+            return 0, 0
+        now = time.time() if now is None else now
+        return windows[0].count(now), windows[1].count(now)
+
+    def is_over_limit(self, inviter_id, max_per_hour, max_per_day, now=None):
+        """Saatlik veya günlük limit aşılmış mı"""
+        hourly, daily = self.counts(inviter_id, now)
+        return hourly > max_per_hour or daily > max_per_day
+
+    def load(self, rows, now=None):
+        """Sayaçları (inviter_id, unix_zamanı) kayıtlarından baştan kurar"""
+        now = time.time() if now is None else now
+        self._windows.clear()
+        for inviter_id, timestamp in rows:
+            if now - timestamp < DAY:
+                self.record(inviter_id, timestamp, now)
+
+    def prune(self, now=None):
+        """Son 24 saatte daveti olmayan kullanıcıları bellekten siler"""
+        now = time.time() if now is None else now
+        idle = [inviter_id for inviter_id, (_, day) in self._windows.items() if day.count(now) == 0]
+        for inviter_id in idle:
+            del self._windows[inviter_id]
+        self._next_prune = now + self.prune_interval
+        return len(idle)
+
+    def clear(self):
+        self._windows.clear()
+
+    def __len__(self):
+        return len(self._windows)
+
+
+class BloomFilter:
+    """Tamsayı kimlikler için basit Bloom filtresi (yanlış negatif vermez)"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        # m = -n*ln(p)/ln(2)^2, k = m/n*ln(2)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        # Çift hash: h1 + i*h2 (splitmix64 karıştırması)
+        h = (value + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+        h ^= h >> 31
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def memory_bytes(self):
+        return len(self.bits)
+
+
+class MembershipIndex:
+    """
+    Kullanıcı kimlikleri için sıkıştırılmış üyelik indeksi.
+    Kimlikler sıralı 64-bit dizide (8 bayt/kimlik) tutulur; yeni eklenenler
+    küçük bir küme üzerinden toplu olarak diziye katılır. İstenirse önde bir
+    Bloom filtresi negatif sorguları ikili aramaya gitmeden yanıtlar.
+    """
+
+    def __init__(self, bloom_threshold=None, error_rate=0.01, merge_threshold=4096):
+        self.bloom_threshold = bloom_threshold
+        self.error_rate = error_rate
+        self.merge_threshold = merge_threshold
+        self.loaded = False
+        self._sorted = array('Q')
+        self._pending = set()
+        self._bloom = None
+
+    def load(self, ids):
+        """İndeksi verilen kimliklerle baştan kurar"""
+        self._sorted = array('Q', sorted(set(ids)))
+        self._pending = set()
+        self._rebuild_bloom()
+        self.loaded = True
+
+    def _rebuild_bloom(self):
+        count = len(self._sorted) + len(self._pending)
+        if self.bloom_threshold is None or count < self.bloom_threshold:
+            self._bloom = None
+            return
+        # Büyüme payı bırak, dolunca yeniden kurulur
+        self._bloom = BloomFilter(count * 2, self.error_rate)
+        self._bloom_capacity = count * 2
+        for value in self._sorted:
+            self._bloom.add(value)
+        for value in self._pending:
+            self._bloom.add(value)
+
+    def _merge(self):
+        # Bekleyen kimlikler dizide yok; timsort neredeyse sıralı veriyi doğrusal birleştirir
+        self._sorted = array('Q', sorted(chain(self._sorted, self._pending)))
+        self._pending = set()
+
+    def add(self, user_id):
+        """Yeni kimlik ekler (yazma ile birlikte çağrılır)"""
+        if user_id in self:
+            return
+        self._pending.add(user_id)
+        if self._bloom is not None:
+            self._bloom.add(user_id)
+            if len(self) > self._bloom_capacity:
+                self._rebuild_bloom()
+        elif self.bloom_threshold is not None and len(self) >= self.bloom_threshold:
+            self._rebuild_bloom()
+        if len(self._pending) >= self.merge_threshold:
+            self._merge()
+
+    def __contains__(self, user_id):
+        if self._bloom is not None and user_id not in self._bloom:
+            return False
+        if user_id in self._pending:
+            return True
+        index = bisect_left(self._sorted, user_id)
+        return index < len(self._sorted) and self._sorted[index] == user_id
+
+    def __len__(self):
+        return len(self._sorted) + len(self._pending)
+
+    def clear(self):
+        self.load(())
+
+    def memory_bytes(self):
+        """Yaklaşık bellek kullanımı (bayt)"""
+        total = self._sorted.itemsize * len(self._sorted) + sys.getsizeof(self._pending)
+        if self._bloom is not None:
+            total += self._bloom.memory_bytes()
+        return total
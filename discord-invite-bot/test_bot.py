@@ -4,10 +4,102 @@ Discord Davet Bot Test Dosyası
 Bu dosya bot'un temel işlevlerini test etmek için kullanılır.
 """
 
+import asyncio
+import contextlib
+import gzip
+import io
+import json
+import logging
+import multiprocessing
+import os
 import sqlite3
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
 from datetime import datetime
 import random
 import string
+import sys
+
+from database import Database, DatabaseMaintenance, apply_pragmas
+from guild_storage import GuildStorage, claim_legacy_invites, clear_invite_state
+from launcher import ShardLauncher, shard_for_guild, shards_from_env, split_shards
+from queries import RESET_TABLES, SQL
+from migrations import BASE_SCHEMA, MIGRATIONS, get_schema_version, init_schema, run_migrations
+from invite_tracker import InviteUsesCache, JoinAttributionQueue, sync_invite_rows
+from leaderboard import Leaderboard
+from log_archive import ArchivingFileHandler, LogArchiver, compress_log, read_index, search_logs
+from log_archive import main as log_archive_main
+from log_budget import LogBudget, log_guild, set_log_guild
+from log_forwarder import LogForwarder
+from log_pipeline import LogPipeline
+from security import InviteRateTracker, MembershipIndex
+from tickets import (
+    DebouncedRefresher, OpenTicketIndex, SingleFlight, TicketConfigCache, admit_ticket, allocate_ticket_number,
+    open_ticket_channel
+)
+from transcripts import read_transcript, transcript_path, write_transcript
+from user_cache import UserCache
+from write_buffer import WriteBehindBuffer
+
+# Testlerde kullanılan sahte Discord nesneleri
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.display_name = f"user{user_id}"
+
+class FakeInvite:
+    def __init__(self, code, uses):
+        self.code = code
+        self.uses = uses
+
+class FakeChannel:
+    """Gönderilen mesajları ve log sayfalarını kaydeden kanal"""
+    
+    def __init__(self, channel_id=0, name=None, send_delay=0):
+        self.id = channel_id
+        self.name = name
+        self.send_delay = send_delay
+        self.messages = []
+        self.pages = []
+        self.send_times = []
+    
+    async def send(self, *args, **kwargs):
+        await asyncio.sleep(self.send_delay)
+        self.messages.append((args, kwargs))
+    
+    async def send_page(self, channel_id, fields, dropped):
+        # LogForwarder'ın sayfa gönderimi
+        self.send_times.append(asyncio.get_running_loop().time())
+        self.pages.append((channel_id, list(fields), dropped))
+
+class FakeGuild:
+    """Davetleri sayılan ve kanal açılabilen sunucu"""
+    
+    def __init__(self, guild_id=1, codes=(), channel_delay=0, channel_jitter=0, send_delay=0):
+        self.id = guild_id
+        self.uses = {code: 0 for code in codes}
+        self.fetches = 0
+        self.channels = []
+        self.channel_delay = channel_delay
+        self.channel_jitter = channel_jitter
+        self.send_delay = send_delay
+    
+    def join(self, code):
+        self.uses[code] += 1
+    
+    async def invites(self):
+        self.fetches += 1
+        await asyncio.sleep(0)
+        return [FakeInvite(code, uses) for code, uses in self.uses.items()]
+    
+    async def create_text_channel(self, name, **kwargs):
+        await asyncio.sleep(self.channel_delay + random.uniform(0, self.channel_jitter))
+        channel = FakeChannel(10000 + len(self.channels) + 1, name, self.send_delay)
+        self.channels.append(channel)
+        return channel
 
 def test_database():
     """Veritabanı işlevlerini test eder"""
@@ -109,6 +201,1545 @@ def test_invite_code_generation():
     
     print("✅ Davet kodu oluşturma testleri tamamlandı\n")
 
+def test_async_database():
+    """Paylaşımlı asenkron veritabanı katmanını test eder"""
+    print("🧪 Asenkron veritabanı testleri başlatılıyor...")
+    
+    async def run(path):
+        db = Database(path)
+        try:
+            await db.execute('CREATE TABLE invited_users (id INTEGER PRIMARY KEY, invited_user_id INTEGER UNIQUE)')
+            await db.executemany('INSERT INTO invited_users (invited_user_id) VALUES (?)', [(i,) for i in range(50)])
+            
+            # Okuyucu havuzundan paralel okuma
+            results = await asyncio.gather(*(db.fetchone('SELECT id FROM invited_users WHERE invited_user_id = ?', (i,)) for i in range(50)))
+            assert all(result is not None for result in results)
+            print("✅ Paralel okumalar yazıcının verisini görüyor")
+            
+            # Hatalı transaction geri alınmalı
+            def failing(cursor):
+                cursor.execute('INSERT INTO invited_users (invited_user_id) VALUES (?)', (100,))
+                cursor.execute('INSERT INTO invited_users (invited_user_id) VALUES (?)', (0,))
+            
+            try:
+                await db.transaction(failing)
+                assert False, "IntegrityError bekleniyordu"
+            except sqlite3.IntegrityError:
+                pass
+            
+            assert await db.fetchone('SELECT id FROM invited_users WHERE invited_user_id = ?', (100,)) is None
+            print("✅ Hatalı transaction geri alındı")
+        finally:
+            db.close()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(os.path.join(tmp, 'test.db')))
+    
+    print("✅ Asenkron veritabanı testleri tamamlandı\n")
+
+def test_invite_uses_cache():
+    """Bellekteki davet kullanım anlık görüntüsünü test eder"""
+    print("🧪 Davet anlık görüntü testleri başlatılıyor...")
+    
+    cache = InviteUsesCache()
+    cache.seed(1, [('AAA', 3, 10), ('BBB', 0, 20)])
+    
+    used = cache.diff(1, [FakeInvite('AAA', 3), FakeInvite('BBB', 1), FakeInvite('CCC', 5)])
+    assert [(invite.code, previous, inviter) for invite, previous, inviter in used] == [('BBB', 0, 20)]
+    print("✅ Kullanılan davet bellekten bulundu")
+    
+    # Aynı sayılarla tekrar karşılaştırma yeni kullanım üretmemeli
+    assert cache.diff(1, [FakeInvite('AAA', 3), FakeInvite('BBB', 1), FakeInvite('CCC', 5)]) == []
+    assert cache.uses_of(1, 'CCC') == 5
+    print("✅ Anlık görüntü güncel sayılarla yenilendi")
+    
+    cache.remove(1, 'AAA')
+    assert cache.count(1) == 2
+    print("✅ Silinen davet anlık görüntüden çıkarıldı")
+    
+    print("✅ Davet anlık görüntü testleri tamamlandı\n")
+
+def test_join_attribution_raid():
+    """Baskın senaryosunda toplu katılım eşleştirmesini test eder"""
+    print("🧪 Toplu katılım eşleştirme testleri başlatılıyor...")
+    
+    async def raid():
+        guild = FakeGuild(1, ['RAID'])
+        cache = InviteUsesCache()
+        cache.seed(guild.id, [('RAID', 0, 42)])
+        queue = JoinAttributionQueue(cache, lambda g: g.invites(), window=0.05)
+        
+        # 300 üye aynı saniyede aynı davetle katılıyor
+        async def member_join(member_id):
+            guild.join('RAID')
+            return await queue.submit(guild, member_id)
+        
+        results = await asyncio.gather(*(member_join(i) for i in range(300)))
+        assert all(result is not None and result[1] == 42 for result in results)
+        assert guild.fetches == 1, guild.fetches
+        assert queue.stats['fetches_saved'] == 299
+        assert queue.stats['joins_batched'] == 300
+        print(f"✅ 300 katılım {guild.fetches} davet sorgusuyla eşleştirildi")
+        
+        # İki davetle karışık katılım: davet başına toplamlar doğru olmalı
+        guild = FakeGuild(2, ['A', 'B'])
+        cache.seed(guild.id, [('A', 0, 1), ('B', 0, 2)])
+        
+        async def mixed_join(member_id):
+            guild.join('A' if member_id % 3 else 'B')
+            return await queue.submit(guild, member_id)
+        
+        results = await asyncio.gather(*(mixed_join(i) for i in range(90)))
+        per_inviter = {}
+        for invite, inviter_id in results:
+            per_inviter[inviter_id] = per_inviter.get(inviter_id, 0) + 1
+        assert per_inviter == {1: 60, 2: 30}, per_inviter
+        assert guild.fetches == 1
+        print("✅ Karışık davetlerde kullanım sayıları korunuyor")
+        
+        # Davet artışı olmayan katılım eşleşmemeli
+        assert await queue.submit(guild, 999) is None
+        assert queue.stats['unattributed'] == 1
+        print("✅ Eşleşmeyen katılım boş döndü")
+    
+    asyncio.run(raid())
+    print("✅ Toplu katılım eşleştirme testleri tamamlandı\n")
+
+def test_schema_migrations():
+    """Migration sürümlerini ve sık sorguların indeks kullanımını test eder"""
+    print("🧪 Şema migration testleri başlatılıyor...")
+    
+    conn = sqlite3.connect(':memory:')
+    version = init_schema(conn)
+    assert version == max(m[0] for m in MIGRATIONS)
+    
+    # İkinci çalıştırma hiçbir şey uygulamamalı
+    assert run_migrations(conn) == version
+    assert conn.execute('SELECT COUNT(*) FROM schema_version').fetchone()[0] == len(MIGRATIONS)
+    print(f"✅ Şema sürümü: {version}")
+    
+    hot_queries = [
+        ("SELECT code, uses FROM invite_codes WHERE guild_id = ? AND user_id = ?", (1, 1)),
+        ("SELECT id FROM invited_users WHERE guild_id = ? AND invited_user_id = ?", (1, 1)),
+        ("SELECT COUNT(*) FROM invited_users WHERE inviter_id = ? AND invited_at >= datetime('now', '-1 hour')", (1,)),
+        ("SELECT guild_id, ticket_number, user_id FROM tickets WHERE channel_id = ? AND status = 'open'", (1,)),
+        ("SELECT COUNT(*) FROM tickets WHERE guild_id = ? AND status = 'open'", (1,)),
+        ("SELECT * FROM tickets WHERE guild_id = ? AND user_id = ? AND status = 'open' ORDER BY created_at DESC LIMIT 1", (1, 1)),
+        ("SELECT invite_count + 1 FROM suspicious_invites WHERE inviter_id = ?", (1,)),
+        ("SELECT is_bot FROM bot_protection WHERE user_id = ?", (1,)),
+    ]
+    for sql, params in hot_queries:
+        plan = " | ".join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params))
+        assert 'USING' in plan and 'INDEX' in plan, f"İndeks kullanılmıyor: {sql} -> {plan}"
+    print(f"✅ {len(hot_queries)} sık sorgunun tümü indeks kullanıyor")
+    
+    # Hatalı migration geri alınmalı ve sürüm artmamalı
+    broken = [(version + 1, "Hatalı adım", ['CREATE TABLE broken_table (id INTEGER)', 'SELECT * FROM missing_table'])]
+    try:
+        run_migrations(conn, broken)
+        assert False, "OperationalError bekleniyordu"
+    except sqlite3.OperationalError:
+        pass
+    assert get_schema_version(conn) == version
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'broken_table'").fetchone() is None
+    print("✅ Hatalı migration geri alındı")
+    
+    conn.close()
+    print("✅ Şema migration testleri tamamlandı\n")
+
+def test_invite_rate_tracker():
+    """Kayan pencere davet hız sayaçlarını test eder"""
+    print("🧪 Davet hız sayacı testleri başlatılıyor...")
+    
+    tracker = InviteRateTracker()
+    now = 1_700_000_000
+    
+    # 30 dakika önce 5, 3 saat önce 10, 2 gün önce 50 davet
+    rows = [(1, now - 1800)] * 5 + [(1, now - 3 * 3600)] * 10 + [(1, now - 2 * 86400)] * 50
+    tracker.load(rows, now)
+    assert tracker.counts(1, now) == (5, 15), tracker.counts(1, now)
+    print("✅ Sayaçlar geçmiş kayıtlardan doğru kuruldu")
+    
+    tracker.record(1, now=now)
+    assert tracker.counts(1, now) == (6, 16)
+    assert not tracker.is_over_limit(1, 20, 100, now)
+    assert tracker.is_over_limit(1, 5, 100, now)
+    print("✅ Limit kontrolü doğru çalışıyor")
+    
+    # Zaman ilerledikçe eski davetler pencereden çıkmalı
+    assert tracker.counts(1, now + 3600) == (0, 16)
+    assert tracker.counts(1, now + 86400 + 60) == (0, 0)
+    assert tracker.prune(now + 86400 + 60) == 1 and len(tracker) == 0
+    print("✅ Eski davetler pencereden çıktı")
+    
+    # Boşta kalan davet edenler record() içinde periyodik olarak silinir (bellek sınırlı kalır)
+    tracker = InviteRateTracker(prune_interval=3600)
+    for inviter_id in range(1000):
+        tracker.record(inviter_id, now=now)
+    tracker.record(5000, now=now + 1800)
+    assert len(tracker) == 1001, "Aralık dolmadan temizlik yapılmamalı"
+    tracker.record(5001, now=now + 40000)
+    assert len(tracker) == 1002, "Son 24 saatte daveti olanlar silinmemeli"
+    tracker.record(5002, now=now + 90000)
+    assert len(tracker) == 2, "24 saat boşta kalanlar silinmeli"
+    tracker.record(5003, now=now + 200000)
+    assert len(tracker) == 1
+    print("✅ Boşta kalan kullanıcılar periyodik olarak temizlendi")
+    
+    print("✅ Davet hız sayacı testleri tamamlandı\n")
+
+def test_membership_index():
+    """Davetli / bot üyelik indeksini test eder"""
+    print("🧪 Üyelik indeksi testleri başlatılıyor...")
+    
+    for bloom_threshold in (None, 10):
+        index = MembershipIndex(bloom_threshold=bloom_threshold, merge_threshold=8)
+        index.load(range(0, 2000, 2))
+        assert 10 in index and 11 not in index
+        
+        # Yazma ile eklenenler hemen görünmeli (birleştirme öncesi ve sonrası)
+        for user_id in range(1, 41, 2):
+            index.add(user_id)
+        assert all(user_id in index for user_id in range(1, 41, 2))
+        assert 41 not in index
+        assert len(index) == 1020
+        
+        index.clear()
+        assert 10 not in index and len(index) == 0
+    print("✅ İndeks Bloom filtresi ile ve filtresiz doğru çalışıyor")
+    
+    print("✅ Üyelik indeksi testleri tamamlandı\n")
+
+def test_leaderboard():
+    """Artımlı davet sıralamasını test eder"""
+    print("🧪 Davet sıralaması testleri başlatılıyor...")
+    
+    board = Leaderboard()
+    board.load([(1, 5), (2, 3), (3, 3), (4, 0)])
+    counts = {1: 5, 2: 3, 3: 3}
+    
+    # Rastgele davetler sonrası sonuçlar tam hesaplamayla aynı olmalı
+    rng = random.Random(42)
+    for _ in range(2000):
+        user_id = rng.randint(1, 300)
+        board.increment(user_id)
+        counts[user_id] = counts.get(user_id, 0) + 1
+    
+    expected_top = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:10]
+    assert board.top(10) == expected_top
+    print("✅ İlk 10 listesi tam hesaplamayla aynı")
+    
+    for user_id, count in counts.items():
+        expected_rank = 1 + sum(1 for other in counts.values() if other > count)
+        assert board.rank(user_id) == expected_rank, (user_id, board.rank(user_id), expected_rank)
+    assert board.rank(99999) is None
+    assert len(board) == len(counts)
+    print(f"✅ {len(counts)} kullanıcının sırası doğru hesaplandı")
+    
+    print("✅ Davet sıralaması testleri tamamlandı\n")
+
+def test_user_cache():
+    """Kullanıcı çözümleme önbelleğini test eder"""
+    print("🧪 Kullanıcı önbelleği testleri başlatılıyor...")
+    
+    async def run():
+        calls = []
+        active = {'now': 0, 'max': 0}
+        
+        async def fetch(user_id):
+            calls.append(user_id)
+            active['now'] += 1
+            active['max'] = max(active['max'], active['now'])
+            await asyncio.sleep(0.05)
+            active['now'] -= 1
+            if user_id == 404:
+                raise LookupError("Unknown User")
+            if user_id == 503:
+                raise RuntimeError("Service Unavailable")
+            return FakeUser(user_id)
+        
+        local = {1: FakeUser(1)}
+        cache = UserCache(lambda user_id, guild: local.get(user_id), fetch, max_size=8, concurrency=5)
+        
+        # 10 önbellekte olmayan kullanıcı: tek paralel dalga, en çok 5 eşzamanlı istek
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        users = await cache.get_many(list(range(100, 110)) + [100, 101])
+        elapsed = loop.time() - start
+        assert sorted(calls) == list(range(100, 110))
+        assert active['max'] == 5
+        assert elapsed < 0.3, elapsed
+        assert users[105].display_name == "user105"
+        print(f"✅ 10 kullanıcı {elapsed * 1000:.0f} ms'de çözüldü (en çok {active['max']} eşzamanlı istek)")
+        
+        # Bellekteki kullanıcı için istek yapılmaz, tekrar sorgular önbellekten gelir
+        assert (await cache.get(1)).display_name == "user1"
+        await cache.get_many([108, 109])
+        assert len(calls) == 10
+        
+        # Eşzamanlı aynı kullanıcı istekleri tek fetch'i paylaşır; bulunamayan önbelleklenir
+        results = await asyncio.gather(*(cache.get(404) for _ in range(5)))
+        assert results == [None] * 5
+        assert await cache.display_name(404) == "ID: 404"
+        assert calls.count(404) == 1
+        print("✅ Yinelenen ve bulunamayan kullanıcılar tekrar sorgulanmıyor")
+        
+        # Geçici hatalar önbelleklenmez, sonraki istekte tekrar denenir
+        assert await cache.get(503) is None
+        assert await cache.get(503) is None
+        assert calls.count(503) == 2 and 503 not in cache._entries
+        assert cache.stats['errors'] == 2
+        print("✅ Geçici hatalar önbelleklenmiyor")
+        
+        # LRU sınırı
+        assert len(cache) <= 8
+        assert 100 not in cache._entries and 404 in cache._entries
+        
+        # TTL dolunca yeniden çekilir
+        cache.ttl = 0
+        cache.invalidate(109)
+        await cache.get(109)
+        await asyncio.sleep(0.001)
+        await cache.get(109)
+        assert calls.count(109) == 3
+        print("✅ LRU sınırı ve TTL doğru çalışıyor")
+    
+    asyncio.run(run())
+    print("✅ Kullanıcı önbelleği testleri tamamlandı\n")
+
+def test_bulk_invite_sync():
+    """Davetlerin toplu UPSERT ile senkronizasyonunu test eder"""
+    print("🧪 Toplu davet senkronizasyonu testleri başlatılıyor...")
+    
+    conn = sqlite3.connect(':memory:')
+    init_schema(conn)
+    bot_id = 999
+    cursor = conn.cursor()
+    # Bot tarafından oluşturulmuş, sahibi veritabanında kayıtlı davet
+    cursor.execute('INSERT INTO invite_codes (code, user_id, uses) VALUES (?, ?, ?)', ('BOT0001', 42, 1))
+    
+    now = datetime.now()
+    rows = [('BOT0001', bot_id, 7, now), ('BOT0002', bot_id, 0, now)]
+    rows += [(f"CODE{i:04d}", i % 50 + 1, i % 10, now) for i in range(2000)]
+    inviter_ids = sync_invite_rows(cursor, rows, bot_id, chunk_size=1)
+    conn.commit()
+    
+    assert inviter_ids[:2] == [42, bot_id]
+    assert inviter_ids[2:] == [i % 50 + 1 for i in range(2000)]
+    assert cursor.execute('SELECT COUNT(*) FROM invite_codes').fetchone()[0] == 2002
+    assert cursor.execute("SELECT user_id, uses FROM invite_codes WHERE code = 'BOT0001'").fetchone() == (42, 7)
+    print("✅ 2002 davet tek UPSERT ile kaydedildi, bot davetlerinin sahibi korundu")
+    
+    # Tekrar senkronizasyon kayıt çoğaltmaz, kullanım sayılarını günceller
+    sync_invite_rows(cursor, [('CODE0000', 1, 25, now)], bot_id)
+    assert cursor.execute('SELECT COUNT(*) FROM invite_codes').fetchone()[0] == 2002
+    assert cursor.execute("SELECT uses FROM invite_codes WHERE code = 'CODE0000'").fetchone()[0] == 25
+    print("✅ Mevcut davetler güncellendi")
+    
+    conn.close()
+    print("✅ Toplu davet senkronizasyonu testleri tamamlandı\n")
+
+def test_open_ticket_index():
+    """Açık ticket kanalı indeksini test eder"""
+    print("🧪 Açık ticket indeksi testleri başlatılıyor...")
+    
+    conn = sqlite3.connect(':memory:')
+    init_schema(conn)
+    conn.executemany('''
+        INSERT INTO tickets (guild_id, ticket_number, user_id, channel_id, category_id, category_name, status)
+        VALUES (1, ?, ?, ?, 'destek', 'Destek', ?)
+    ''', [(n, 100 + n, 5000 + n, 'open' if n % 3 else 'closed') for n in range(1, 31)])
+    
+    index = OpenTicketIndex()
+    assert not index.loaded
+    index.load(conn.execute("SELECT channel_id, guild_id, ticket_number, user_id FROM tickets WHERE status = 'open'"))
+    assert index.loaded and len(index) == 20
+    assert index.get(5001) == (1, 1, 101)
+    assert index.get(5003) is None  # kapalı ticket
+    assert index.get(123) is None   # ticket olmayan kanal
+    print("✅ Açık ticket'lar başlangıçta yüklendi")
+    
+    # Kapatma: ticket kapatılır, kanalı aynı transaction'da okunup indeksten silinir
+    ticket_id = conn.execute('SELECT id FROM tickets WHERE ticket_number = 1').fetchone()[0]
+    conn.execute(SQL['close_ticket'], (datetime.now(), 0, ticket_id))
+    channel_id = conn.execute(SQL['ticket_channel_by_id'], (ticket_id,)).fetchone()[0]
+    index.remove(channel_id)
+    index.add(6000, 1, 31, 131)
+    assert 5001 not in index and index.get(6000) == (1, 31, 131)
+    assert len(index) == 20
+    print("✅ Açılan ve kapanan ticket'lar indekse yansıdı")
+    
+    conn.close()
+    print("✅ Açık ticket indeksi testleri tamamlandı\n")
+
+def test_ticket_log_forwarder():
+    """Ticket mesaj log kuyruğunu sahte log kanalıyla test eder"""
+    print("🧪 Ticket log kuyruğu testleri başlatılıyor...")
+    
+    async def run():
+        # 1000 mesaj, 10 mesajlık dalgalar halinde
+        channel = FakeChannel()
+        forwarder = LogForwarder(channel.send_page, window=0.02, max_queue=1000, rate=5, per=0.2)
+        for i in range(1000):
+            forwarder.submit(1, f"#{i % 7} • kullanıcı", f"mesaj {i}")
+            if i % 10 == 9:
+                await asyncio.sleep(0.001)
+        await forwarder.flush()
+        
+        fields = [value for _, page, _ in channel.pages for _, value in page]
+        assert fields == [f"mesaj {i}" for i in range(1000)]
+        assert all(len(page) <= 25 for _, page, _ in channel.pages)
+        assert forwarder.stats['sent'] == 1000 and forwarder.stats['dropped'] == 0
+        assert len(channel.pages) == forwarder.stats['sends'] <= 1000 // 25 + 1
+        print(f"✅ 1000 mesaj {len(channel.pages)} gönderimde iletildi (sıra korundu)")
+        
+        # Hız sınırı (token bucket): 5'lik ani gönderimden sonra her 0.04 sn'de en çok bir gönderim
+        times = channel.send_times
+        assert all(
+            times[j] - times[i] >= (j - i + 1 - 5) * 0.04 - 0.005
+            for i in range(len(times)) for j in range(i + 1, len(times))
+        )
+        print("✅ Kanal başına hız sınırına uyuldu")
+        
+        # Karakter sınırı: uzun mesajlar sayfalara bölünür
+        channel = FakeChannel()
+        forwarder = LogForwarder(channel.send_page, window=0.01, max_chars=3000, rate=100, per=1.0)
+        for i in range(6):
+            forwarder.submit(2, "uzun", "x" * 1000)
+        await forwarder.flush()
+        assert [len(page) for _, page, _ in channel.pages] == [2, 2, 2]
+        
+        # Embed alanı sınırları: 1000+ karakterlik mesaj kanal etiketiyle birlikte 1024'ü aşmaz
+        channel = FakeChannel()
+        forwarder = LogForwarder(channel.send_page, window=0.01, rate=100, per=1.0)
+        forwarder.submit(4, "#1 • " + "ad" * 200, "<#123456789012345678>\n" + "y" * 1500)
+        forwarder.submit(4, "#2 • kısa", "kısa mesaj")
+        await forwarder.flush()
+        (name, value), short = channel.pages[0][1]
+        assert len(name) == 256 and len(value) == 1024 and value.endswith('...')
+        assert value.startswith("<#123456789012345678>\nyyy")
+        assert short == ("#2 • kısa", "kısa mesaj")
+        print("✅ Alan adı ve değeri embed sınırlarına kısaltıldı")
+        
+        # Geri basınç: kuyruk dolunca en eski kayıtlar atılır ve bildirilir
+        channel = FakeChannel()
+        forwarder = LogForwarder(channel.send_page, window=0.01, max_queue=50, rate=100, per=1.0)
+        for i in range(80):
+            forwarder.submit(3, "mesaj", str(i))
+        await forwarder.flush()
+        assert forwarder.stats['dropped'] == 30
+        assert channel.pages[0][2] == 30
+        assert [value for _, page, _ in channel.pages for _, value in page] == [str(i) for i in range(30, 80)]
+        print("✅ Sayfalama ve kuyruk taşması doğru çalışıyor")
+    
+    asyncio.run(run())
+    print("✅ Ticket log kuyruğu testleri tamamlandı\n")
+
+def test_ticket_config_cache():
+    """Ticket konfigürasyonu önbelleğini test eder"""
+    print("🧪 Ticket config önbelleği testleri başlatılıyor...")
+    
+    async def run():
+        configs = {1: {'guild_id': 1, 'daily_limit': 3, 'ticket_counter': 1}}
+        loads = []
+        
+        async def load(guild_id):
+            loads.append(guild_id)
+            await asyncio.sleep(0.01)
+            config = configs.get(guild_id)
+            return dict(config) if config else None
+        
+        cache = TicketConfigCache()
+        for _ in range(100):
+            assert (await cache.get(1, load))['daily_limit'] == 3
+            assert await cache.get(2, load) is None  # kurulmamış sunucu da önbelleklenir
+        assert loads == [1, 2]
+        assert cache.stats == {'hits': 198, 'misses': 2}
+        print(f"✅ 200 istekte 2 veritabanı okuması (isabet oranı %{cache.hit_rate() * 100:.0f})")
+        
+        # Dönen sözlük değiştirilse de önbellek etkilenmez
+        (await cache.get(1, load))['daily_limit'] = 99
+        assert (await cache.get(1, load))['daily_limit'] == 3
+        
+        # Kayıt sonrası geçersiz kılma
+        configs[1]['daily_limit'] = 5
+        cache.invalidate(1)
+        assert (await cache.get(1, load))['daily_limit'] == 5
+        cache.update(1, ticket_counter=7)
+        assert (await cache.get(1, load))['ticket_counter'] == 7
+        
+        # Yükleme sırasında yapılan kayıt eski verinin önbelleğe girmesini engeller
+        cache.invalidate()
+        pending = asyncio.ensure_future(cache.get(1, load))
+        await asyncio.sleep(0)
+        configs[1]['daily_limit'] = 10
+        cache.invalidate(1)
+        await pending
+        assert (await cache.get(1, load))['daily_limit'] == 10
+        print("✅ Kayıt ve sıfırlama önbelleği doğru geçersiz kılıyor")
+    
+    asyncio.run(run())
+    print("✅ Ticket config önbelleği testleri tamamlandı\n")
+
+def test_ticket_number_allocation():
+    """500 eşzamanlı ticket oluşturmada numaraların benzersizliğini test eder"""
+    print("🧪 Ticket numarası ayırma testleri başlatılıyor...")
+    
+    async def run(path):
+        db = Database(path)
+        guild = FakeGuild(channel_jitter=0.005)
+        today = datetime.now().strftime('%Y-%m-%d')
+        latencies = []
+        try:
+            await db.execute('INSERT INTO ticket_config (guild_id, category_id, support_role_id) VALUES (1, 10, 20)')
+            
+            async def create_ticket(user_id):
+                # Botun akışı: kabul (numara ayırma) -> kanal aç -> kanalı kayda bağla
+                start = time.perf_counter()
+                status, (_, ticket_number, _, _) = await open_ticket_channel(
+                    db, guild.id, user_id, today, 1, 'destek', 'Destek',
+                    lambda number: guild.create_text_channel(f"ticket-{number}")
+                )
+                latencies.append(time.perf_counter() - start)
+                assert status == 'ok'
+                return ticket_number
+            
+            numbers = await asyncio.gather(*(create_ticket(user_id) for user_id in range(500)))
+            assert sorted(numbers) == list(range(1, 501))
+            assert len({channel.name for channel in guild.channels}) == 500
+            assert (await db.fetchone('SELECT ticket_counter FROM ticket_config WHERE guild_id = 1'))[0] == 501
+            assert (await db.fetchone('SELECT COUNT(DISTINCT ticket_number) FROM tickets'))[0] == 500
+            assert (await db.fetchone('SELECT COUNT(*) FROM tickets WHERE channel_id = 0'))[0] == 0
+            assert await db.transaction(allocate_ticket_number, 999) is None
+        finally:
+            db.close()
+        
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        print(f"✅ 500 eşzamanlı ticket benzersiz numara aldı (kabul + kanal p50 {p50:.2f} ms, p99 {p99:.2f} ms)")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tickets.db')
+        conn = sqlite3.connect(path)
+        init_schema(conn)
+        conn.close()
+        asyncio.run(run(path))
+    print("✅ Ticket numarası ayırma testleri tamamlandı\n")
+
+def test_ticket_admission():
+    """Tek transaction'lık ticket kabulünü ve oluşturma gecikmesini test eder"""
+    print("🧪 Ticket kabul testleri başlatılıyor...")
+    
+    async def run(path):
+        db = Database(path)
+        guild = FakeGuild(channel_delay=0.02, send_delay=0.05)
+        today = datetime.now().strftime('%Y-%m-%d')
+        try:
+            await db.execute('INSERT INTO ticket_config (guild_id, category_id, support_role_id, daily_limit) VALUES (1, 10, 20, 2)')
+            
+            async def create_ticket(user_id, concurrent_sends):
+                # Botun akışı: kabul + kanal (open_ticket_channel) -> Discord mesajları
+                start = time.perf_counter()
+                status, value = await open_ticket_channel(
+                    db, guild.id, user_id, today, 2, 'destek', 'Destek',
+                    lambda number: guild.create_text_channel(f"ticket-{number}")
+                )
+                if status != 'ok':
+                    return status, None
+                channel = value[3]
+                sends = [channel.send("hoş geldin"), channel.send("destek ekibi"), channel.send("followup"), channel.send("log")]
+                if concurrent_sends:
+                    await asyncio.gather(*sends)
+                else:
+                    for send in sends:
+                        await send
+                return status, time.perf_counter() - start
+            
+            def percentiles(latencies):
+                latencies = sorted(latencies)
+                return latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+            
+            # Aynı kullanıcıdan eşzamanlı 10 tıklama: yalnızca biri kabul edilir
+            results = await asyncio.gather(*(create_ticket(1, True) for _ in range(10)))
+            assert [status for status, _ in results].count('ok') == 1
+            assert all(status == 'active' for status, _ in results if status != 'ok')
+            assert len(guild.channels) == 1
+            
+            # Günlük limit: ticket kapatılsa da gün içinde en fazla 2
+            await db.execute("UPDATE tickets SET status = 'closed' WHERE user_id = 1")
+            assert (await create_ticket(1, True))[0] == 'ok'
+            await db.execute("UPDATE tickets SET status = 'closed' WHERE user_id = 1")
+            assert (await create_ticket(1, True))[0] == 'limit'
+            
+            # Kanal açılamazsa kabul geri alınır
+            async def forbidden(ticket_number):
+                raise RuntimeError("Missing Permissions")
+            try:
+                await open_ticket_channel(db, guild.id, 2, today, 2, 'destek', 'Destek', forbidden)
+                assert False, "RuntimeError bekleniyordu"
+            except RuntimeError:
+                pass
+            assert (await db.fetchone('SELECT COUNT(*) FROM tickets WHERE user_id = 2'))[0] == 0
+            assert (await db.fetchone('SELECT count FROM user_daily_tickets WHERE user_id = 2'))[0] == 0
+            print("✅ Limit, aktif ticket ve geri alma kuralları tek transaction'da uygulanıyor")
+            
+            # 100 kullanıcı eşzamanlı: sıralı ve eşzamanlı Discord gönderimleri
+            p50s = {}
+            for concurrent_sends, first_user in ((False, 1000), (True, 2000)):
+                results = await asyncio.gather(*(create_ticket(user_id, concurrent_sends) for user_id in range(first_user, first_user + 100)))
+                assert all(status == 'ok' for status, _ in results)
+                p50, p99 = percentiles([latency for _, latency in results])
+                p50s[concurrent_sends] = p50
+                label = "eşzamanlı" if concurrent_sends else "sıralı"
+                print(f"✅ 100 ticket, {label} gönderim: p50 {p50:.0f} ms, p99 {p99:.0f} ms")
+            assert p50s[True] < p50s[False]
+            
+            numbers = [row[0] for row in await db.fetchall('SELECT ticket_number FROM tickets')]
+            assert len(numbers) == len(set(numbers)) == 202
+            assert (await db.fetchone('SELECT COUNT(*) FROM tickets WHERE channel_id = 0'))[0] == 0
+        finally:
+            db.close()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tickets.db')
+        conn = sqlite3.connect(path)
+        init_schema(conn)
+        conn.close()
+        asyncio.run(run(path))
+    print("✅ Ticket kabul testleri tamamlandı\n")
+
+def test_ticket_single_flight():
+    """Aynı kullanıcının eşzamanlı ticket isteklerinin tek oluşturmaya katılmasını test eder"""
+    print("🧪 Tek uçuşlu ticket oluşturma testleri başlatılıyor...")
+    
+    async def run(path):
+        db = Database(path)
+        guild = FakeGuild(channel_delay=0.02)
+        admissions = SingleFlight()
+        today = datetime.now().strftime('%Y-%m-%d')
+        
+        def request_ticket(user_id, create_channel=None):
+            # create_ticket_with_category gibi: anahtar (sunucu, kullanıcı), işlem ticket kabulü + kanal
+            create_channel = create_channel or (lambda number: guild.create_text_channel(f"ticket-{number}"))
+            return admissions.run(
+                (guild.id, user_id), open_ticket_channel, db, guild.id, user_id, today, 5, 'destek', 'Destek', create_channel
+            )
+        
+        try:
+            await db.execute('INSERT INTO ticket_config (guild_id, category_id, support_role_id, daily_limit) VALUES (1, 10, 20, 5)')
+            
+            # Çift tıklama: 5 eşzamanlı istek, tek kanal, herkes aynı yanıtı alır
+            replies = await asyncio.gather(*(request_ticket(42) for _ in range(5)), request_ticket(43))
+            assert len(guild.channels) == 2
+            assert all(reply is replies[0] for reply in replies[:5]) and replies[0][0] == 'ok'
+            assert replies[0][1][3].id != replies[5][1][3].id
+            assert admissions.stats == {'leaders': 2, 'followers': 4}
+            assert len(admissions) == 0  # boşta kayıt tutulmaz
+            print("✅ 5 eşzamanlı istek tek kanal oluşturdu, hepsi aynı yanıtı aldı")
+            
+            # İşlem bitince yeni istek yeniden işlenir (açık ticket kuralı uygulanır)
+            assert await request_ticket(42) == ('active', replies[0][1][1])
+            assert len(guild.channels) == 2 and admissions.stats['leaders'] == 3
+            
+            # Hata tüm bekleyenlere iletilir, kabul bir kez geri alınır
+            async def forbidden(ticket_number):
+                await asyncio.sleep(0.01)
+                raise RuntimeError("Missing Permissions")
+            
+            results = await asyncio.gather(*(request_ticket(44, forbidden) for _ in range(3)), return_exceptions=True)
+            assert all(isinstance(result, RuntimeError) for result in results)
+            assert (await db.fetchone('SELECT COUNT(*) FROM tickets WHERE user_id = 44'))[0] == 0
+            assert (await db.fetchone('SELECT count FROM user_daily_tickets WHERE user_id = 44'))[0] == 0
+            
+            # Bekleyen bir isteğin iptali işlemi iptal etmez
+            leader = asyncio.ensure_future(request_ticket(45))
+            follower = asyncio.ensure_future(request_ticket(45))
+            await asyncio.sleep(0)
+            follower.cancel()
+            status, (_, _, _, channel) = await leader
+            assert status == 'ok' and guild.channels[-1] is channel and len(admissions) == 0
+            assert (await db.fetchone('SELECT channel_id FROM tickets WHERE user_id = 45'))[0] == channel.id
+            print("✅ Hatalar ve iptaller doğru işleniyor")
+        finally:
+            db.close()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tickets.db')
+        conn = sqlite3.connect(path)
+        init_schema(conn)
+        conn.close()
+        asyncio.run(run(path))
+    print("✅ Tek uçuşlu ticket oluşturma testleri tamamlandı\n")
+
+def test_ticket_panel_refresh():
+    """Kayıtlı panellerin birleştirilmiş yenilenmesini test eder"""
+    print("🧪 Ticket panel yenileme testleri başlatılıyor...")
+    
+    conn = sqlite3.connect(':memory:')
+    init_schema(conn)
+    conn.executemany(
+        'INSERT INTO ticket_panels (message_id, guild_id, channel_id) VALUES (?, ?, ?)',
+        [(100, 1, 10), (101, 1, 11), (200, 2, 20)]
+    )
+    plan = " | ".join(row[3] for row in conn.execute(
+        'EXPLAIN QUERY PLAN SELECT channel_id, message_id FROM ticket_panels WHERE guild_id = ?', (1,)
+    ))
+    assert 'idx_ticket_panels_guild' in plan, plan
+    
+    async def run():
+        edits = []
+        
+        async def refresh(guild_id):
+            # Her panel mesajı doğrudan message_id ile düzenlenir (geçmiş taranmaz)
+            for channel_id, message_id in conn.execute(
+                'SELECT channel_id, message_id FROM ticket_panels WHERE guild_id = ?', (guild_id,)
+            ):
+                edits.append(message_id)
+        
+        refresher = DebouncedRefresher(refresh, delay=0.05)
+        # 1 dakikada 20 kapatma yerine: kısa pencerede 20 kapatma
+        for i in range(20):
+            refresher.schedule(1 if i % 4 else 2)
+            await asyncio.sleep(0.001)
+        await refresher.flush()
+        assert sorted(edits) == [100, 101, 200]
+        assert refresher.stats == {'requests': 20, 'refreshes': 2}
+        print("✅ 20 kapatma, panel başına tek düzenleme")
+        
+        # Pencere geçtikten sonra gelen kapatma yeni bir yenileme planlar
+        refresher.schedule(1)
+        await refresher.flush()
+        assert sorted(edits) == [100, 100, 101, 101, 200]
+    
+    asyncio.run(run())
+    conn.close()
+    print("✅ Ticket panel yenileme testleri tamamlandı\n")
+
+def test_ticket_transcripts():
+    """Ticket transkriptlerinin akışlı yazımını test eder"""
+    print("🧪 Ticket transkript testleri başlatılıyor...")
+    
+    async def history(count):
+        # channel.history() gibi: mesajlar sayfa sayfa gelir
+        for page_start in range(0, count, 100):
+            await asyncio.sleep(0)
+            for i in range(page_start, min(page_start + 100, count)):
+                yield {'id': i, 'author_id': 42, 'content': f"mesaj {i} " + "ğüşiöç" * 20}
+    
+    async def run(tmp):
+        small_path = transcript_path(tmp, 1, 1, 1)
+        count, _ = await write_transcript(history(1000), small_path)
+        assert count == 1000
+        
+        path = transcript_path(tmp, 1, 2, 2)
+        tracemalloc.start()
+        count, size = await write_transcript(history(20000), path)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        
+        assert count == 20000
+        assert not os.path.exists(path + '.tmp')
+        messages = list(read_transcript(path))
+        assert [message['id'] for message in messages] == list(range(20000))
+        assert messages[5]['content'].startswith("mesaj 5 ğüş")
+        raw = sum(len(json.dumps(message, ensure_ascii=False).encode()) + 1 for message in messages)
+        print(f"✅ 20.000 mesaj yazıldı: {size:,} bayt (ham {raw:,}), en yüksek bellek {peak / 1024:.0f} KB")
+        # Bellek kullanımı mesaj sayısıyla büyümez
+        assert peak < raw / 10, peak
+        
+        # Hata olursa yarım dosya bırakılmaz
+        async def broken():
+            yield {'id': 1}
+            raise ConnectionError("history kesildi")
+        failed_path = transcript_path(tmp, 1, 3, 3)
+        try:
+            await write_transcript(broken(), failed_path)
+            assert False, "ConnectionError bekleniyordu"
+        except ConnectionError:
+            pass
+        assert not os.path.exists(failed_path) and not os.path.exists(failed_path + '.tmp')
+        print("✅ Yarıda kalan transkript dosya bırakmadı")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+    print("✅ Ticket transkript testleri tamamlandı\n")
+
+def test_query_stats():
+    """İsimlendirilmiş sorguları ve sorgu süre istatistiklerini test eder"""
+    print("🧪 Sorgu istatistikleri testleri başlatılıyor...")
+    
+    # Her ifade güncel şemaya karşı derlenebilmeli
+    conn = sqlite3.connect(':memory:')
+    init_schema(conn)
+    for name, sql in SQL.items():
+        try:
+            conn.execute(f'EXPLAIN {sql}', (None,) * sql.count('?'))
+        except sqlite3.Error as e:
+            raise AssertionError(f"{name}: {e}")
+    # /reset, şema ve sürüm tabloları dışındaki tüm tabloları temizler
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert tables - {'sqlite_sequence', 'schema_version'} == set(RESET_TABLES), tables ^ set(RESET_TABLES)
+    conn.close()
+    print(f"✅ {len(SQL)} ifade şemaya karşı derlendi")
+    
+    async def run(path):
+        conn = sqlite3.connect(path)
+        init_schema(conn)
+        conn.close()
+        
+        db = Database(path)
+        try:
+            rows = [(f"CODE{i}", i % 10, datetime.now(), i, 1) for i in range(200)]
+            await db.executemany('upsert_invite_code', rows)
+            await asyncio.gather(*(db.fetchone('invite_code_owner', (f"CODE{i}",)) for i in range(200)))
+            for _ in range(3):
+                await db.fetchall('invite_codes_by_uses', (1,))
+            assert (await db.fetchone('invite_code_owner', ('CODE7',)))[0] == 7
+            
+            def add_invited(cursor, user_id):
+                cursor.execute('insert_invited_user', (1, 1, user_id, datetime.now(), 'CODE1'))
+                cursor.execute('increment_inviter_total', (1, 1))
+            await db.transaction(add_invited, 555)
+            # Ham SQL kısaltılmış metniyle etiketlenir
+            await db.fetchone('SELECT   COUNT(*)\n FROM invited_users')
+            
+            snapshot = {row['name']: row for row in db.stats.snapshot()}
+            assert snapshot['invite_code_owner']['count'] == 201
+            assert snapshot['invite_codes_by_uses']['count'] == 3
+            assert snapshot['upsert_invite_code']['count'] == 1
+            assert snapshot['insert_invited_user']['count'] == 1
+            assert snapshot['tx:add_invited']['count'] == 1
+            assert 'SELECT COUNT(*) FROM invited_users' in snapshot
+            
+            # Rapor toplam süreye göre sıralı
+            totals = [row['total_ms'] for row in db.stats.snapshot()]
+            assert totals == sorted(totals, reverse=True)
+            owner = snapshot['invite_code_owner']
+            assert owner['p50_ms'] <= owner['p99_ms'] <= owner['max_ms']
+            print("✅ Sorgu süreleri ifade adına göre toplandı")
+            print(db.stats.format_report(limit=5))
+            
+            db.stats.clear()
+            assert db.stats.snapshot() == []
+        finally:
+            db.close()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(os.path.join(tmp, 'test.db')))
+    print("✅ Sorgu istatistikleri testleri tamamlandı\n")
+
+def test_database_pragmas():
+    """WAL ayarlarını ve arka plan bakım görevini test eder"""
+    print("🧪 Veritabanı PRAGMA testleri başlatılıyor...")
+    
+    pragmas = {'JOURNAL_MODE': 'WAL', 'SYNCHRONOUS': 'NORMAL', 'CACHE_SIZE': -8000, 'MMAP_SIZE': 1 << 20}
+    try:
+        apply_pragmas(sqlite3.connect(':memory:'), {'SYNCHRONOUS': 'OFF; DROP TABLE tickets'})
+        assert False, "ValueError bekleniyordu"
+    except ValueError:
+        pass
+    
+    async def run(path):
+        conn = sqlite3.connect(path)
+        apply_pragmas(conn, pragmas)
+        init_schema(conn)
+        conn.close()
+        
+        db = Database(path, pragmas=pragmas)
+        maintenance = DatabaseMaintenance(db, checkpoint_interval=0.05, optimize_interval=0.1)
+        try:
+            assert (await db.fetchone('PRAGMA journal_mode'))[0] == 'wal'
+            assert (await db.fetchone('PRAGMA synchronous'))[0] == 1
+            assert (await db.fetchone('PRAGMA cache_size'))[0] == -8000
+            print("✅ Bağlantılar WAL + synchronous=NORMAL ile açıldı")
+            
+            await db.executemany('insert_invited_user', [(1, 1, i, datetime.now(), 'CODE') for i in range(500)])
+            # Yazıcı commit ederken okuyucular beklemez
+            results = await asyncio.gather(
+                db.execute('insert_invited_user', (1, 2, 1000, datetime.now(), 'CODE')),
+                *(db.fetchone('invited_user_exists', (1, i)) for i in range(100))
+            )
+            assert all(result is not None for result in results[1:])
+            
+            maintenance.start()
+            maintenance.start()
+            await asyncio.sleep(0.3)
+            await maintenance.stop()
+            assert not maintenance.running
+            assert maintenance.stats['checkpoints'] >= 2 and maintenance.stats['optimizes'] >= 1
+            assert maintenance.stats['failed'] == 0
+            busy, wal_pages, checkpointed = await db.checkpoint('TRUNCATE')
+            assert busy == 0 and wal_pages == 0
+            print(f"✅ Bakım görevi: {maintenance.stats['checkpoints']} checkpoint, {maintenance.stats['optimizes']} optimize")
+        finally:
+            db.close()
+        
+        # Kapanıştan sonra veriler ana dosyada
+        conn = sqlite3.connect(path)
+        assert conn.execute('SELECT COUNT(*) FROM invited_users').fetchone()[0] == 501
+        conn.close()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(os.path.join(tmp, 'test.db')))
+    print("✅ Veritabanı PRAGMA testleri tamamlandı\n")
+
+def crash_during_flush(path, crash_at):
+    """Alt süreç: toplu yazımın ortasında süreci öldürür"""
+    class CrashingDatabase(Database):
+        executed = 0
+        
+        def _cursor(self):
+            cursor = super()._cursor()
+            execute = cursor.execute
+            
+            def crash_execute(sql, params=()):
+                CrashingDatabase.executed += 1
+                if CrashingDatabase.executed == crash_at:
+                    os._exit(17)
+                return execute(sql, params)
+            cursor.execute = crash_execute
+            return cursor
+    
+    async def run():
+        db = CrashingDatabase(path)
+        buffer = WriteBehindBuffer(db, interval=60)
+        for i in range(100):
+            buffer.set('update_invite_uses', f"CODE{i}", (50, f"CODE{i}"))
+        await buffer.flush()
+    
+    asyncio.run(run())
+
+def test_write_behind_buffer():
+    """Sayaç güncellemelerinin toplu yazımını ve çökme tutarlılığını test eder"""
+    print("🧪 Write-behind tampon testleri başlatılıyor...")
+    
+    async def run(path):
+        db = Database(path)
+        buffer = WriteBehindBuffer(db, interval=0.05, max_pending=100)
+        try:
+            now = datetime.now()
+            for _ in range(3):
+                for inviter_id in range(10):
+                    buffer.increment('add_suspicious_invites', inviter_id, (inviter_id, now, now))
+            buffer.set('mark_bot_user', 7, (7, now))
+            buffer.set('mark_bot_user', 7, (7, now))
+            assert buffer.pending() == 11
+            assert buffer.stats['coalesced'] == 21
+            
+            # Zamanlayıcı aralık dolunca tek transaction'da yazar
+            await asyncio.sleep(0.2)
+            assert buffer.pending() == 0
+            assert buffer.stats['flushes'] == 1 and buffer.stats['last_batch'] == 11
+            rows = await db.fetchall('suspicious_invites_all')
+            assert len(rows) == 10 and all(row[1] == 3 for row in rows)
+            # Sonraki artışlar mevcut satıra eklenir
+            buffer.increment('add_suspicious_invites', 0, (0, now, now), delta=2)
+            await buffer.flush()
+            assert (await db.fetchone('SELECT invite_count FROM suspicious_invites WHERE inviter_id = 0'))[0] == 5
+            assert (await db.fetchone('is_bot_user', (7,)))[0] == 1
+            print(f"✅ 32 güncelleme 11 kayda birleştirildi, flush {buffer.stats['last_flush_ms']:.2f} ms")
+            
+            # max_pending dolunca zamanlayıcı beklenmez
+            buffer.interval = 60
+            for i in range(100):
+                buffer.set('update_invite_uses', f"CODE{i}", (i, f"CODE{i}"))
+            await asyncio.sleep(0.05)
+            assert buffer.pending() == 0 and buffer.stats['max_batch'] == 100
+            assert (await db.fetchone('invite_link_for_user', (0, 1)))[1] == 1
+            
+            # Kullanım sayısı geriye gitmez
+            buffer.set('update_invite_uses', 'CODE5', (2, 'CODE5'))
+            await buffer.flush()
+            assert (await db.fetchone('SELECT uses FROM invite_codes WHERE code = ?', ('CODE5',)))[0] == 5
+            
+            # Hatalı toplu iş geri alınır ve yeni güncellemelerle birleştirilerek tekrar denenir
+            buffer.increment('add_suspicious_invites', 1, (1, now, now))
+            buffer.set('broken_statement', 1, ())
+            try:
+                await buffer.flush()
+                assert False, "OperationalError bekleniyordu"
+            except sqlite3.OperationalError:
+                pass
+            assert buffer.stats['failed'] == 1 and buffer.pending() == 2
+            assert (await db.fetchone('SELECT invite_count FROM suspicious_invites WHERE inviter_id = 1'))[0] == 3
+            buffer.increment('add_suspicious_invites', 1, (1, now, now))
+            del buffer._pending[('broken_statement', 1)]
+            await buffer.close()
+            assert (await db.fetchone('SELECT invite_count FROM suspicious_invites WHERE inviter_id = 1'))[0] == 5
+            print("✅ Hatalı flush geri alındı, güncellemeler kaybolmadı")
+        finally:
+            db.close()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'test.db')
+        conn = sqlite3.connect(path)
+        init_schema(conn)
+        conn.executemany(
+            'INSERT INTO invite_codes (code, user_id, uses) VALUES (?, ?, ?)',
+            [(f"CODE{i}", i, 0) for i in range(100)]
+        )
+        conn.commit()
+        conn.close()
+        asyncio.run(run(path))
+        
+        # Süreç toplu yazımın ortasında ölürse yarım toplu iş diske yazılmaz
+        process = multiprocessing.get_context('fork').Process(target=crash_during_flush, args=(path, 50))
+        process.start()
+        process.join(30)
+        assert process.exitcode == 17
+        conn = sqlite3.connect(path)
+        assert conn.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+        uses = [row[0] for row in conn.execute('SELECT uses FROM invite_codes ORDER BY id')]
+        assert uses == list(range(100)), uses
+        conn.close()
+        print("✅ Flush ortasında öldürülen süreç hiçbir satırı yarım bırakmadı")
+    print("✅ Write-behind tampon testleri tamamlandı\n")
+
+def test_guild_partitioning():
+    """Davet verilerinin sunucu bazlı bölümlenmesini ve shard modunu test eder"""
+    print("🧪 Sunucu bazlı davet depolaması testleri başlatılıyor...")
+    
+    # guild_id sütunu öncesi (sürüm 5) veritabanı
+    conn = sqlite3.connect(':memory:')
+    for statement in BASE_SCHEMA:
+        conn.execute(statement)
+    run_migrations(conn, [m for m in MIGRATIONS if m[0] <= 5])
+    conn.executemany('INSERT INTO invite_codes (code, user_id, uses) VALUES (?, ?, ?)', [('AAA', 1, 2), ('BBB', 2, 1), ('OLD', 3, 1)])
+    conn.executemany(
+        'INSERT INTO invited_users (inviter_id, invited_user_id, invite_code) VALUES (?, ?, ?)',
+        [(1, 100, 'AAA'), (1, 101, 'AAA'), (2, 102, 'BBB'), (3, 103, 'OLD'), (4, 104, 'GONE')]
+    )
+    conn.execute("INSERT INTO inviter_totals SELECT inviter_id, COUNT(*) FROM invited_users GROUP BY inviter_id")
+    conn.commit()
+    
+    run_migrations(conn)
+    assert conn.execute('SELECT COUNT(*) FROM invited_users WHERE guild_id = 0').fetchone()[0] == 5
+    assert conn.execute('SELECT SUM(invite_count) FROM inviter_totals WHERE guild_id = 0').fetchone()[0] == 5
+    
+    # Kodları sunucuda bulunan kayıtlar sahiplenilir, diğerleri eski kayıt olarak kalır
+    cursor = conn.cursor()
+    assert claim_legacy_invites(cursor, 10, ['AAA'], chunk_size=1) == 3
+    assert claim_legacy_invites(cursor, 20, ['BBB']) == 2
+    # Davet kodu silinmiş kayıt: davet eden ve edilen sunucunun üyesiyse sahiplenilir
+    assert claim_legacy_invites(cursor, 20, [], member_ids=[3, 4, 104]) == 1
+    conn.commit()
+    assert cursor.execute('SELECT inviter_id, invite_count FROM inviter_totals WHERE guild_id = 20 ORDER BY inviter_id').fetchall() == [(2, 1), (4, 1)]
+    assert cursor.execute('SELECT inviter_id, invite_count FROM inviter_totals WHERE guild_id = 10').fetchall() == [(1, 2)]
+    assert cursor.execute('SELECT invited_user_id FROM invited_users WHERE guild_id = 0').fetchall() == [(103,)]
+    # Tek sunuculu kurulumda kalanların hepsi sahiplenilir
+    assert claim_legacy_invites(cursor, 10, [], claim_all=True) == 2
+    assert cursor.execute('SELECT COUNT(*) FROM invite_codes WHERE guild_id = 0').fetchone()[0] == 0
+    print("✅ Eski kayıtlar guild_id = 0 ile taşındı ve sunucularına atandı")
+    
+    # Aynı kişi farklı sunuculara davet edilebilir, aynı sunucuya iki kez edilemez
+    cursor.execute('INSERT INTO invited_users (guild_id, inviter_id, invited_user_id) VALUES (20, 5, 100)')
+    try:
+        cursor.execute('INSERT INTO invited_users (guild_id, inviter_id, invited_user_id) VALUES (10, 5, 100)')
+        assert False, "IntegrityError bekleniyordu"
+    except sqlite3.IntegrityError:
+        pass
+    
+    # Sunucu sorguları guild_id ile başlayan indeksleri kullanır
+    for name in ('invite_stats_for_user', 'invite_codes_by_uses', 'invited_user_exists', 'invites_since', 'inviter_totals_in_guild'):
+        plan = " | ".join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + SQL[name], (1,) * SQL[name].count('?')))
+        assert 'INDEX' in plan and 'SCAN' not in plan, f"{name}: {plan}"
+    conn.close()
+    print("✅ Sunucu sorguları yalnızca kendi sunucusunun indeks aralığını okuyor")
+    
+    async def run(tmp):
+        path = os.path.join(tmp, 'main.db')
+        conn = sqlite3.connect(path)
+        init_schema(conn)
+        conn.executemany(
+            'INSERT INTO invited_users (guild_id, inviter_id, invited_user_id) VALUES (?, ?, ?)',
+            [(guild_id, 1, i) for guild_id in (1, 2) for i in range(50)]
+        )
+        conn.commit()
+        conn.close()
+        
+        db = Database(path)
+        buffer = WriteBehindBuffer(db)
+        shared = GuildStorage(db, buffer)
+        assert (await shared.get(1)).db is db and len(shared) == 0
+        
+        storage = GuildStorage(db, buffer, shard_directory=os.path.join(tmp, 'shards'))
+        try:
+            first, again = await asyncio.gather(storage.get(1), storage.get(1))
+            assert first is again and first.db is not db and len(storage) == 1
+            assert first.db.stats is db.stats
+            # Sunucunun kayıtları kendi dosyasına taşındı, diğer sunucunun kayıtları yerinde
+            assert (await first.db.fetchone('SELECT COUNT(*) FROM invited_users WHERE guild_id = 1'))[0] == 50
+            assert (await db.fetchone('SELECT COUNT(*) FROM invited_users WHERE guild_id = 1'))[0] == 0
+            assert (await db.fetchone('SELECT COUNT(*) FROM invited_users WHERE guild_id = 2'))[0] == 50
+            
+            await first.db.execute('upsert_invite_code', ('SHARD', 7, datetime.now(), 0, 1))
+            first.buffer.set('update_invite_uses', 'SHARD', (4, 'SHARD'))
+            assert await storage.flush() == 1
+            assert (await first.db.fetchone('invite_link_for_user', (1, 7))) == ('SHARD', 4)
+            assert await db.fetchone('invite_link_for_user', (1, 7)) is None
+            assert 'upsert_invite_code' in {row['name'] for row in db.stats.snapshot()}
+            
+            first.buffer.set('update_invite_uses', 'SHARD', (9, 'SHARD'))
+            assert await storage.close() == 1 and len(storage) == 0
+            # Yeniden açılışta kayıtlar korunur, tekrar taşıma olmaz
+            reopened = await storage.get(1)
+            assert (await reopened.db.fetchone('invite_link_for_user', (1, 7))) == ('SHARD', 9)
+            assert (await reopened.db.fetchone('SELECT COUNT(*) FROM invited_users'))[0] == 50
+            print("✅ Shard modu: sunucu dosyası ilk erişimde açıldı, kayıtlar taşındı, tampon kapanışta yazıldı")
+            
+            # /reset: sıfırlanan sunucunun bellekteki verisi boşalır, diğer sunucununki korunur
+            invite_cache = InviteUsesCache()
+            invited_indexes = defaultdict(MembershipIndex)
+            leaderboards = {}
+            for guild_id in (1, 2):
+                invite_cache.seed(guild_id, [(f"G{guild_id}", 3, 7)])
+                invited_indexes[guild_id].load([100, 101])
+                leaderboards[guild_id] = Leaderboard()
+                leaderboards[guild_id].load([(7, 2)])
+            clear_invite_state(invite_cache, invited_indexes, leaderboards, 1)
+            assert not invite_cache.is_seeded(1) and invite_cache.inviter_of(2, 'G2') == 7
+            assert invited_indexes[1].loaded and 100 not in invited_indexes[1]
+            assert invited_indexes[2].loaded and 100 in invited_indexes[2] and len(invited_indexes[2]) == 2
+            assert leaderboards[1].top() == [] and leaderboards[2].top() == [(7, 2)]
+            # Ortak veritabanı modunda tüm sunucular boşalır
+            clear_invite_state(invite_cache, invited_indexes, leaderboards)
+            assert invite_cache.count(2) == 0 and len(invited_indexes[2]) == 0 and leaderboards[2].top() == []
+            print("✅ /reset yalnızca sıfırlanan sunucunun bellekteki verisini boşalttı")
+        finally:
+            await storage.close()
+            db.close()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+    print("✅ Sunucu bazlı davet depolaması testleri tamamlandı\n")
+
+class FakeGateway:
+    """Sunucuları shard'lara Discord gibi dağıtan sahte gateway (olaylar JSON dosyasından)"""
+    
+    def __init__(self, path):
+        with open(path, encoding='utf-8') as f:
+            self.spec = json.load(f)
+    
+    def guilds_for(self, shard_ids, shard_count):
+        return [guild_id for guild_id in self.spec['guilds'] if shard_for_guild(guild_id, shard_count) in shard_ids]
+
+def fake_shard_worker():
+    """launcher.py alt süreci yerine çalışan sahte bot: kendi shard'larının olaylarını işler"""
+    shard_ids, shard_count = shards_from_env()
+    gateway = FakeGateway(os.environ['FAKE_GATEWAY'])
+    spec = gateway.spec
+    guilds = gateway.guilds_for(shard_ids, shard_count)
+    
+    # İlk süreç bir kez çöker; başlatıcı yeniden başlatmalı
+    if shard_ids[0] == 0 and not os.path.exists(spec['crash_marker']):
+        open(spec['crash_marker'], 'w').close()
+        os._exit(3)
+    
+    async def handle_guild(storage, db, guild_id):
+        store = await storage.get(guild_id)
+        for user_id in range(spec['joins']):
+            def record_invite(cursor):
+                cursor.execute('insert_invited_user', (guild_id, user_id % 5, user_id, datetime.now(), f"G{guild_id}"))
+                cursor.execute('increment_inviter_total', (guild_id, user_id % 5))
+            await store.db.transaction(record_invite)
+            store.buffer.set('update_invite_uses', f"G{guild_id}", (user_id + 1, f"G{guild_id}"))
+        # Ticket tabloları tüm süreçlerin ortak dosyasında
+        await db.execute('INSERT OR IGNORE INTO ticket_config (guild_id, category_id) VALUES (?, 1)', (guild_id,))
+        await asyncio.gather(*(
+            db.transaction(admit_ticket, guild_id, user_id, '2025-01-01', 10, 'genel', 'Genel')
+            for user_id in range(spec['tickets'])
+        ))
+    
+    async def run():
+        db = Database(spec['database'], pragmas={'JOURNAL_MODE': 'WAL', 'SYNCHRONOUS': 'NORMAL'})
+        buffer = WriteBehindBuffer(db)
+        storage = GuildStorage(db, buffer, shard_directory=spec['shards'])
+        try:
+            await asyncio.gather(*(handle_guild(storage, db, guild_id) for guild_id in guilds))
+        finally:
+            await storage.close()
+            await buffer.close()
+            db.close()
+    
+    asyncio.run(run())
+    with open(os.path.join(spec['results'], f"shard_{shard_ids[0]}.json"), 'w', encoding='utf-8') as f:
+        json.dump({'shard_ids': shard_ids, 'guilds': guilds, 'pid': os.getpid()}, f)
+
+def test_shard_launcher():
+    """Süreç başına shard başlatıcısını sahte gateway ile test eder"""
+    print("🧪 Shard başlatıcı testleri başlatılıyor...")
+    
+    assert split_shards(10, 3) == [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]]
+    assert split_shards(2, 8) == [[0], [1]]
+    assert shards_from_env({}) == (None, None)
+    assert shards_from_env({'BOT_SHARD_IDS': '4,5', 'BOT_SHARD_COUNT': '8'}) == ([4, 5], 8)
+    assert shard_for_guild(81384788765712384, 1) == 0
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        guilds = [(i * 7919 + 1) << 22 for i in range(12)]
+        spec = {
+            'guilds': guilds, 'joins': 40, 'tickets': 10,
+            'database': os.path.join(tmp, 'main.db'), 'shards': os.path.join(tmp, 'shards'),
+            'results': tmp, 'crash_marker': os.path.join(tmp, 'crashed'),
+        }
+        with open(os.path.join(tmp, 'gateway.json'), 'w', encoding='utf-8') as f:
+            json.dump(spec, f)
+        # Başlatıcı gibi: migration'lar süreçlerden önce bir kez
+        conn = sqlite3.connect(spec['database'])
+        apply_pragmas(conn, {'JOURNAL_MODE': 'WAL'})
+        init_schema(conn)
+        conn.close()
+        
+        launcher = ShardLauncher(
+            [sys.executable, '-c', 'import test_bot; test_bot.fake_shard_worker()'],
+            shard_count=4, processes=2,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=dict(os.environ, FAKE_GATEWAY=os.path.join(tmp, 'gateway.json')),
+            restart_delay=0.05
+        )
+        start = time.perf_counter()
+        assert launcher.run(poll_interval=0.02) == 0
+        assert launcher.stats == {'started': 3, 'restarts': 1, 'failed': 0}
+        print(f"✅ 2 süreç × 2 shard, 1 çökme yeniden başlatıldı ({time.perf_counter() - start:.1f} sn)")
+        
+        # Her sunucu tam olarak bir sürece düştü
+        results = [json.load(open(os.path.join(tmp, f"shard_{group[0]}.json"), encoding='utf-8')) for group in launcher.groups]
+        owned = [guild_id for result in results for guild_id in result['guilds']]
+        assert sorted(owned) == sorted(guilds) and len({result['pid'] for result in results}) == 2
+        
+        conn = sqlite3.connect(spec['database'])
+        assert conn.execute('SELECT COUNT(*) FROM invited_users').fetchone()[0] == 0
+        for guild_id in guilds:
+            numbers = [row[0] for row in conn.execute('SELECT ticket_number FROM tickets WHERE guild_id = ? ORDER BY ticket_number', (guild_id,))]
+            assert numbers == list(range(1, 11)), numbers
+        conn.close()
+        for guild_id in guilds:
+            shard = sqlite3.connect(os.path.join(spec['shards'], f"guild_{guild_id}.db"))
+            assert shard.execute('SELECT COUNT(*) FROM invited_users WHERE guild_id = ?', (guild_id,)).fetchone()[0] == 40
+            assert shard.execute('SELECT SUM(invite_count) FROM inviter_totals').fetchone()[0] == 40
+            shard.close()
+        print("✅ Sunucu davet dosyaları tek süreçte, ortak ticket tablosunda numaralar çakışmadı")
+    print("✅ Shard başlatıcı testleri tamamlandı\n")
+
+def test_log_pipeline():
+    """Kuyruk tabanlı log hattını test eder"""
+    print("🧪 Log hattı testleri başlatılıyor...")
+    
+    class ThreadRecorder:
+        """str() çağrıldığı thread'i kaydeder"""
+        def __init__(self):
+            self.threads = []
+        
+        def __str__(self):
+            self.threads.append(threading.current_thread())
+            return "kaydedildi"
+    
+    class GatedHandler(logging.Handler):
+        """Kapı açılana kadar yazmayı bekleyen handler (yavaş disk gibi)"""
+        def __init__(self, gate):
+            super().__init__()
+            self.gate = gate
+            self.lines = []
+        
+        def emit(self, record):
+            self.gate.wait()
+            self.lines.append(self.format(record))
+    
+    logger = logging.getLogger('test.log_pipeline')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bot.log')
+        file_handler = logging.FileHandler(path, encoding='utf-8')
+        file_handler.setFormatter(logging.Formatter('%(levelname)s | %(message)s'))
+        pipeline = LogPipeline([file_handler], max_queue=100)
+        pipeline.start(logger)
+        
+        # Mesaj çağıran thread'de değil, yazıcı thread'inde biçimlendirilir
+        recorder = ThreadRecorder()
+        logger.info("Ticket #%s: %s", 1, recorder)
+        logger.debug("Seviye altı kayıt: %s", recorder)
+        try:
+            raise ValueError("örnek hata")
+        except ValueError:
+            logger.exception("Ticket oluşturma hatası")
+        pipeline.stop()
+        
+        assert len(recorder.threads) == 1
+        assert recorder.threads[0] is not threading.main_thread()
+        with open(path, encoding='utf-8') as f:
+            content = f.read()
+        assert "INFO | Ticket #1: kaydedildi" in content
+        assert "Seviye altı" not in content
+        assert "ValueError: örnek hata" in content, "İstisna metni yazıcı thread'inde eklenmeli"
+        assert logger.handlers == []
+        print("✅ Gecikmeli biçimlendirme çalışıyor")
+    
+    # Yazıcı takılırsa kuyruk dolar; log çağrıları beklemez, atılan kayıtlar sayılır
+    gate = threading.Event()
+    handler = GatedHandler(gate)
+    handler.setFormatter(logging.Formatter('%(levelname)s | %(message)s'))
+    pipeline = LogPipeline([handler], max_queue=5)
+    pipeline.start(logger)
+    start = time.perf_counter()
+    for i in range(50):
+        logger.info("Satır %d", i)
+    assert time.perf_counter() - start < 0.5, "Dolu kuyruk log çağrısını bekletmemeli"
+    stats = pipeline.stats
+    assert stats['queued'] + stats['dropped'] == 50
+    assert stats['dropped'] >= 40
+    assert pipeline.handler.dropped_by_level['INFO'] == stats['dropped']
+    
+    # Kuyruk boşalınca atılan kayıtlar tek uyarıyla bildirilir
+    gate.set()
+    while pipeline.stats['pending']:
+        time.sleep(0.01)
+    logger.error("Kuyruk boşaldıktan sonra")
+    pipeline.stop()
+    assert handler.lines[-2] == f"WARNING | ⚠️ Log kuyruğu doldu, {stats['dropped']} kayıt atıldı"
+    assert handler.lines[-1] == "ERROR | Kuyruk boşaldıktan sonra"
+    assert handler.lines[0] == "INFO | Satır 0", "Kayıt sırası korunmalı"
+    print(f"✅ Dolu kuyruk beklemeden {stats['dropped']} kaydı attı ve bildirdi")
+    
+    print("✅ Log hattı testleri tamamlandı\n")
+
+
+def test_log_budget():
+    """Log bütçesini (örnekleme, tekrar sınırı, hata bağlamı, trace modu) test eder"""
+    print("🧪 Log bütçesi testleri başlatılıyor...")
+    
+    class ListHandler(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.lines = []
+        
+        def emit(self, record):
+            self.lines.append(record.getMessage())
+    
+    now = [0.0]
+    handler = ListHandler()
+    logger = logging.getLogger('test.log_budget')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(handler)
+    budget = LogBudget(
+        {'test_bot.hot_path': 0.1}, window=60, burst=5, error_context=20,
+        sink=handler.handle, trace_loggers=[logger], clock=lambda: now[0]
+    )
+    handler.addFilter(budget)
+    
+    def hot_path(i):
+        logger.info("Ticket adımı %d", i)
+    
+    def other_path(i):
+        logger.info("Kullanıcı %d katıldı", i)
+    
+    try:
+        # Örneklenen çağrı yerinden her 10 kayıttan biri; WARNING ve üstü hiç örneklenmez
+        for i in range(50):
+            hot_path(i)
+        assert handler.lines == [f"Ticket adımı {i}" for i in range(0, 50, 10)]
+        assert budget.stats['sampled'] == 45
+        handler.lines.clear()
+        
+        # Tekrar sınırı: pencere başına 5 kayıt, fazlası özetlenir
+        for i in range(50):
+            other_path(i)
+        assert handler.lines == [f"Kullanıcı {i} katıldı" for i in range(5)]
+        now[0] = 61
+        other_path(99)
+        assert handler.lines[-2] == "🔇 Son 61 sn içinde 45 benzer kayıt bastırıldı: Kullanıcı %d katıldı"
+        assert handler.lines[-1] == "Kullanıcı 99 katıldı"
+        
+        # Yeni şablon gelmeden biten pencereler de özetlenir
+        for i in range(10):
+            other_path(i)
+        assert budget.flush() == 1
+        assert handler.lines[-1].startswith("🔇 Son 0 sn içinde 6 benzer kayıt")
+        
+        # Tekrarlayan hatalar pencere sınırına takılmadan hepsi yazılır
+        handler.lines.clear()
+        for i in range(12):
+            logger.error("Veritabanı hatası: %s", i)
+        assert [line for line in handler.lines if line.startswith("Veritabanı")] == [f"Veritabanı hatası: {i}" for i in range(12)]
+        assert budget.flush() == 0
+        print("✅ Örnekleme ve tekrar özetleri çalışıyor")
+        
+        # Hata bağlamı: aynı sunucuda atlanan kayıtlar hatanın önüne eklenir, diğer sunucularınki eklenmez
+        handler.lines.clear()
+        
+        async def guild_flow(guild_id, steps, fail):
+            set_log_guild(guild_id)
+            for i in range(steps):
+                hot_path(guild_id * 100 + i)
+            if fail:
+                logger.error("Ticket oluşturma hatası: %s", guild_id)
+        
+        async def run_flows():
+            await asyncio.gather(guild_flow(1, 3, False), guild_flow(2, 3, True))
+        
+        budget._sites.clear()
+        asyncio.run(run_flows())
+        assert log_guild.get() is None, "Sunucu bağlamı task dışına taşmamalı"
+        assert handler.lines == ["Ticket adımı 100", "Ticket adımı 200", "Ticket adımı 201", "Ticket adımı 202", "Ticket oluşturma hatası: 2"], handler.lines
+        print("✅ Hata bağlamı yalnızca ilgili sunucudan ekleniyor")
+        
+        # Trace modu: sadece açık sunucunun DEBUG kayıtları yazılır ve örneklenmez, süre dolunca kapanır
+        handler.lines.clear()
+        
+        async def traced_flow(guild_id):
+            set_log_guild(guild_id)
+            logger.debug("Interaction data: %s", guild_id)
+            for i in range(3):
+                hot_path(i)
+        
+        budget.enable_trace(2, duration=600)
+        assert logger.level == logging.DEBUG
+        asyncio.run(traced_flow(1))
+        asyncio.run(traced_flow(2))
+        assert handler.lines == ["Interaction data: 2", "Ticket adımı 0", "Ticket adımı 1", "Ticket adımı 2"], handler.lines
+        now[0] += 601
+        assert not budget.traced(2)
+        assert logger.level == logging.INFO
+        print("✅ Sunucu bazlı trace modu çalışıyor")
+    finally:
+        logger.removeHandler(handler)
+    
+    print("✅ Log bütçesi testleri tamamlandı\n")
+
+
+def test_log_archive():
+    """Log döndürme, arka plan sıkıştırma, saklama ve zaman aralıklı aramayı test eder"""
+    print("🧪 Log arşivi testleri başlatılıyor...")
+    
+    base = datetime(2025, 8, 20, 10, 0, 0).timestamp()
+    
+    def write_records(handler, count, start=0):
+        for i in range(start, start + count):
+            record = logging.LogRecord('bot', logging.INFO, __file__, 0, "Ticket #%d oluşturuldu", (i,), None)
+            record.created = base + i * 60
+            if i % 25 == 0:
+                record.msg += "\nTraceback (most recent call last):\n  ValueError: ticket %d"
+                record.args = (i, i)
+            handler.handle(record)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        archiver = LogArchiver(tmp, 'bot', max_files=4, block_size=1024)
+        archiver.start()
+        handler = ArchivingFileHandler(os.path.join(tmp, 'bot.log'), archiver, interval=None, max_bytes=3000)
+        handler.setFormatter(logging.Formatter('%(asctime)s | %(levelname)s | %(message)s', '%Y-%m-%d %H:%M:%S'))
+        write_records(handler, 400)
+        handler.close()
+        
+        # Boyut sınırında dönüldü, döndürülenler sıkıştırıldı, en eski arşivler silindi
+        names = sorted(os.listdir(tmp))
+        archives = [name for name in names if name.endswith('.log.gz')]
+        assert handler.stats['rollovers'] >= 6
+        assert len(archives) == 4
+        assert archiver.stats['compressed'] == handler.stats['rollovers']
+        assert archiver.stats['deleted'] == archiver.stats['compressed'] - 4
+        assert archiver.stats['bytes_out'] < archiver.stats['bytes_in'] / 2
+        assert all(name + '.idx' in names for name in archives)
+        assert not [name for name in names if name.endswith('.tmp') or name.startswith('bot-') and name.endswith('.log')]
+        assert os.path.getsize(os.path.join(tmp, "bot.log")) < 3000 + 200
+        print(f"✅ {handler.stats['rollovers']} döndürme, {archiver.stats['deleted']} eski arşiv silindi")
+        
+        # Arşiv art arda gzip üyelerinden oluşur; standart gzip ile okunabilir, indeks blokları kapsar
+        archive = os.path.join(tmp, archives[0])
+        index = read_index(archive)
+        with gzip.open(archive, 'rt', encoding='utf-8') as f:
+            content = f.read()
+        assert content.count('\n') == index['lines']
+        assert len(index['blocks']) > 1
+        assert index['first'] <= index['blocks'][1][0] <= index['last']
+        
+        # Tüm aralık: kalan kayıtlar sırayla ve kesintisiz, en yenisi aktif dosyada
+        everything = [line for _, line in search_logs(tmp, r'Ticket #\d+ oluşturuldu')]
+        numbers = [int(line.split('#')[1].split()[0]) for line in everything]
+        assert numbers == list(range(numbers[0], 400)), "Kayıtlar eksiksiz ve sıralı olmalı"
+        assert numbers[0] > 0, "Saklama sınırını aşan kayıtlar silinmeli"
+        
+        # Zaman aralığı yalnızca ilgili blokları açar
+        first_kept = numbers[0]
+        since = datetime.fromtimestamp(base + (first_kept + 50) * 60).strftime('%Y-%m-%d %H:%M')
+        until = datetime.fromtimestamp(base + (first_kept + 79) * 60).strftime('%Y-%m-%d %H:%M')
+        stats = {}
+        ranged = list(search_logs(tmp, r'Ticket #', since, until, stats=stats))
+        assert [line for _, line in ranged] == everything[50:80]
+        assert stats['blocks_skipped'] > stats['blocks_read'], stats
+        
+        # Damgasız devam satırları (traceback) kaydın zamanını alır
+        traced_ticket = next(i for i in range(first_kept, 400) if i % 25 == 0)
+        at = datetime.fromtimestamp(base + traced_ticket * 60).strftime('%Y-%m-%d %H:%M')
+        matches = [line for _, line in search_logs(tmp, r'ValueError', at, at)]
+        assert matches == [f"  ValueError: ticket {traced_ticket}"], matches
+        assert list(search_logs(tmp, r'valueerror', at, at)) == []
+        assert len(list(search_logs(tmp, r'valueerror', at, at, ignore_case=True))) == 1
+        print(f"✅ Zaman aralıklı arama {stats['blocks_read']} blok açtı, {stats['blocks_skipped']} blok atlandı")
+        
+        # CLI: eşleşme varsa 0, yoksa 1
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            assert log_archive_main([r'Ticket #%d ' % traced_ticket, '--dir', tmp, '--since', at[:10]]) == 0
+            assert log_archive_main(['bulunmayan', '--dir', tmp]) == 1
+        assert output.getvalue().count('\n') == 1 and output.getvalue().startswith('bot')
+    
+    # Yarıda kalan sıkıştırma ve eski adlandırma açılışta tamamlanır
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = os.path.join(tmp, 'bot_20250820.log')
+        with open(legacy, 'w', encoding='utf-8') as f:
+            f.write("2025-08-20 10:00:00 | INFO | eski kayıt\n")
+        with open(os.path.join(tmp, 'bot-20250821-000000.log.gz.tmp'), 'wb') as f:
+            f.write(b'yarim')
+        archiver = LogArchiver(tmp, 'bot', max_age_days=36500)
+        archiver.adopt(legacy, datetime(2025, 8, 20, 23, 59, 59).timestamp())
+        archiver.start()
+        archiver.stop()
+        assert sorted(os.listdir(tmp)) == ['bot-20250820-235959.log.gz', 'bot-20250820-235959.log.gz.idx']
+        assert [line for _, line in search_logs(tmp, 'eski', '2025-08-20')] == ["2025-08-20 10:00:00 | INFO | eski kayıt"]
+        
+        # Yaş sınırı: aralığı geçen arşivler silinir
+        archiver.max_age_days = 30
+        archiver.apply_retention(now=datetime(2025, 10, 1).timestamp())
+        assert os.listdir(tmp) == []
+    
+    # Doğrudan sıkıştırma: damgasız satırla başlayan blok önceki kaydın zamanını alır, kaynak silinir
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'tek.log')
+        text = (
+            "2025-08-20 10:00:00 | ERROR | hata\n"
+            "Traceback (most recent call last):\n"
+            "  ValueError: blok başı\n"
+            "2025-08-20 10:05:00 | INFO | sonraki\n"
+        )
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write(text)
+        archive = compress_log(source, block_size=60)
+        assert archive == source + '.gz' and not os.path.exists(source)
+        with gzip.open(archive, 'rt', encoding='utf-8') as f:
+            assert f.read() == text
+        index = read_index(archive)
+        assert index['lines'] == 4
+        assert [block[:2] for block in index['blocks']] == [
+            ['2025-08-20 10:00:00', '2025-08-20 10:00:00'],
+            ['2025-08-20 10:00:00', '2025-08-20 10:05:00'],
+        ]
+    
+    # Zaman bazlı döndürme gece yarısına hizalanır
+    with tempfile.TemporaryDirectory() as tmp:
+        hourly = ArchivingFileHandler(os.path.join(tmp, 'bot.log'), LogArchiver(tmp, 'bot'), interval=3600)
+        noon = datetime(2025, 8, 20, 10, 30, 5).timestamp()
+        assert hourly.next_rollover(noon) == datetime(2025, 8, 20, 11, 0, 0).timestamp()
+        hourly.interval = 86400
+        assert hourly.next_rollover(noon) == datetime(2025, 8, 21, 0, 0, 0).timestamp()
+        hourly.close()
+    print("✅ Kurtarma, yaş sınırı ve gece yarısı hizalaması çalışıyor")
+    
+    print("✅ Log arşivi testleri tamamlandı\n")
+
+
 def main():
     """Ana test fonksiyonu"""
     print("🚀 Discord Davet Bot Test Suite Başlatılıyor...\n")
@@ -116,6 +1747,31 @@ def main():
     try:
         test_database()
         test_invite_code_generation()
+        test_async_database()
+        test_invite_uses_cache()
+        test_join_attribution_raid()
+        test_schema_migrations()
+        test_invite_rate_tracker()
+        test_membership_index()
+        test_leaderboard()
+        test_user_cache()
+        test_bulk_invite_sync()
+        test_open_ticket_index()
+        test_ticket_log_forwarder()
+        test_ticket_config_cache()
+        test_ticket_number_allocation()
+        test_ticket_admission()
+        test_ticket_single_flight()
+        test_ticket_panel_refresh()
+        test_ticket_transcripts()
+        test_query_stats()
+        test_database_pragmas()
+        test_write_behind_buffer()
+        test_guild_partitioning()
+        test_shard_launcher()
+        test_log_pipeline()
+        test_log_budget()
+        test_log_archive()
         
         print("🎉 Tüm testler başarıyla tamamlandı!")
         print("Bot kullanıma hazır!")
@@ -0,0 +1,261 @@
+"""
+Ticket sistemi yardımcıları.
+Açık ticket kanalları bellekte tutulur; böylece her mesajda veritabanına
+gitmeden kanalın ticket olup olmadığı anlaşılır.
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def allocate_ticket_number(cursor, guild_id):
+    """
+    Sunucunun sonraki ticket numarasını ayırır. Önce sayaç artırılır (yazma kilidi
+    alınır), ayrılan numara aynı transaction'da geri okunur; böylece eşzamanlı
+    istekler aynı numarayı alamaz (RETURNING gerektirmez, SQLite < 3.35 ile çalışır).
+    Konfigürasyon yoksa None döner.
+    """
+    cursor.execute('''
+        UPDATE ticket_config
+        SET ticket_counter = ticket_counter + 1
+        WHERE guild_id = ?
+    ''', (guild_id,))
+    if cursor.rowcount == 0:
+        return None
+    cursor.execute('SELECT ticket_counter - 1 FROM ticket_config WHERE guild_id = ?', (guild_id,))
+    return cursor.fetchone()[0]
+
+
+def admit_ticket(cursor, guild_id, user_id, date, daily_limit, category_id, category_name):
+    """
+    Ticket kabulünü tek transaction'da yapar: günlük limit ve açık ticket
+    kontrolü, numara ayırma, kaydı ekleme (kanal henüz yok, channel_id = 0)
+    ve günlük sayacı artırma.
+    Dönüş: ('ok', (ticket_id, ticket_number, daily_count)), ('limit', daily_count),
+    ('active', ticket_number) veya ('no_config', None)
+    """
+    cursor.execute('''
+        SELECT count FROM user_daily_tickets
+        WHERE guild_id = ? AND user_id = ? AND date = ?
+    ''', (guild_id, user_id, date))
+    result = cursor.fetchone()
+    daily_count = result[0] if result else 0
+    if daily_count >= daily_limit:
+        return 'limit', daily_count
+
+    cursor.execute('''
+        SELECT ticket_number FROM tickets
+        WHERE guild_id = ? AND user_id = ? AND status = 'open'
+        LIMIT 1
+    ''', (guild_id, user_id))
+    result = cursor.fetchone()
+    if result:
+        return 'active', result[0]
+
+    ticket_number = allocate_ticket_number(cursor, guild_id)
+    if ticket_number is None:
+        return 'no_config', None
+
+    cursor.execute('''
+        INSERT INTO tickets
+        (guild_id, ticket_number, user_id, channel_id, category_id, category_name)
+        VALUES (?, ?, ?, 0, ?, ?)
+    ''', (guild_id, ticket_number, user_id, category_id, category_name))
+    ticket_id = cursor.lastrowid
+
+    cursor.execute('''
+        INSERT INTO user_daily_tickets (guild_id, user_id, date, count)
+        VALUES (?, ?, ?, 1)
+        ON CONFLICT(guild_id, user_id, date) DO UPDATE SET count = count + 1
+    ''', (guild_id, user_id, date))
+    return 'ok', (ticket_id, ticket_number, daily_count)
+
+
+def attach_ticket_channel(cursor, ticket_id, channel_id):
+    """Kabul edilen ticket'a oluşturulan kanalı bağlar"""
+    cursor.execute('UPDATE tickets SET channel_id = ? WHERE id = ?', (channel_id, ticket_id))
+
+
+def cancel_ticket_admission(cursor, ticket_id, guild_id, user_id, date):
+    """Kanal oluşturulamazsa kabulü geri alır (kayıt silinir, günlük hak iade edilir)"""
+    cursor.execute('DELETE FROM tickets WHERE id = ?', (ticket_id,))
+    cursor.execute('''
+        UPDATE user_daily_tickets SET count = count - 1
+        WHERE guild_id = ? AND user_id = ? AND date = ? AND count > 0
+    ''', (guild_id, user_id, date))
+
+
+async def open_ticket_channel(db, guild_id, user_id, date, daily_limit, category_id, category_name, create_channel):
+    """
+    Ticket kabulü ve kanalı: admit_ticket -> create_channel(ticket_number) ->
+    attach_ticket_channel. Kanal açılamazsa kabul geri alınır ve hata yükseltilir.
+    Dönüş: ('ok', (ticket_id, ticket_number, daily_count, channel)) ya da
+    admit_ticket'in diğer sonuçları
+    """
+    status, value = await db.transaction(admit_ticket, guild_id, user_id, date, daily_limit, category_id, category_name)
+    if status != 'ok':
+        return status, value
+
+    ticket_id, ticket_number, daily_count = value
+    try:
+        channel = await create_channel(ticket_number)
+    except BaseException:
+        # Kullanıcının günlük hakkı iade edilir
+        await db.transaction(cancel_ticket_admission, ticket_id, guild_id, user_id, date)
+        raise
+    await db.transaction(attach_ticket_channel, ticket_id, channel.id)
+    return 'ok', (ticket_id, ticket_number, daily_count, channel)
+
+
+class OpenTicketIndex:
+    """Açık ticket kanalları: channel_id -> (guild_id, ticket_number, user_id)"""
+
+    def __init__(self):
+        self.loaded = False
+        self._channels = {}
+
+    def load(self, rows):
+        """İndeksi (channel_id, guild_id, ticket_number, user_id) kayıtlarıyla baştan kurar"""
+        self._channels = {channel_id: (guild_id, ticket_number, user_id) for channel_id, guild_id, ticket_number, user_id in rows}
+        self.loaded = True
+
+    def add(self, channel_id, guild_id, ticket_number, user_id):
+        """Yeni açılan ticket kanalını ekler"""
+        self._channels[channel_id] = (guild_id, ticket_number, user_id)
+
+    def remove(self, channel_id):
+        """Kapatılan ticket kanalını siler"""
+        self._channels.pop(channel_id, None)
+
+    def get(self, channel_id):
+        """Kanal açık bir ticket ise (guild_id, ticket_number, user_id), değilse None"""
+        return self._channels.get(channel_id)
+
+    def clear(self):
+        self._channels.clear()
+
+    def __contains__(self, channel_id):
+        return channel_id in self._channels
+
+    def __len__(self):
+        return len(self._channels)
+
+
+class TicketConfigCache:
+    """
+    Sunucu başına ticket konfigürasyonu önbelleği.
+    İlk istekte veritabanından yüklenir (konfigürasyonu olmayan sunucular da
+    None olarak önbelleklenir); kayıt ve sıfırlama işlemleri önbelleği geçersiz kılar.
+    """
+
+    def __init__(self):
+        self._configs = {}
+        self._version = 0
+        self.stats = {'hits': 0, 'misses': 0}
+
+    async def get(self, guild_id, load):
+        """Konfigürasyonu önbellekten, yoksa load(guild_id) ile getirir"""
+        if guild_id in self._configs:
+            self.stats['hits'] += 1
+            config = self._configs[guild_id]
+        else:
+            self.stats['misses'] += 1
+            version = self._version
+            config = await load(guild_id)
+            # Yükleme sırasında kayıt/sıfırlama olduysa eski veriyi önbelleğe alma
+            if version == self._version:
+                self._configs[guild_id] = config
+        return dict(config) if config is not None else None
+
+    def update(self, guild_id, **fields):
+        """Önbellekteki konfigürasyonun alanlarını günceller (yüklenmemişse dokunmaz)"""
+        config = self._configs.get(guild_id)
+        if config is not None:
+            config.update(fields)
+
+    def invalidate(self, guild_id=None):
+        """Bir sunucunun (veya tüm sunucuların) konfigürasyonunu önbellekten siler"""
+        self._version += 1
+        if guild_id is None:
+            self._configs.clear()
+        else:
+            self._configs.pop(guild_id, None)
+
+    def hit_rate(self):
+        total = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / total if total else 0.0
+
+    def __len__(self):
+        return len(self._configs)
+
+
+class SingleFlight:
+    """
+    Anahtar başına tek işlem: aynı anahtarla gelen eşzamanlı çağrılar devam
+    eden işleme katılır ve aynı sonucu alır. İşlem bitince kayıt silinir,
+    boşta bekleyen kilit tutulmaz.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.stats = {'leaders': 0, 'followers': 0}
+
+    async def run(self, key, func, *args):
+        """func(*args) sonucunu döndürür; anahtar için işlem sürüyorsa onu bekler"""
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats['leaders'] += 1
+            task = asyncio.ensure_future(func(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats['followers'] += 1
+        # Bekleyen çağrı iptal edilse de işlem diğerleri için sürer
+        return await asyncio.shield(task)
+
+    def in_flight(self, key):
+        return key in self._inflight
+
+    def __len__(self):
+        return len(self._inflight)
+
+
+class DebouncedRefresher:
+    """
+    Anahtar başına gecikmeli yenileme: ilk istekten `delay` saniye sonra
+    refresh(key) bir kez çağrılır, bu sürede gelen istekler aynı yenilemeye katılır.
+    """
+
+    def __init__(self, refresh, delay=60.0):
+        self.refresh = refresh
+        self.delay = delay
+        self._pending = {}
+        self._tasks = set()
+        self.stats = {'requests': 0, 'refreshes': 0}
+
+    def schedule(self, key):
+        """Yenileme ister (beklemeden döner)"""
+        self.stats['requests'] += 1
+        if key not in self._pending:
+            task = self._pending[key] = asyncio.ensure_future(self._run(key))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key):
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            # Yenileme sırasında gelen istekler yeni bir yenileme planlar
+            self._pending.pop(key, None)
+        self.stats['refreshes'] += 1
+        try:
+            await self.refresh(key)
+        except Exception as e:
+            logger.error("Yenileme hatası (%s): %s", key, e)
+
+    async def flush(self):
+        """Bekleyen yenilemelerin tamamlanmasını bekler"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
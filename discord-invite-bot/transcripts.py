@@ -0,0 +1,58 @@
+"""
+Ticket transkript arşivleyici.
+Kapatılan ticket kanalının mesajları sayfa sayfa okunup sıkıştırılmış
+JSONL (.jsonl.gz) dosyasına akıtılır; bellek kullanımı ticket uzunluğundan
+bağımsızdır.
+"""
+
+import asyncio
+import functools
+import gzip
+import json
+import os
+
+
+async def write_transcript(messages, path, serialize=lambda message: message, page_size=100):
+    """
+    Mesajları (async iterable) sıkıştırılmış JSONL dosyasına yazar.
+    Satırlar page_size'lık gruplar halinde yazıcı thread'ine verilir.
+    Dönüş: (mesaj sayısı, dosya boyutu)
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = path + '.tmp'
+    count = 0
+    page = []
+
+    loop = asyncio.get_running_loop()
+    fh = await loop.run_in_executor(None, functools.partial(gzip.open, temp_path, 'wt', encoding='utf-8'))
+    try:
+        async for message in messages:
+            page.append(json.dumps(serialize(message), ensure_ascii=False, default=str))
+            count += 1
+            if len(page) >= page_size:
+                await loop.run_in_executor(None, fh.write, '\n'.join(page) + '\n')
+                page = []
+        if page:
+            await loop.run_in_executor(None, fh.write, '\n'.join(page) + '\n')
+        await loop.run_in_executor(None, fh.close)
+    except BaseException:
+        fh.close()
+        os.remove(temp_path)
+        raise
+
+    # Yarım dosya asla son adla görünmesin
+    os.replace(temp_path, path)
+    return count, os.path.getsize(path)
+
+
+def read_transcript(path):
+    """Transkript dosyasındaki mesajları sırayla döndürür"""
+    with gzip.open(path, 'rt', encoding='utf-8') as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def transcript_path(base_dir, guild_id, ticket_number, ticket_id):
+    """Transkript dosyasının yolu: <dizin>/<guild_id>/ticket-<numara>-<id>.jsonl.gz"""
+    return os.path.join(base_dir, str(guild_id), f"ticket-{ticket_number}-{ticket_id}.jsonl.gz")
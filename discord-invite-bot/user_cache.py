@@ -0,0 +1,108 @@
+"""
+Kullanıcı çözümleme önbelleği.
+Önce bellekteki üye/kullanıcı nesnelerine bakar, bulunamazsa sınırlı
+eşzamanlılıkla API'den çeker; sonuçlar (bulunamayanlar dahil) TTL ve
+LRU ile önbelleklenir. Geçici hatalar (hız sınırı, sunucu hatası, zaman
+aşımı) önbelleklenmez, sonraki istekte tekrar denenir.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class UserCache:
+    """TTL + LRU kullanıcı önbelleği (get_local -> önbellek -> fetch)"""
+
+    def __init__(self, get_local, fetch, ttl=600, negative_ttl=300, max_size=10000, concurrency=5,
+                 not_found=LookupError):
+        self.get_local = get_local
+        self.fetch = fetch
+        # Yalnızca bu istisnalar "kullanıcı yok" sayılır (bot: discord.NotFound)
+        self.not_found = not_found
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._semaphore = None
+        self._concurrency = concurrency
+        self.stats = {'local': 0, 'hits': 0, 'fetches': 0, 'not_found': 0, 'errors': 0}
+
+    def _store(self, user_id, user, ttl):
+        self._entries[user_id] = (user, time.monotonic() + ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _cached(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return False, None
+        user, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[user_id]
+            return False, None
+        self._entries.move_to_end(user_id)
+        return True, user
+
+    async def _fetch(self, user_id):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        async with self._semaphore:
+            self.stats['fetches'] += 1
+            try:
+                user = await self.fetch(user_id)
+            except self.not_found:
+                user = None
+            except Exception:
+                # Geçici hata: önbelleğe yazılmaz
+                self.stats['errors'] += 1
+                return None
+        if user is None:
+            self.stats['not_found'] += 1
+            self._store(user_id, None, self.negative_ttl)
+        else:
+            self._store(user_id, user, self.ttl)
+        return user
+
+    async def get(self, user_id, guild=None):
+        """Kullanıcıyı getirir; bulunamazsa None"""
+        user = self.get_local(user_id, guild)
+        if user is not None:
+            self.stats['local'] += 1
+            return user
+
+        found, user = self._cached(user_id)
+        if found:
+            self.stats['hits'] += 1
+            return user
+
+        # Aynı kullanıcı için eşzamanlı istekler tek fetch'i paylaşır
+        task = self._inflight.get(user_id)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(user_id))
+            self._inflight[user_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(user_id, None))
+        return await asyncio.shield(task)
+
+    async def get_many(self, user_ids, guild=None):
+        """Birden fazla kullanıcıyı paralel getirir: {user_id: user veya None}"""
+        unique_ids = list(dict.fromkeys(user_ids))
+        users = await asyncio.gather(*(self.get(user_id, guild) for user_id in unique_ids))
+        return dict(zip(unique_ids, users))
+
+    async def display_name(self, user_id, guild=None):
+        """Kullanıcının görünen adı; bulunamazsa 'ID: ...'"""
+        user = await self.get(user_id, guild)
+        return user.display_name if user else f"ID: {user_id}"
+
+    def invalidate(self, user_id=None):
+        """Bir kullanıcıyı (veya tüm önbelleği) siler"""
+        if user_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(user_id, None)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,121 @@
+"""
+Yüksek frekanslı sayaç güncellemeleri için write-behind tamponu.
+Güncellemeler bellekte anahtar bazında birleştirilir ve her `interval`
+saniyede ya da `max_pending` farklı kayda ulaşıldığında tek bir
+transaction'da yazılır. Transaction yarıda kalırsa hiçbir satır yazılmaz
+ve toplu iş tampona geri konur.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Sayaç güncellemelerini biriktirip toplu yazan tampon"""
+
+    def __init__(self, db, interval=0.5, max_pending=500):
+        self.db = db
+        self.interval = interval
+        self.max_pending = max_pending
+        # (ifade, anahtar) -> [parametreler, artış (None = son değer kazanır)]
+        self._pending = OrderedDict()
+        self._timer = None
+        self._lock = asyncio.Lock()
+        self.stats = {
+            'updates': 0, 'coalesced': 0, 'flushes': 0, 'written': 0, 'failed': 0,
+            'max_batch': 0, 'last_batch': 0, 'last_flush_ms': 0.0, 'max_flush_ms': 0.0
+        }
+
+    def set(self, statement, key, params):
+        """Kaydın son değerini tamponlar (aynı anahtarın önceki değeri ezilir)"""
+        self._put(statement, key, params, None)
+
+    def increment(self, statement, key, params, delta=1):
+        """Sayaç artışını tamponlar; ifade (*params, toplam_artış) ile çalıştırılır"""
+        self._put(statement, key, params, delta)
+
+    def _put(self, statement, key, params, delta):
+        self.stats['updates'] += 1
+        entry = self._pending.get((statement, key))
+        if entry is None:
+            self._pending[(statement, key)] = [params, delta]
+        else:
+            self.stats['coalesced'] += 1
+            entry[0] = params
+            if delta is not None:
+                entry[1] = (entry[1] or 0) + delta
+        self._schedule()
+
+    def _schedule(self):
+        if len(self._pending) >= self.max_pending:
+            asyncio.ensure_future(self._flush_logged())
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.ensure_future(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(self.interval)
+        await self._flush_logged()
+
+    async def _flush_logged(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error("❌ Write-behind flush hatası (%s kayıt bekliyor): %s", len(self._pending), e)
+            # Sonraki denemeyi zamanla
+            if self._pending and (self._timer is None or self._timer.done()):
+                self._timer = asyncio.ensure_future(self._delayed_flush())
+
+    def pending(self):
+        return len(self._pending)
+
+    async def flush(self):
+        """Bekleyen tüm güncellemeleri tek transaction'da yazar, yazılan kayıt sayısını döndürür"""
+        async with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, OrderedDict()
+            start = time.perf_counter()
+            try:
+                await self.db.transaction(write_behind_flush, list(batch.items()))
+            except BaseException:
+                self.stats['failed'] += 1
+                self._requeue(batch)
+                raise
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.stats['flushes'] += 1
+            self.stats['written'] += len(batch)
+            self.stats['last_batch'] = len(batch)
+            self.stats['max_batch'] = max(self.stats['max_batch'], len(batch))
+            self.stats['last_flush_ms'] = elapsed_ms
+            self.stats['max_flush_ms'] = max(self.stats['max_flush_ms'], elapsed_ms)
+            return len(batch)
+
+    def _requeue(self, batch):
+        # Yazılamayan kayıtlar, flush sırasında gelen daha yeni güncellemelerle birleştirilir
+        newer = self._pending
+        self._pending = batch
+        for item, (params, delta) in newer.items():
+            entry = batch.get(item)
+            if entry is None:
+                batch[item] = [params, delta]
+            else:
+                entry[0] = params
+                if delta is not None:
+                    entry[1] = (entry[1] or 0) + delta
+
+    async def close(self):
+        """Zamanlayıcıyı durdurur ve bekleyenleri yazar (kapanışta çağrılır)"""
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+        return await self.flush()
+
+
+def write_behind_flush(cursor, items):
+    """Toplu işi yazar (Database.transaction içinde çalışır)"""
+    for (statement, _), (params, delta) in items:
+        cursor.execute(statement, params if delta is None else (*params, delta))